@@ -0,0 +1,64 @@
+"""Latency benchmark: building a deep agent per request, with and without the subagent graph cache.
+
+Usage:
+    python benchmarks/agent_factory_benchmark.py --runs 20 --tools 20 --subagents 2
+
+Mirrors a graph factory such as mcp_agent_grok_fast.agent(): the tool list is
+built once and reused, while a new chat model instance with the same settings
+is created on every call. The first (cold) call compiles every subagent graph;
+later (warm) calls reuse them from the cache.
+"""
+
+import argparse
+import statistics
+import time
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.tools import BaseTool, StructuredTool
+
+from deepagents import create_deep_agent
+from deepagents.middleware.subagents import clear_subagent_graph_cache, subagent_graph_cache_stats
+
+
+def _make_tools(count: int) -> list[BaseTool]:
+    def browse(url: str) -> str:
+        return url
+
+    return [StructuredTool.from_function(browse, name=f"browser_tool_{i}", description=f"Browser action {i}.") for i in range(count)]
+
+
+def _build(tools: list[BaseTool], subagents: int) -> float:
+    started = time.perf_counter()
+    create_deep_agent(
+        model=ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="bench", max_tokens=20000),
+        tools=tools,
+        subagents=[
+            {"name": f"worker_{i}", "description": f"Worker {i}.", "system_prompt": f"You are worker {i}."}
+            for i in range(subagents)
+        ],
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--tools", type=int, default=20)
+    parser.add_argument("--subagents", type=int, default=2)
+    args = parser.parse_args()
+
+    tools = _make_tools(args.tools)
+    cold: list[float] = []
+    warm: list[float] = []
+    for _ in range(args.runs):
+        clear_subagent_graph_cache()
+        cold.append(_build(tools, args.subagents))
+        warm.append(_build(tools, args.subagents))
+
+    for name, samples in (("cold", cold), ("warm", warm)):
+        print(f"{name:>5}: median {statistics.median(samples):8.1f} ms | min {min(samples):8.1f} ms")
+    print(f"cache: {subagent_graph_cache_stats.hits} hits, {subagent_graph_cache_stats.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Throughput benchmark: concurrent writers on one backend vs. a ShardedBackend.
+
+Usage:
+    python benchmarks/sharded_backend_benchmark.py --writers 32 --files 2000 --shards 4
+
+Each writer thread writes its share of files and then the listing/grep paths are
+timed once. Filesystem shards use fsync=True so writes are I/O bound, which is
+where spreading load across roots (ideally on separate volumes) pays off.
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.protocol import BackendProtocol
+from deepagents.backends.sharded import ShardedBackend
+
+
+def _run_writers(backend: BackendProtocol, writers: int, files: int) -> float:
+    def write_range(worker: int) -> None:
+        for i in range(worker, files, writers):
+            backend.write(f"/results/worker_{worker}/file_{i}.md", f"result {i}\n" * 20)
+            backend.edit(f"/results/worker_{worker}/file_{i}.md", f"result {i}\n", f"final {i}\n", replace_all=True)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(write_range, range(writers)))
+    return time.perf_counter() - started
+
+
+def _make_fs(root: Path) -> FilesystemBackend:
+    root.mkdir(parents=True, exist_ok=True)
+    return FilesystemBackend(root_dir=str(root), virtual_mode=True, fsync=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = _make_fs(Path(tmp) / "single")
+        sharded = ShardedBackend([_make_fs(Path(tmp) / f"shard{i}") for i in range(args.shards)])
+
+        for name, backend in (("single", single), (f"sharded x{args.shards}", sharded)):
+            elapsed = _run_writers(backend, args.writers, args.files)
+            ops = 2 * args.files / elapsed
+            started = time.perf_counter()
+            found = len(backend.glob_info("**/*.md", "/"))
+            glob_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            backend.grep_raw("final 1", "/")
+            grep_ms = (time.perf_counter() - started) * 1000
+            print(f"{name:>12}: {ops:10.0f} write+edit ops/s | glob {found} files {glob_ms:7.1f} ms | grep {grep_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark SqliteBackend against StoreBackend(InMemoryStore).
+
+Usage:
+    python benchmarks/sqlite_backend_benchmark.py --files 50000
+
+Both backends are loaded with the same synthetic tree (100 directories, small
+text files) and timed on directory listing, globbing, a selective grep, a
+grep with no usable literal, and point reads.
+"""
+
+import argparse
+import random
+import string
+import time
+
+from langchain.tools import ToolRuntime
+from langgraph.store.memory import InMemoryStore
+
+from deepagents.backends.protocol import BackendProtocol
+from deepagents.backends.sqlite import SqliteBackend
+from deepagents.backends.store import StoreBackend
+
+
+def _content(rng: random.Random, i: int) -> str:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(40)]
+    if i % 5000 == 0:
+        words.append("NEEDLE_TOKEN")
+    return "\n".join(" ".join(words[j : j + 8]) for j in range(0, len(words), 8))
+
+
+def _timed(label: str, fn, repeat: int = 3) -> None:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    size = len(result) if isinstance(result, list) else 1
+    print(f"    {label:<28} {best * 1000:10.1f} ms  ({size} results)")
+
+
+def _bench(name: str, backend: BackendProtocol, files: int) -> None:
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for i in range(files):
+        backend.write(f"/corpus/dir_{i % 100}/file_{i}.txt", _content(rng, i))
+    print(f"{name}: loaded {files} files in {time.perf_counter() - started:.1f} s")
+    _timed("ls_info /corpus/dir_7/", lambda: backend.ls_info("/corpus/dir_7/"))
+    _timed("glob dir_7/*.txt", lambda: backend.glob_info("dir_7/*.txt", "/corpus/"))
+    _timed("grep NEEDLE_TOKEN", lambda: backend.grep_raw("NEEDLE_TOKEN", "/"))
+    _timed("grep [q-z]{6} (no literal)", lambda: backend.grep_raw("^[q-z]{6} ", "/corpus/dir_7/"), repeat=1)
+    _timed("100 reads", lambda: [backend.read(f"/corpus/dir_{i % 100}/file_{i}.txt") for i in range(100)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=50000)
+    args = parser.parse_args()
+
+    runtime = ToolRuntime(
+        state={"messages": []},
+        context=None,
+        tool_call_id="bench",
+        store=InMemoryStore(),
+        stream_writer=lambda _: None,
+        config={},
+    )
+    _bench("StoreBackend(InMemoryStore)", StoreBackend(runtime), args.files)
+    _bench("SqliteBackend(:memory:)", SqliteBackend(), args.files)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import asyncio
 from langchain_core.tools import tool
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from deepagents import create_deep_agent
+from deepagents.factory_cache import cached_agent_factory
 
 # Simulated MCP-style tools for demo purposes
 @tool
@@ -61,6 +62,7 @@ async def get_chrome_mcp_tools():
     return tools, mcp_client
 
 
+@cached_agent_factory()
 def agent():
     """Factory function to create the deep agent for LangGraph Studio.
 
@@ -23,6 +23,7 @@ from langchain_core.tools import tool
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_xai import ChatXAI
 from deepagents import create_deep_agent
+from deepagents.factory_cache import cached_agent_factory
 # from parallel_processor_subagent import create_parallel_processor_subagent
 
 
@@ -123,6 +124,19 @@ async def get_mcp_tools():
     return _chrome_tools
 
 
+def reload_mcp_tools():
+    """Reload the MCP tools and rebuild the graph on the next agent() call.
+
+    agent() builds its graph once per process and get_mcp_tools() keeps the
+    tools it loaded, so a changed tool set on the MCP servers is only picked
+    up after calling this.
+    """
+    global _chrome_tools
+    _chrome_tools = None
+    agent.cache.invalidate()
+
+
+@cached_agent_factory()
 async def agent():
     """Async factory function for LangGraph Studio using GROK-4 FAST REASONING MODEL.
 
@@ -10,6 +10,7 @@ Uses remote HTTP connections for:
 """
 
 from deepagents import create_deep_agent
+from deepagents.factory_cache import cached_agent_factory
 from parallel_processor_subagent import create_parallel_processor_subagent
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from functools import wraps
@@ -93,6 +94,19 @@ async def get_mcp_tools():
     return _all_tools
 
 
+def reload_mcp_tools():
+    """Reload the MCP tools and rebuild the graph on the next agent() call.
+
+    agent() builds its graph once per process and get_mcp_tools() keeps the
+    tools it loaded, so a changed tool set on the MCP servers is only picked
+    up after calling this.
+    """
+    global _all_tools
+    _all_tools = None
+    agent.cache.invalidate()
+
+
+@cached_agent_factory()
 async def agent():
     """
     Agent with parallel processing, Chrome DevTools + Perplexity + Firecrawl MCP.
@@ -1,7 +1,19 @@
 """DeepAgents package."""
 
+from deepagents.factory_cache import cached_agent_factory
 from deepagents.graph import create_deep_agent
 from deepagents.middleware.filesystem import FilesystemMiddleware
 from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentMiddleware
+from deepagents.middleware.token_accounting import TokenAccountingMiddleware
+from deepagents.middleware.tool_result_aging import ToolResultAgingMiddleware
 
-__all__ = ["CompiledSubAgent", "FilesystemMiddleware", "SubAgent", "SubAgentMiddleware", "create_deep_agent"]
+__all__ = [
+    "CompiledSubAgent",
+    "FilesystemMiddleware",
+    "SubAgent",
+    "SubAgentMiddleware",
+    "TokenAccountingMiddleware",
+    "ToolResultAgingMiddleware",
+    "cached_agent_factory",
+    "create_deep_agent",
+]
@@ -1,15 +1,27 @@
 """Memory backends for pluggable file storage."""
 
+from deepagents.backends.archive import ArchiveBackend
+from deepagents.backends.caching import CachingBackend
 from deepagents.backends.composite import CompositeBackend
 from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.object_store import ObjectStoreBackend
+from deepagents.backends.sharded import ShardedBackend
+from deepagents.backends.spill import ToolResultSpill
+from deepagents.backends.sqlite import SqliteBackend
 from deepagents.backends.state import StateBackend
 from deepagents.backends.store import StoreBackend
 from deepagents.backends.protocol import BackendProtocol
 
 __all__ = [
+    "ArchiveBackend",
     "BackendProtocol",
+    "CachingBackend",
     "CompositeBackend",
     "FilesystemBackend",
+    "ObjectStoreBackend",
+    "ShardedBackend",
+    "SqliteBackend",
     "StateBackend",
     "StoreBackend",
+    "ToolResultSpill",
 ]
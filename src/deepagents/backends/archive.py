@@ -0,0 +1,287 @@
+"""ArchiveBackend: Serve a read-only zip archive of reference files.
+
+- The central directory is read once into an in-memory index, so ls_info and
+  glob_info never touch the archive data
+- The archive is memory-mapped; read decompresses only the requested member and
+  stops once the requested line window has been produced
+- build_archive / ``python -m deepagents.backends.archive`` pack a directory
+"""
+
+import argparse
+import bisect
+import io
+import mmap
+import re
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import wcmatch.glob as wcglob
+
+from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.utils import (
+    EMPTY_CONTENT_WARNING,
+    FileInfo,
+    GrepMatch,
+    GrepOutputMode,
+    _validate_path,
+    format_content_with_line_numbers,
+    grep_file,
+)
+
+
+class _MappedFile(io.RawIOBase):
+    """Seekable read-only file object over an mmap, as zipfile expects."""
+
+    def __init__(self, mapped: mmap.mmap) -> None:
+        self._mapped = mapped
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        data = self._mapped.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self) -> int:
+        return self._mapped.tell()
+
+
+def _modified_at(info: zipfile.ZipInfo) -> str:
+    return datetime(*info.date_time).isoformat()  # noqa: DTZ001 - zip timestamps are naive
+
+
+class ArchiveBackend:
+    """Read-only backend over a zip archive.
+
+    Intended for large reference corpora that agents search but never modify.
+    Mount it under a CompositeBackend route so the rest of the filesystem stays
+    writable:
+
+    Example:
+        ```python
+        backend = CompositeBackend(
+            default=StateBackend(runtime),
+            routes={"/corpus/": ArchiveBackend("/data/lyrics.zip")},
+        )
+        ```
+
+    Member names map to absolute virtual paths ("lyrics/a.txt" -> "/lyrics/a.txt").
+    write and edit always return an error.
+    """
+
+    def __init__(self, archive_path: str | Path, encoding: str = "utf-8") -> None:
+        """Open the archive and index its members.
+
+        Args:
+            archive_path: Path to a zip archive, e.g. one made by build_archive.
+            encoding: Text encoding of the members; undecodable bytes are replaced.
+        """
+        self.archive_path = Path(archive_path)
+        self.encoding = encoding
+        self._file = self.archive_path.open("rb")
+        self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(_MappedFile(self._mapped))
+
+        # Sorted virtual paths for prefix range scans, and per-directory listings
+        self._members: dict[str, zipfile.ZipInfo] = {}
+        self._dirs: dict[str, dict[str, FileInfo]] = {"/": {}}
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            path = "/" + info.filename.lstrip("/")
+            self._members[path] = info
+            parent = "/"
+            for part in path[1:].split("/")[:-1]:
+                child = f"{parent}{part}/"
+                self._dirs[parent].setdefault(child, {"path": child, "is_dir": True, "size": 0, "modified_at": ""})
+                self._dirs.setdefault(child, {})
+                parent = child
+            self._dirs[parent][path] = self._file_info(path, info)
+        self._paths = sorted(self._members)
+
+    def close(self) -> None:
+        """Close the archive and release the memory map."""
+        self._zip.close()
+        self._mapped.close()
+        self._file.close()
+
+    @staticmethod
+    def _file_info(path: str, info: zipfile.ZipInfo) -> FileInfo:
+        return {"path": path, "is_dir": False, "size": int(info.file_size), "modified_at": _modified_at(info)}
+
+    def _paths_under(self, prefix: str) -> list[str]:
+        """Return member paths starting with prefix, in sorted order."""
+        start = bisect.bisect_left(self._paths, prefix)
+        end = start
+        while end < len(self._paths) and self._paths[end].startswith(prefix):
+            end += 1
+        return self._paths[start:end]
+
+    def _open_text(self, info: zipfile.ZipInfo) -> io.TextIOWrapper:
+        return io.TextIOWrapper(self._zip.open(info), encoding=self.encoding, errors="replace")
+
+    def ls_info(self, path: str) -> list[FileInfo]:
+        """List files and directories in the specified directory (non-recursive).
+
+        Args:
+            path: Absolute path to directory.
+
+        Returns:
+            List of FileInfo-like dicts for files and directories directly in the directory.
+            Directories have a trailing / in their path and is_dir=True.
+        """
+        entries = self._dirs.get(path if path.endswith("/") else path + "/")
+        if entries is None:
+            return []
+        return [dict(entries[p]) for p in sorted(entries)]  # type: ignore[misc]
+
+    def read(
+        self,
+        file_path: str,
+        offset: int = 0,
+        limit: int = 2000,
+    ) -> str:
+        """Read file content with line numbers.
+
+        Only the requested member is decompressed, and only up to the end of the
+        requested window.
+
+        Args:
+            file_path: Absolute file path
+            offset: Line offset to start reading from (0-indexed)
+            limit: Maximum number of lines to read
+
+        Returns:
+            Formatted file content with line numbers, or error message.
+        """
+        info = self._members.get(file_path)
+        if info is None:
+            return f"Error: File '{file_path}' not found"
+        if info.file_size == 0:
+            return EMPTY_CONTENT_WARNING
+
+        selected: list[str] = []
+        total = 0
+        with self._open_text(info) as fh:
+            for total, line in enumerate(fh, 1):  # noqa: B007
+                if total <= offset:
+                    continue
+                selected.append(line.rstrip("\r\n"))
+                if len(selected) >= limit:
+                    break
+        if not selected:
+            return f"Error: Line offset {offset} exceeds file length ({total} lines)"
+        return format_content_with_line_numbers(selected, start_line=offset + 1)
+
+    def write(
+        self,
+        file_path: str,
+        content: str,  # noqa: ARG002
+    ) -> WriteResult:
+        """Reject writes; the archive is read-only."""
+        return WriteResult(error=f"Cannot write to {file_path} because it is in a read-only archive.")
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,  # noqa: ARG002
+        new_string: str,  # noqa: ARG002
+        replace_all: bool = False,  # noqa: ARG002, FBT001, FBT002
+    ) -> EditResult:
+        """Reject edits; the archive is read-only."""
+        return EditResult(error=f"Error: Cannot edit {file_path} because it is in a read-only archive.")
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:  # noqa: ARG002
+        """Reject edits; the archive is read-only."""
+        return EditResult(error=f"Error: Cannot edit {file_path} because it is in a read-only archive.")
+
+    def grep_raw(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid regex pattern: {e}"
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+
+        matches: list[GrepMatch] = []
+        for file_path in self._paths_under(prefix):
+            if glob and not wcglob.globmatch(Path(file_path).name, glob, flags=wcglob.BRACE):
+                continue
+            with self._open_text(self._members[file_path]) as fh:
+                lines = (line.rstrip("\r\n") for line in fh)
+                matches.extend(grep_file(file_path, lines, regex, before=before, after=after, output_mode=output_mode))
+        return matches
+
+    def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+        pattern = pattern.lstrip("/")
+        infos: list[FileInfo] = []
+        for file_path in self._paths_under(prefix):
+            if wcglob.globmatch(file_path[len(prefix):], pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+                infos.append(self._file_info(file_path, self._members[file_path]))
+        return infos
+
+
+def build_archive(source_dir: str | Path, archive_path: str | Path, *, compresslevel: int | None = None) -> int:
+    """Pack every regular file under source_dir into a zip archive for ArchiveBackend.
+
+    Members are written in sorted path order with deflate compression. Symlinks
+    are skipped so the archive cannot reference files outside source_dir.
+
+    Args:
+        source_dir: Directory to pack.
+        archive_path: Destination zip file (overwritten if present).
+        compresslevel: Deflate level 0-9; None uses zlib's default.
+
+    Returns:
+        Number of files packed.
+    """
+    source = Path(source_dir)
+    files = sorted(p for p in source.rglob("*") if p.is_file() and not p.is_symlink())
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zf:
+        for file in files:
+            zf.write(file, file.relative_to(source).as_posix())
+    return len(files)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point: ``python -m deepagents.backends.archive SOURCE_DIR ARCHIVE``."""
+    parser = argparse.ArgumentParser(description="Pack a directory into a zip archive for ArchiveBackend.")
+    parser.add_argument("source_dir", type=Path, help="directory to pack")
+    parser.add_argument("archive", type=Path, help="output .zip path")
+    parser.add_argument("--level", type=int, default=None, help="deflate compression level (0-9)")
+    args = parser.parse_args(argv)
+    if not args.source_dir.is_dir():
+        parser.error(f"{args.source_dir} is not a directory")
+    count = build_archive(args.source_dir, args.archive, compresslevel=args.level)
+    sys.stdout.write(f"Packed {count} files into {args.archive}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""CachingBackend: LRU read-through cache around any BackendProtocol."""
+
+import bisect
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    EditResult,
+    SupportsGlobPage,
+    SupportsGrepPage,
+    SupportsReadMany,
+    WriteResult,
+    apply_edits,
+    list_tree,
+)
+from deepagents.backends.utils import CacheStats, FileInfo, GrepMatch, GrepOutputMode, grep_options
+
+
+def _normalize_dir(path: str | None) -> str:
+    """Normalize a path argument so "/a/" and "/a" share a cache scope."""
+    if not path or path == "/":
+        return "/"
+    return path.rstrip("/") or "/"
+
+
+def _ancestors(file_path: str) -> set[str]:
+    """Return the file itself plus every ancestor directory, normalized."""
+    normalized = _normalize_dir(file_path)
+    scopes = {"/", normalized}
+    parts = normalized.strip("/").split("/")
+    for i in range(1, len(parts)):
+        scopes.add("/" + "/".join(parts[:i]))
+    return scopes
+
+
+class CachingBackend:
+    """Backend wrapper that caches ls/read/glob/grep results in a bounded LRU.
+
+    Entries are keyed by operation and arguments. Writes and edits made through
+    this wrapper invalidate exactly the entries they can affect: reads of the
+    file, listings of its parent directory (and of every ancestor on write, since
+    new directories may appear), and glob/grep results scoped to an ancestor.
+
+    Changes made to the wrapped backend by other writers are not observed, so
+    wrap a backend this instance writes through exclusively (e.g. a route of a
+    CompositeBackend owned by one run).
+
+    Example:
+        ```python
+        backend = CompositeBackend(
+            default=CachingBackend(FilesystemBackend(root_dir="/data", virtual_mode=True)),
+            routes={"/memories/": CachingBackend(StoreBackend(runtime))},
+        )
+        ```
+    """
+
+    def __init__(self, backend: BackendProtocol, max_entries: int = 1024) -> None:
+        """Initialize the caching wrapper.
+
+        Args:
+            backend: Backend whose results are cached.
+            max_entries: Maximum number of cached results before LRU eviction.
+        """
+        self.backend = backend
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        # (operation, scope path, *args) -> result, most recently used last
+        self._entries: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose attributes of the wrapped backend (e.g. `runtime` for StateBackend).
+        # Paged and batched reads are implemented below so they go through the cache;
+        # read_content is forwarded uncached, as whole-file copies are read once.
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def _get(self, key: tuple[Any, ...]) -> tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return True, self._entries[key]
+            self.stats.misses += 1
+            return False, None
+
+    def _put(self, key: tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _invalidate(self, file_path: str, *, created: bool) -> None:
+        """Drop entries that a write (created=True) or edit of file_path can affect."""
+        file_scope = _normalize_dir(file_path)
+        ancestors = _ancestors(file_path)
+        parent = file_scope.rsplit("/", 1)[0] or "/"
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                op, scope = key[0], key[1]
+                if op == "read":
+                    hit = scope == file_scope
+                elif op == "ls":
+                    hit = scope in ancestors if created else scope == parent
+                else:  # glob / grep / tree
+                    hit = scope in ancestors
+                if hit:
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def ls_info(self, path: str) -> list[FileInfo]:
+        """List a directory, serving repeated listings from the cache."""
+        key = ("ls", _normalize_dir(path), path)
+        found, value = self._get(key)
+        if not found:
+            value = self.backend.ls_info(path)
+            self._put(key, value)
+        return [dict(fi) for fi in value]  # type: ignore[misc]
+
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List a directory several levels deep, serving repeated listings from the cache."""
+        key = ("tree", _normalize_dir(path), path, depth, max_entries)
+        found, value = self._get(key)
+        if not found:
+            value = list_tree(self.backend, path, depth, max_entries)
+            self._put(key, value)
+        return [dict(fi) for fi in value]  # type: ignore[misc]
+
+    def read(
+        self,
+        file_path: str,
+        offset: int = 0,
+        limit: int = 2000,
+    ) -> str:
+        """Read file content, serving repeated reads of the same window from the cache."""
+        key = ("read", _normalize_dir(file_path), offset, limit)
+        found, value = self._get(key)
+        if not found:
+            value = self.backend.read(file_path, offset=offset, limit=limit)
+            self._put(key, value)
+        return value
+
+    def read_many(self, requests: list[tuple[str, int, int]]) -> list[str]:
+        """Read several windows, fetching only the uncached ones from the wrapped backend."""
+        keys = [("read", _normalize_dir(file_path), offset, limit) for file_path, offset, limit in requests]
+        results: list[str | None] = []
+        missing: list[int] = []
+        for i, key in enumerate(keys):
+            found, value = self._get(key)
+            results.append(value if found else None)
+            if not found:
+                missing.append(i)
+        if missing:
+            fetch = [requests[i] for i in missing]
+            if isinstance(self.backend, SupportsReadMany):
+                fetched = self.backend.read_many(fetch)
+            else:
+                fetched = [self.backend.read(file_path, offset=offset, limit=limit) for file_path, offset, limit in fetch]
+            for i, value in zip(missing, fetched):
+                self._put(keys[i], value)
+                results[i] = value
+        return results  # type: ignore[return-value]
+
+    def grep_raw(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Search file contents, serving repeated searches from the cache."""
+        key = ("grep", _normalize_dir(path), pattern, path, glob, before, after, output_mode)
+        found, value = self._get(key)
+        if not found:
+            value = self.backend.grep_raw(pattern, path, glob, **grep_options(before, after, output_mode))
+            self._put(key, value)
+        if isinstance(value, str):
+            return value
+        return [copy.deepcopy(m) for m in value]  # type: ignore[misc]
+
+    def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        """Match files by glob, serving repeated patterns from the cache."""
+        key = ("glob", _normalize_dir(path), pattern, path)
+        found, value = self._get(key)
+        if not found:
+            value = self.backend.glob_info(pattern, path)
+            self._put(key, value)
+        return [dict(fi) for fi in value]  # type: ignore[misc]
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        start_after: tuple[str, int] | None = None,
+        limit: int = 1000,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Return one page of grep matches, serving repeated pages from the cache.
+
+        Pages of a backend that resumes natively are cached one by one. For other
+        backends the full result is fetched once, sorted and cached, and every
+        page is cut from it, so paging through it costs a single grep_raw().
+        """
+        if isinstance(self.backend, SupportsGrepPage):
+            key = ("grep", _normalize_dir(path), "page", pattern, path, glob, start_after, limit, before, after, output_mode)
+            found, value = self._get(key)
+            if not found:
+                value = self.backend.grep_page(
+                    pattern, path, glob, start_after=start_after, limit=limit, **grep_options(before, after, output_mode)
+                )
+                self._put(key, value)
+            page = value
+        else:
+            key = ("grep", _normalize_dir(path), "sorted", pattern, path, glob, before, after, output_mode)
+            found, value = self._get(key)
+            if not found:
+                value = self.backend.grep_raw(pattern, path, glob, **grep_options(before, after, output_mode))
+                if not isinstance(value, str):
+                    value = sorted(value, key=lambda m: (m["path"], m["line"]))
+                self._put(key, value)
+            if isinstance(value, str):
+                return value
+            start = 0 if start_after is None else bisect.bisect_right(value, start_after, key=lambda m: (m["path"], m["line"]))
+            page = value[start:start + limit]
+        if isinstance(page, str):
+            return page
+        return [copy.deepcopy(m) for m in page]  # type: ignore[misc]
+
+    def glob_page(
+        self,
+        pattern: str,
+        path: str = "/",
+        *,
+        start_after: str | None = None,
+        limit: int = 1000,
+    ) -> list[FileInfo]:
+        """Return one page of glob results, serving repeated pages from the cache.
+
+        As with grep_page, backends that cannot page natively are globbed once
+        and pages are cut from the cached, sorted result.
+        """
+        if isinstance(self.backend, SupportsGlobPage):
+            key = ("glob", _normalize_dir(path), "page", pattern, path, start_after, limit)
+            found, value = self._get(key)
+            if not found:
+                value = self.backend.glob_page(pattern, path, start_after=start_after, limit=limit)
+                self._put(key, value)
+            page = value
+        else:
+            key = ("glob", _normalize_dir(path), "sorted", pattern, path)
+            found, value = self._get(key)
+            if not found:
+                value = sorted(self.backend.glob_info(pattern, path), key=lambda fi: fi.get("path", ""))
+                self._put(key, value)
+            start = 0 if start_after is None else bisect.bisect_right(value, start_after, key=lambda fi: fi.get("path", ""))
+            page = value[start:start + limit]
+        return [dict(fi) for fi in page]  # type: ignore[misc]
+
+    def write(
+        self,
+        file_path: str,
+        content: str,
+    ) -> WriteResult:
+        """Create a file through the wrapped backend and invalidate affected entries."""
+        res = self.backend.write(file_path, content)
+        if not res.error:
+            self._invalidate(file_path, created=True)
+        return res
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file through the wrapped backend and invalidate affected entries."""
+        res = self.backend.edit(file_path, old_string, new_string, replace_all=replace_all)
+        if not res.error:
+            self._invalidate(file_path, created=False)
+        return res
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits through the wrapped backend and invalidate affected entries."""
+        res = apply_edits(self.backend, file_path, edits)
+        if not res.error:
+            self._invalidate(file_path, created=False)
+        return res
@@ -1,10 +1,92 @@
 """CompositeBackend: Route operations to different backends based on path prefix."""
 
-from typing import Optional
+import contextvars
+import heapq
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional, TypeAlias, TypeVar
 
-from deepagents.backends.protocol import BackendProtocol, WriteResult, EditResult
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    EditResult,
+    WriteResult,
+    apply_edits,
+    list_tree,
+    paginate_glob,
+    paginate_grep,
+)
 from deepagents.backends.state import StateBackend
-from deepagents.backends.utils import FileInfo, GrepMatch
+from deepagents.backends.utils import FANOUT_MAX_WORKERS, FileInfo, GrepMatch, GrepOutputMode, grep_options
+
+T = TypeVar("T")
+
+MAX_NAMED_SKIPPED_ROUTES = 20
+
+RouteTarget: TypeAlias = BackendProtocol | Callable[[], BackendProtocol]
+"""A routed backend instance, or a zero-argument factory built on first access."""
+
+
+
+class _RouteNode:
+    __slots__ = ("children", "prefix")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _RouteNode] = {}
+        self.prefix: str | None = None
+
+
+class _RouteTrie:
+    """Path-segment trie over route prefixes for longest-prefix lookup.
+
+    Lookup cost is proportional to the depth of the path, not the number of
+    routes, which matters for per-user/per-project mounts.
+    """
+
+    def __init__(self, prefixes: Iterator[str] | list[str]) -> None:
+        self.root = _RouteNode()
+        for prefix in prefixes:
+            node = self.root
+            for segment in prefix.strip("/").split("/"):
+                node = node.children.setdefault(segment, _RouteNode())
+            node.prefix = prefix
+
+    def longest_match(self, key: str, *, allow_exact: bool) -> str | None:
+        """Return the longest route prefix matching key.
+
+        Args:
+            key: Absolute path.
+            allow_exact: Also match the route directory itself without a trailing
+                slash (e.g. "/memories" for route "/memories/").
+        """
+        if not key.startswith("/"):
+            return None
+        segments = key[1:].split("/")
+        node = self.root
+        best: str | None = None
+        for i, segment in enumerate(segments):
+            child = node.children.get(segment)
+            if child is None:
+                break
+            node = child
+            # Without allow_exact the key must continue past this segment ("/memories/...")
+            if node.prefix is not None and (allow_exact or i < len(segments) - 1):
+                best = node.prefix
+        return best
+
+    def child_mounts(self, dir_path: str) -> list[str]:
+        """Return mount directories directly under dir_path (which must end with /)."""
+        node = self.root
+        for segment in dir_path.strip("/").split("/"):
+            if not segment:
+                continue
+            child = node.children.get(segment)
+            if child is None:
+                return []
+            node = child
+        base = dir_path if dir_path.endswith("/") else dir_path + "/"
+        return [f"{base}{segment}/" for segment in sorted(node.children)]
 
 
 class CompositeBackend:
@@ -12,16 +94,90 @@ class CompositeBackend:
     def __init__(
         self,
         default: BackendProtocol | StateBackend,
-        routes: dict[str, BackendProtocol],
+        routes: dict[str, RouteTarget],
+        route_timeout: float | None = 30.0,
+        max_cached_backends: int = 256,
+        search_unbuilt_routes: bool = False,
     ) -> None:
+        """Initialize the composite backend.
+
+        Args:
+            default: Backend for paths that match no route.
+            routes: Mapping of path prefixes (e.g. "/memories/") to backends, or to
+                zero-argument factories that build the backend on first access.
+            route_timeout: Seconds to wait for each backend when a grep/glob fans
+                out across routes. Slow or failing backends are skipped and
+                reported through consume_notes() instead of failing the call.
+            max_cached_backends: Maximum number of factory-built backends kept
+                alive; the least recently used one is dropped beyond that.
+            search_unbuilt_routes: Whether a grep/glob that spans several routes
+                also builds factory routes that have not been accessed yet. Off
+                by default, so a search from "/" over many per-user mounts only
+                visits backend instances and factory routes already in use;
+                the skipped routes are reported through consume_notes(). Search
+                inside a route's own path to reach an unbuilt one.
+        """
         # Default backend
         self.default = default
+        self.route_timeout = route_timeout
+        self._local = threading.local()
 
         # Virtual routes
         self.routes = routes
-        
-        # Sort routes by length (longest first) for correct prefix matching
-        self.sorted_routes = sorted(routes.items(), key=lambda x: len(x[0]), reverse=True)
+        self._route_trie = _RouteTrie(list(routes))
+
+        # Backends built from factories, most recently used last
+        self.max_cached_backends = max_cached_backends
+        self.search_unbuilt_routes = search_unbuilt_routes
+        self._built_backends: OrderedDict[str, BackendProtocol] = OrderedDict()
+        self._built_lock = threading.Lock()
+
+    def _route_backend(self, prefix: str) -> BackendProtocol:
+        """Return the backend for a route prefix, building it from its factory if needed."""
+        target = self.routes[prefix]
+        if isinstance(target, BackendProtocol) or not callable(target):
+            return target
+        with self._built_lock:
+            backend = self._built_backends.get(prefix)
+            if backend is not None:
+                self._built_backends.move_to_end(prefix)
+                return backend
+        backend = target()
+        with self._built_lock:
+            self._built_backends[prefix] = backend
+            self._built_backends.move_to_end(prefix)
+            while len(self._built_backends) > self.max_cached_backends:
+                self._built_backends.popitem(last=False)
+        return backend
+
+    def _searchable_routes(self) -> tuple[list[str], list[str]]:
+        """Split route prefixes into those a multi-route grep/glob fans out to and those it skips."""
+        if self.search_unbuilt_routes:
+            return list(self.routes), []
+        with self._built_lock:
+            built = set(self._built_backends)
+        searched: list[str] = []
+        skipped: list[str] = []
+        for prefix, target in self.routes.items():
+            if prefix in built or isinstance(target, BackendProtocol) or not callable(target):
+                searched.append(prefix)
+            else:
+                skipped.append(prefix)
+        return searched, skipped
+
+    @staticmethod
+    def _skipped_routes_note(skipped: list[str]) -> str:
+        names = ", ".join(skipped[:MAX_NAMED_SKIPPED_ROUTES])
+        more = f" and {len(skipped) - MAX_NAMED_SKIPPED_ROUTES} more" if len(skipped) > MAX_NAMED_SKIPPED_ROUTES else ""
+        return f"Note: results from {names}{more} are missing (not opened yet; search inside a route's path to include it)"
+
+    def _match_route(self, path: str | None, *, allow_exact: bool) -> tuple[str, BackendProtocol] | None:
+        if path is None:
+            return None
+        prefix = self._route_trie.longest_match(path, allow_exact=allow_exact)
+        if prefix is None:
+            return None
+        return prefix, self._route_backend(prefix)
 
     def _get_backend_and_key(self, key: str) -> tuple[BackendProtocol, str]:
         """Determine which backend handles this key and strip prefix.
@@ -33,16 +189,66 @@ class CompositeBackend:
             Tuple of (backend, stripped_key) where stripped_key has the route
             prefix removed (but keeps leading slash).
         """
-        # Check routes in order of length (longest first)
-        for prefix, backend in self.sorted_routes:
-            if key.startswith(prefix):
-                # Strip full prefix and ensure a leading slash remains
-                # e.g., "/memories/notes.txt" → "/notes.txt"; "/memories/" → "/"
-                suffix = key[len(prefix):]
-                stripped_key = f"/{suffix}" if suffix else "/"
-                return backend, stripped_key
+        match = self._match_route(key, allow_exact=False)
+        if match is not None:
+            prefix, backend = match
+            # Strip full prefix and ensure a leading slash remains
+            # e.g., "/memories/notes.txt" → "/notes.txt"; "/memories/" → "/"
+            suffix = key[len(prefix):]
+            stripped_key = f"/{suffix}" if suffix else "/"
+            return backend, stripped_key
         
         return self.default, key
+
+    def _fan_out(self, calls: list[tuple[str, Callable[[], T]]], skipped: list[str] | None = None) -> list[tuple[str, T]]:
+        """Run calls concurrently and return (label, result) for those that finished.
+
+        Calls that raise or exceed route_timeout are dropped and recorded as notes
+        for the current thread, as are the unbuilt routes listed in skipped.
+        Results keep the order of calls.
+
+        Each fan-out gets its own pool: a running call cannot be cancelled, so a
+        hung route keeps its worker until it returns, and a shared pool would be
+        starved for every later call by repeated timeouts.
+        """
+        notes: list[str] = [self._skipped_routes_note(skipped)] if skipped else []
+        self._local.notes = notes
+        if len(calls) == 1:
+            label, fn = calls[0]
+            try:
+                return [(label, fn())]
+            except Exception as e:  # noqa: BLE001
+                notes.append(f"Note: results from {label} are missing ({type(e).__name__}: {e})")
+                return []
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(calls), FANOUT_MAX_WORKERS), thread_name_prefix="deepagents-composite"
+        )
+        # Copy the context so backends relying on langgraph's config still see it
+        futures: list[tuple[str, Future[T]]] = [
+            (label, executor.submit(contextvars.copy_context().run, fn)) for label, fn in calls
+        ]
+        wait([f for _, f in futures], timeout=self.route_timeout)
+        # Drop calls still queued; running ones finish on their own without blocking this call
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        completed: list[tuple[str, T]] = []
+        for label, future in futures:
+            if not future.done() or future.cancelled():
+                notes.append(f"Note: results from {label} are missing (timed out after {self.route_timeout}s)")
+                continue
+            exc = future.exception()
+            if exc is not None:
+                notes.append(f"Note: results from {label} are missing ({type(exc).__name__}: {exc})")
+                continue
+            completed.append((label, future.result()))
+        return completed
+
+    def consume_notes(self) -> list[str]:
+        """Return and clear notes about skipped routes from this thread's last fan-out."""
+        notes = getattr(self._local, "notes", None) or []
+        self._local.notes = []
+        return notes
     
     def ls_info(self, path: str) -> list[FileInfo]:
         """List files and directories in the specified directory (non-recursive).
@@ -55,37 +261,68 @@ class CompositeBackend:
             Directories have a trailing / in their path and is_dir=True.
         """
         # Check if path matches a specific route
-        for route_prefix, backend in self.sorted_routes:
-            if path.startswith(route_prefix.rstrip("/")):
-                # Query only the matching routed backend
-                suffix = path[len(route_prefix):]
-                search_path = f"/{suffix}" if suffix else "/"
-                infos = backend.ls_info(search_path)
-                prefixed: list[FileInfo] = []
-                for fi in infos:
-                    fi = dict(fi)
-                    fi["path"] = f"{route_prefix[:-1]}{fi['path']}"
-                    prefixed.append(fi)
-                return prefixed
-
-        # At root, aggregate default and all routed backends
-        if path == "/":
-            results: list[FileInfo] = []
-            results.extend(self.default.ls_info(path))
-            for route_prefix, backend in self.sorted_routes:
-                # Add the route itself as a directory (e.g., /memories/)
-                results.append({
-                    "path": route_prefix,
-                    "is_dir": True,
-                    "size": 0,
-                    "modified_at": "",
-                })
-
-            results.sort(key=lambda x: x.get("path", ""))
-            return results
-
-        # Path doesn't match a route: query only default backend
-        return self.default.ls_info(path)
+        match = self._match_route(path, allow_exact=True)
+        if match is not None:
+            # Query only the matching routed backend
+            route_prefix, backend = match
+            suffix = path[len(route_prefix):]
+            search_path = f"/{suffix}" if suffix else "/"
+            infos = backend.ls_info(search_path)
+            prefixed: list[FileInfo] = []
+            for fi in infos:
+                fi = dict(fi)
+                fi["path"] = f"{route_prefix[:-1]}{fi['path']}"
+                prefixed.append(fi)
+            return prefixed
+
+        # Path doesn't match a route: query the default backend and add mount
+        # points below this directory (e.g. /memories/ at root) without
+        # building their backends
+        results: list[FileInfo] = list(self.default.ls_info(path))
+        seen = {fi.get("path") for fi in results}
+        for mount in self._route_trie.child_mounts(path):
+            if mount in seen:
+                continue
+            results.append({
+                "path": mount,
+                "is_dir": True,
+                "size": 0,
+                "modified_at": "",
+            })
+
+        results.sort(key=lambda x: x.get("path", ""))
+        return results
+
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List path down to depth levels, descending into routed backends.
+
+        Args:
+            path: Absolute path to directory.
+            depth: Number of levels to include (1 is the same as ls_info).
+            max_entries: Maximum number of entries to return.
+
+        Returns:
+            FileInfo-like dicts ordered by path, with route prefixes added.
+        """
+        match = self._match_route(path, allow_exact=True)
+        if match is not None:
+            route_prefix, backend = match
+            suffix = path[len(route_prefix):]
+            infos = list_tree(backend, f"/{suffix}" if suffix else "/", depth, max_entries)
+            return [{**fi, "path": f"{route_prefix[:-1]}{fi['path']}"} for fi in infos]  # type: ignore[typeddict-item]
+
+        # Entries the default backend holds under a mount point are shadowed by the route
+        merged: dict[str, FileInfo] = {
+            fi.get("path", ""): fi
+            for fi in list_tree(self.default, path, depth, max_entries)
+            if self._route_trie.longest_match(fi.get("path", ""), allow_exact=False) is None
+        }
+        for mount in self._route_trie.child_mounts(path):
+            merged.setdefault(mount, {"path": mount, "is_dir": True, "size": 0, "modified_at": ""})
+            if depth > 1:
+                for fi in self.tree_info(mount, depth - 1, max_entries):
+                    merged.setdefault(fi.get("path", ""), fi)
+        return [merged[p] for p in heapq.nsmallest(max_entries, merged)]
 
 
     def read(
@@ -111,57 +348,206 @@ class CompositeBackend:
         pattern: str,
         path: Optional[str] = None,
         glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
     ) -> list[GrepMatch] | str:
+        self._local.notes = []
+        context = grep_options(before, after, output_mode)
         # If path targets a specific route, search only that backend
-        for route_prefix, backend in self.sorted_routes:
-            if path is not None and path.startswith(route_prefix.rstrip("/")):
-                search_path = path[len(route_prefix) - 1:]
-                raw = backend.grep_raw(pattern, search_path if search_path else "/", glob)
-                if isinstance(raw, str):
-                    return raw
-                return [{**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw]
-
-        # Otherwise, search default and all routed backends and merge
+        match = self._match_route(path, allow_exact=True)
+        if match is not None and path is not None:
+            route_prefix, backend = match
+            search_path = path[len(route_prefix) - 1:]
+            raw = backend.grep_raw(pattern, search_path if search_path else "/", glob, **context)
+            if isinstance(raw, str):
+                return raw
+            return [{**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw]
+
+        # Otherwise, search default and all routed backends concurrently and merge
+        calls: list[tuple[str, Callable[[], list[GrepMatch] | str]]] = [
+            ("/", lambda: self.default.grep_raw(pattern, path, glob, **context)),  # type: ignore[attr-defined]
+        ]
+        searched, skipped = self._searchable_routes()
+        for route_prefix in searched:
+            calls.append((route_prefix, lambda p=route_prefix: self._route_backend(p).grep_raw(pattern, "/", glob, **context)))
+
         all_matches: list[GrepMatch] = []
-        raw_default = self.default.grep_raw(pattern, path, glob)  # type: ignore[attr-defined]
-        if isinstance(raw_default, str):
-            # This happens if error occurs
-            return raw_default
-        all_matches.extend(raw_default)
-
-        for route_prefix, backend in self.routes.items():
-            raw = backend.grep_raw(pattern, "/", glob)
+        for label, raw in self._fan_out(calls, skipped):
             if isinstance(raw, str):
                 # This happens if error occurs
                 return raw
-            all_matches.extend({**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw)
+            if label == "/":
+                all_matches.extend(raw)
+            else:
+                all_matches.extend({**m, "path": f"{label[:-1]}{m['path']}"} for m in raw)
 
         return all_matches
     
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        self._local.notes = []
         results: list[FileInfo] = []
 
         # Route based on path, not pattern
-        for route_prefix, backend in self.sorted_routes:
-            if path.startswith(route_prefix.rstrip("/")):
-                search_path = path[len(route_prefix) - 1:]
-                infos = backend.glob_info(pattern, search_path if search_path else "/")
-                return [
-                    {**fi, "path": f"{route_prefix[:-1]}{fi['path']}"}
-                    for fi in infos
-                ]
+        match = self._match_route(path, allow_exact=True)
+        if match is not None:
+            route_prefix, backend = match
+            search_path = path[len(route_prefix) - 1:]
+            infos = backend.glob_info(pattern, search_path if search_path else "/")
+            return [
+                {**fi, "path": f"{route_prefix[:-1]}{fi['path']}"}
+                for fi in infos
+            ]
 
         # Path doesn't match any specific route - search default backend AND all routed backends
-        results.extend(self.default.glob_info(pattern, path))
+        calls: list[tuple[str, Callable[[], list[FileInfo]]]] = [("/", lambda: self.default.glob_info(pattern, path))]
+        searched, skipped = self._searchable_routes()
+        for route_prefix in searched:
+            calls.append((route_prefix, lambda p=route_prefix: self._route_backend(p).glob_info(pattern, "/")))
 
-        for route_prefix, backend in self.routes.items():
-            infos = backend.glob_info(pattern, "/")
-            results.extend({**fi, "path": f"{route_prefix[:-1]}{fi['path']}"} for fi in infos)
+        for label, infos in self._fan_out(calls, skipped):
+            if label == "/":
+                results.extend(infos)
+            else:
+                results.extend({**fi, "path": f"{label[:-1]}{fi['path']}"} for fi in infos)
 
         # Deterministic ordering
         results.sort(key=lambda x: x.get("path", ""))
         return results
 
+    @staticmethod
+    def _route_after(route_prefix: str, start_after: str | None) -> tuple[bool, str | None]:
+        """Translate a resume position into a route's own paths.
+
+        Returns:
+            Whether the route still has results after the position, and the
+            position in the route's paths (None to start from its beginning).
+        """
+        if start_after is None or start_after < route_prefix:
+            return True, None
+        if start_after.startswith(route_prefix):
+            return True, "/" + start_after[len(route_prefix):]
+        return False, None
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        start_after: tuple[str, int] | None = None,
+        limit: int = 1000,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Return up to limit matches in (path, line) order after the given position.
+
+        Each backend resumes from its own position and the pages are merged,
+        so routes sorting entirely before the position are not searched again.
+        """
+        self._local.notes = []
+        match = self._match_route(path, allow_exact=True)
+        if match is not None and path is not None:
+            route_prefix, backend = match
+            search_path = path[len(route_prefix) - 1:]
+            _, route_after = self._route_after(route_prefix, start_after[0] if start_after else None)
+            raw = paginate_grep(
+                backend,
+                pattern,
+                search_path if search_path else "/",
+                glob,
+                start_after=(route_after, start_after[1]) if start_after and route_after else None,
+                limit=limit,
+                before=before,
+                after=after,
+                output_mode=output_mode,
+            )
+            if isinstance(raw, str):
+                return raw
+            return [{**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw]
+
+        calls: list[tuple[str, Callable[[], list[GrepMatch] | str]]] = [
+            ("/", lambda: paginate_grep(
+                self.default,
+                pattern,
+                path,
+                glob,
+                start_after=start_after,
+                limit=limit,
+                before=before,
+                after=after,
+                output_mode=output_mode,
+            )),
+        ]
+        searched, skipped = self._searchable_routes()
+        for route_prefix in searched:
+            pending, route_after = self._route_after(route_prefix, start_after[0] if start_after else None)
+            if not pending:
+                continue
+            route_pos = (route_after, start_after[1]) if start_after and route_after else None
+            calls.append((
+                route_prefix,
+                lambda p=route_prefix, a=route_pos: paginate_grep(
+                    self._route_backend(p),
+                    pattern,
+                    "/",
+                    glob,
+                    start_after=a,
+                    limit=limit,
+                    before=before,
+                    after=after,
+                    output_mode=output_mode,
+                ),
+            ))
+
+        pages: list[list[GrepMatch]] = []
+        for label, raw in self._fan_out(calls, skipped):
+            if isinstance(raw, str):
+                return raw
+            pages.append(raw if label == "/" else [{**m, "path": f"{label[:-1]}{m['path']}"} for m in raw])
+        merged = heapq.merge(*pages, key=lambda m: (m["path"], m["line"]))
+        return [m for _, m in zip(range(limit), merged)]
+
+    def glob_page(
+        self,
+        pattern: str,
+        path: str = "/",
+        *,
+        start_after: str | None = None,
+        limit: int = 1000,
+    ) -> list[FileInfo]:
+        """Return up to limit matching files in path order after the given path."""
+        self._local.notes = []
+        match = self._match_route(path, allow_exact=True)
+        if match is not None:
+            route_prefix, backend = match
+            search_path = path[len(route_prefix) - 1:]
+            _, route_after = self._route_after(route_prefix, start_after)
+            infos = paginate_glob(backend, pattern, search_path if search_path else "/", start_after=route_after, limit=limit)
+            return [{**fi, "path": f"{route_prefix[:-1]}{fi['path']}"} for fi in infos]
+
+        calls: list[tuple[str, Callable[[], list[FileInfo]]]] = [
+            ("/", lambda: paginate_glob(self.default, pattern, path, start_after=start_after, limit=limit)),
+        ]
+        searched, skipped = self._searchable_routes()
+        for route_prefix in searched:
+            pending, route_after = self._route_after(route_prefix, start_after)
+            if not pending:
+                continue
+            calls.append((
+                route_prefix,
+                lambda p=route_prefix, a=route_after: paginate_glob(self._route_backend(p), pattern, "/", start_after=a, limit=limit),
+            ))
+
+        pages = [
+            infos if label == "/" else [{**fi, "path": f"{label[:-1]}{fi['path']}"} for fi in infos]
+            for label, infos in self._fan_out(calls, skipped)
+        ]
+        merged = heapq.merge(*pages, key=lambda fi: fi.get("path", ""))
+        return [fi for _, fi in zip(range(limit), merged)]
+
 
     def write(
             self,
@@ -220,5 +606,21 @@ class CompositeBackend:
                 pass
         return res
 
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file atomically, routing to the appropriate backend."""
+        backend, stripped_key = self._get_backend_and_key(file_path)
+        res = apply_edits(backend, stripped_key, edits)
+        if res.files_update:
+            try:
+                runtime = getattr(self.default, "runtime", None)
+                if runtime is not None:
+                    state = runtime.state
+                    files = state.get("files", {})
+                    files.update(res.files_update)
+                    state["files"] = files
+            except Exception:
+                pass
+        return res
+
 
  
@@ -5,25 +5,84 @@ Security and search upgrades:
 - Prevent symlink-following on file I/O using O_NOFOLLOW when available
 - Ripgrep-powered grep with JSON parsing, plus Python fallback with regex
   and optional glob include filtering, while preserving virtual path behavior
+- Atomic edits through a temp file + rename, streamed in bounded memory for
+  files above a size threshold
+- Bounded LRU/TTL cache of resolved paths with string-prefix containment checks
+- Optional in-memory metadata cache for ls/glob, invalidated by the backend's own
+  writes/edits and by directory mtime changes made outside the backend
 """
 
+import contextlib
 import os
 import re
 import json
+import stat
 import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TextIO
 
 from .utils import (
+    attach_grep_context,
     check_empty_content,
+    check_replacement_occurrences,
     format_content_with_line_numbers,
+    grep_file,
     perform_string_replacement,
+    perform_string_replacements,
 )
 import wcmatch.glob as wcglob
-from deepagents.backends.utils import FileInfo, GrepMatch
+from deepagents.backends.utils import CacheStats, FileInfo, GrepMatch, GrepOutputMode
 from deepagents.backends.protocol import WriteResult, EditResult
 
+# Characters read per chunk by the streaming edit path
+STREAM_EDIT_CHUNK_CHARS = 1024 * 1024
+RG_PAGE_BATCH_FILES = 256
+
+
+def _stream_replace(src: TextIO, old: str, new: str, out: Optional[TextIO] = None) -> int:
+    """Count (and optionally replace) occurrences of old while streaming src.
+
+    Matches follow str.count/str.replace semantics (leftmost, non-overlapping).
+    Only one chunk plus len(old) - 1 carried characters are held in memory, so
+    matches that straddle chunk boundaries are still found.
+
+    Args:
+        src: Text stream to scan.
+        old: Non-empty string to search for.
+        new: Replacement string, written to out when provided.
+        out: Optional destination stream for the rewritten content.
+
+    Returns:
+        Number of occurrences found.
+    """
+    count = 0
+    keep = len(old) - 1
+    carry = ""
+    while True:
+        chunk = src.read(STREAM_EDIT_CHUNK_CHARS)
+        buf = carry + chunk
+        if not chunk:
+            n = buf.count(old)
+            if out is not None:
+                out.write(buf.replace(old, new) if n else buf)
+            return count + n
+        pos = 0
+        while (idx := buf.find(old, pos)) != -1:
+            if out is not None:
+                out.write(buf[pos:idx])
+                out.write(new)
+            pos = idx + len(old)
+            count += 1
+        cut = max(pos, len(buf) - keep)
+        if out is not None:
+            out.write(buf[pos:cut])
+        carry = buf[cut:]
 
 
 class FilesystemBackend:
@@ -39,6 +98,13 @@ class FilesystemBackend:
         root_dir: Optional[str | Path] = None,
         virtual_mode: bool = False,
         max_file_size_mb: int = 10,
+        cache_metadata: bool = False,
+        metadata_cache_ttl: float = 5.0,
+        metadata_cache_size: int = 1024,
+        stream_edit_threshold_mb: int = 4,
+        fsync: bool = False,
+        path_cache_size: int = 4096,
+        path_cache_ttl: float = 2.0,
     ) -> None:
         """Initialize filesystem backend.
         
@@ -46,10 +112,130 @@ class FilesystemBackend:
             root_dir: Optional root directory for file operations. If provided,
                      all file paths will be resolved relative to this directory.
                      If not provided, uses the current working directory.
+            cache_metadata: Serve repeated ls_info/glob_info calls from memory.
+                     Entries are dropped on this backend's own write/edit, when a
+                     listed directory's mtime changes, or after metadata_cache_ttl.
+            metadata_cache_ttl: Maximum age in seconds of a cached listing. Bounds
+                     staleness for changes made outside the backend that do not
+                     touch directory mtimes (e.g. in-place content edits).
+            metadata_cache_size: Maximum number of cached ls_info and of cached
+                     glob_info results each. Entries are evicted LRU.
+            stream_edit_threshold_mb: Files larger than this are edited by streaming
+                     through a temp file instead of being loaded into memory.
+            fsync: fsync edited files and their directory before reporting success.
+            path_cache_size: Maximum number of resolved relative paths kept in
+                     memory outside virtual_mode (0 disables the cache). Entries
+                     are evicted LRU. In virtual_mode every path is resolved and
+                     checked against the root on each call, so a directory swapped
+                     for a symlink pointing outside is never followed.
+            path_cache_ttl: Maximum age in seconds of a cached resolution.
         """
         self.cwd = Path(root_dir).resolve() if root_dir else Path.cwd()
         self.virtual_mode = virtual_mode
         self.max_file_size_bytes = max_file_size_mb * 1024 * 1024
+        self.cache_metadata = cache_metadata
+        self.metadata_cache_ttl = metadata_cache_ttl
+        self.metadata_cache_size = metadata_cache_size
+        self.stream_edit_threshold_bytes = stream_edit_threshold_mb * 1024 * 1024
+        self.fsync = fsync
+        # Precomputed root strings for containment checks and virtual path mapping
+        self._cwd_str = str(self.cwd)
+        self._cwd_prefix = self._cwd_str if self._cwd_str.endswith("/") else self._cwd_str + "/"
+        self.path_cache_size = path_cache_size
+        self.path_cache_ttl = path_cache_ttl
+        # key -> (cached_at, resolved path), most recently used last
+        self._path_cache: OrderedDict[str, tuple[float, Path]] = OrderedDict()
+        self.cache_stats = CacheStats()
+        self._cache_lock = threading.Lock()
+        # dir path -> (dir mtime_ns, cached_at, infos), most recently used last
+        self._ls_cache: OrderedDict[str, tuple[int, float, list[FileInfo]]] = OrderedDict()
+        # (pattern, search dir) -> (cached_at, infos), most recently used last
+        self._glob_cache: OrderedDict[tuple[str, str], tuple[float, list[FileInfo]]] = OrderedDict()
+
+    def _cache_get_ls(self, dir_path: Path) -> Optional[list[FileInfo]]:
+        key = str(dir_path)
+        with self._cache_lock:
+            entry = self._ls_cache.get(key)
+            if entry is not None:
+                self._ls_cache.move_to_end(key)
+        if entry is None:
+            self.cache_stats.misses += 1
+            return None
+        mtime_ns, cached_at, infos = entry
+        try:
+            current_mtime_ns = dir_path.stat().st_mtime_ns
+        except OSError:
+            current_mtime_ns = -1
+        if current_mtime_ns != mtime_ns or time.monotonic() - cached_at > self.metadata_cache_ttl:
+            with self._cache_lock:
+                self._ls_cache.pop(key, None)
+            self.cache_stats.invalidations += 1
+            self.cache_stats.misses += 1
+            return None
+        self.cache_stats.hits += 1
+        return [dict(fi) for fi in infos]  # type: ignore[misc]
+
+    def _cache_put_ls(self, dir_path: Path, mtime_ns: int, infos: list[FileInfo]) -> None:
+        key = str(dir_path)
+        with self._cache_lock:
+            self._ls_cache[key] = (mtime_ns, time.monotonic(), [dict(fi) for fi in infos])  # type: ignore[misc]
+            self._ls_cache.move_to_end(key)
+            while len(self._ls_cache) > self.metadata_cache_size:
+                self._ls_cache.popitem(last=False)
+
+    def _cache_get_glob(self, pattern: str, search_path: Path) -> Optional[list[FileInfo]]:
+        key = (pattern, str(search_path))
+        with self._cache_lock:
+            entry = self._glob_cache.get(key)
+            if entry is not None:
+                self._glob_cache.move_to_end(key)
+        if entry is None:
+            self.cache_stats.misses += 1
+            return None
+        cached_at, infos = entry
+        if time.monotonic() - cached_at > self.metadata_cache_ttl:
+            with self._cache_lock:
+                self._glob_cache.pop(key, None)
+            self.cache_stats.invalidations += 1
+            self.cache_stats.misses += 1
+            return None
+        self.cache_stats.hits += 1
+        return [dict(fi) for fi in infos]  # type: ignore[misc]
+
+    def _cache_put_glob(self, pattern: str, search_path: Path, infos: list[FileInfo]) -> None:
+        key = (pattern, str(search_path))
+        with self._cache_lock:
+            self._glob_cache[key] = (time.monotonic(), [dict(fi) for fi in infos])  # type: ignore[misc]
+            self._glob_cache.move_to_end(key)
+            while len(self._glob_cache) > self.metadata_cache_size:
+                self._glob_cache.popitem(last=False)
+
+    def _invalidate_metadata(self, resolved_path: Path) -> None:
+        """Drop cached listings that may include resolved_path.
+
+        Listings of every ancestor directory are dropped (a write may have created
+        intermediate directories), as are glob results rooted at an ancestor.
+        """
+        if not self.cache_metadata:
+            return
+        ancestors = {str(p) for p in resolved_path.parents}
+        ancestors.add(str(resolved_path))
+        with self._cache_lock:
+            stale_ls = [k for k in self._ls_cache if k in ancestors]
+            for k in stale_ls:
+                del self._ls_cache[k]
+            stale_glob = [k for k in self._glob_cache if k[1] in ancestors]
+            for k in stale_glob:
+                del self._glob_cache[k]
+        self.cache_stats.invalidations += len(stale_ls) + len(stale_glob)
+
+    def clear_metadata_cache(self) -> None:
+        """Drop every cached listing."""
+        with self._cache_lock:
+            dropped = len(self._ls_cache) + len(self._glob_cache)
+            self._ls_cache.clear()
+            self._glob_cache.clear()
+        self.cache_stats.invalidations += dropped
 
     def _resolve_path(self, key: str) -> Path:
         """Resolve a file path with security checks.
@@ -59,6 +245,11 @@ class FilesystemBackend:
         When virtual_mode=False, preserve legacy behavior: absolute paths are allowed
         as-is; relative paths resolve under cwd.
 
+        Outside virtual_mode, relative resolutions are cached (bounded LRU with
+        TTL) because Path.resolve() lstats every component. In virtual_mode
+        the resolution is what enforces containment, so it is never cached; the
+        check uses the precomputed root prefix.
+
         Args:
             key: File path (absolute, relative, or virtual when virtual_mode=True)
 
@@ -70,16 +261,57 @@ class FilesystemBackend:
             if ".." in vpath or vpath.startswith("~"):
                 raise ValueError("Path traversal not allowed")
             full = (self.cwd / vpath.lstrip("/")).resolve()
-            try:
-                full.relative_to(self.cwd)
-            except ValueError:
-                raise ValueError(f"Path:{full} outside root directory: {self.cwd}") from None
+            full_str = str(full)
+            if full_str != self._cwd_str and not full_str.startswith(self._cwd_prefix):
+                raise ValueError(f"Path:{full} outside root directory: {self.cwd}")
             return full
 
         path = Path(key)
         if path.is_absolute():
             return path
-        return (self.cwd / path).resolve()
+        cached = self._path_cache_get(key)
+        if cached is not None:
+            return cached
+        full = (self.cwd / path).resolve()
+        self._path_cache_put(key, full)
+        return full
+
+    def _path_cache_get(self, key: str) -> Optional[Path]:
+        if not self.path_cache_size:
+            return None
+        with self._cache_lock:
+            entry = self._path_cache.get(key)
+            if entry is None:
+                return None
+            cached_at, full = entry
+            if time.monotonic() - cached_at > self.path_cache_ttl:
+                del self._path_cache[key]
+                return None
+            self._path_cache.move_to_end(key)
+            return full
+
+    def _path_cache_put(self, key: str, full: Path) -> None:
+        if not self.path_cache_size:
+            return
+        with self._cache_lock:
+            self._path_cache[key] = (time.monotonic(), full)
+            self._path_cache.move_to_end(key)
+            while len(self._path_cache) > self.path_cache_size:
+                self._path_cache.popitem(last=False)
+
+    def clear_path_cache(self) -> None:
+        """Drop every cached path resolution."""
+        with self._cache_lock:
+            self._path_cache.clear()
+
+    def _to_virtual_path(self, abs_path: str) -> str:
+        """Map an absolute path under cwd to its virtual path (leading /)."""
+        if abs_path.startswith(self._cwd_prefix):
+            return "/" + abs_path[len(self._cwd_prefix):]
+        if abs_path.startswith(self._cwd_str):
+            return "/" + abs_path[len(self._cwd_str):].lstrip("/")
+        # Path is outside cwd, return as-is
+        return "/" + abs_path
 
     def ls_info(self, path: str) -> list[FileInfo]:
         """List files and directories in the specified directory (non-recursive).
@@ -92,16 +324,27 @@ class FilesystemBackend:
             Directories have a trailing / in their path and is_dir=True.
         """
         dir_path = self._resolve_path(path)
-        if not dir_path.exists() or not dir_path.is_dir():
+        if not self.cache_metadata:
+            if not dir_path.exists() or not dir_path.is_dir():
+                return []
+            return self._list_dir(dir_path)
+
+        cached = self._cache_get_ls(dir_path)
+        if cached is not None:
+            return cached
+        try:
+            st = dir_path.stat()
+        except OSError:
             return []
+        if not dir_path.is_dir():
+            return []
+        results = self._list_dir(dir_path)
+        self._cache_put_ls(dir_path, st.st_mtime_ns, results)
+        return results
 
+    def _list_dir(self, dir_path: Path) -> list[FileInfo]:
         results: list[FileInfo] = []
 
-        # Convert cwd to string for comparison
-        cwd_str = str(self.cwd)
-        if not cwd_str.endswith("/"):
-            cwd_str += "/"
-
         # List only direct children (non-recursive)
         try:
             for child_path in dir_path.iterdir():
@@ -139,16 +382,7 @@ class FilesystemBackend:
                             results.append({"path": abs_path + "/", "is_dir": True})
                 else:
                     # Virtual mode: strip cwd prefix
-                    if abs_path.startswith(cwd_str):
-                        relative_path = abs_path[len(cwd_str):]
-                    elif abs_path.startswith(str(self.cwd)):
-                        # Handle case where cwd doesn't end with /
-                        relative_path = abs_path[len(str(self.cwd)):].lstrip("/")
-                    else:
-                        # Path is outside cwd, return as-is or skip
-                        relative_path = abs_path
-
-                    virt_path = "/" + relative_path
+                    virt_path = self._to_virtual_path(abs_path)
 
                     if is_file:
                         try:
@@ -179,6 +413,56 @@ class FilesystemBackend:
         results.sort(key=lambda x: x.get("path", ""))
         return results
 
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List files and directories down to depth levels below path.
+
+        Walks with os.scandir in path order and stops once max_entries entries
+        are collected, so a large tree is never listed in full. Symlinked
+        directories are listed but not entered.
+
+        Args:
+            path: Absolute directory path.
+            depth: Number of levels to include (1 is the same as ls_info).
+            max_entries: Maximum number of entries to return.
+
+        Returns:
+            FileInfo-like dicts ordered by path. Directories have a trailing / and is_dir=True.
+        """
+        try:
+            dir_path = self._resolve_path(path)
+        except ValueError:
+            return []
+        results: list[FileInfo] = []
+
+        def walk(directory: str, level: int) -> None:
+            try:
+                with os.scandir(directory) as it:
+                    entries = [(e.name + "/" if e.is_dir() else e.name, e) for e in it]
+            except OSError:
+                return
+            entries.sort(key=lambda item: item[0])
+            for name, entry in entries:
+                if len(results) >= max_entries:
+                    return
+                is_dir = name.endswith("/")
+                if not is_dir and not entry.is_file():
+                    continue
+                key = self._to_virtual_path(entry.path) if self.virtual_mode else entry.path
+                info: FileInfo = {"path": key + "/" if is_dir else key, "is_dir": is_dir}
+                try:
+                    st = entry.stat()
+                    info["size"] = 0 if is_dir else int(st.st_size)
+                    info["modified_at"] = datetime.fromtimestamp(st.st_mtime).isoformat()
+                except OSError:
+                    pass
+                results.append(info)
+                if is_dir and level < depth and not entry.is_symlink():
+                    walk(entry.path, level + 1)
+
+        if dir_path.is_dir():
+            walk(str(dir_path), 1)
+        return results
+
     # Removed legacy ls() convenience to keep lean surface
     
     def read(
@@ -227,6 +511,17 @@ class FilesystemBackend:
         except (OSError, UnicodeDecodeError) as e:
             return f"Error reading file '{file_path}': {e}"
     
+    def read_content(self, file_path: str) -> Optional[str]:
+        """Return the exact text of a file, or None if it is missing or unreadable."""
+        try:
+            resolved_path = self._resolve_path(file_path)
+            if not resolved_path.is_file():
+                return None
+            with open(resolved_path, encoding="utf-8", newline="") as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError, ValueError):
+            return None
+
     def write(
         self, 
         file_path: str,
@@ -241,8 +536,11 @@ class FilesystemBackend:
             return WriteResult(error=f"Cannot write to {file_path} because it already exists. Read and then make an edit, or write to a new path.")
         
         try:
-            # Create parent directories if needed
-            resolved_path.parent.mkdir(parents=True, exist_ok=True)
+            # Create parent directories if needed. New directories can change how
+            # previously resolved paths map onto disk, so drop cached resolutions.
+            if not resolved_path.parent.exists():
+                resolved_path.parent.mkdir(parents=True, exist_ok=True)
+                self.clear_path_cache()
 
             # Prefer O_NOFOLLOW to avoid writing through symlinks
             flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
@@ -251,7 +549,8 @@ class FilesystemBackend:
             fd = os.open(resolved_path, flags, 0o644)
             with os.fdopen(fd, "w", encoding="utf-8") as f:
                 f.write(content)
-            
+            self._invalidate_metadata(resolved_path)
+
             return WriteResult(path=file_path, files_update=None)
         except (OSError, UnicodeEncodeError) as e:
             return WriteResult(error=f"Error writing file '{file_path}': {e}")
@@ -272,14 +571,11 @@ class FilesystemBackend:
             return EditResult(error=f"Error: File '{file_path}' not found")
         
         try:
-            # Read securely
-            try:
-                fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
-                with os.fdopen(fd, "r", encoding="utf-8") as f:
-                    content = f.read()
-            except OSError:
-                with open(resolved_path, "r", encoding="utf-8") as f:
-                    content = f.read()
+            if old_string and resolved_path.stat().st_size > self.stream_edit_threshold_bytes:
+                return self._edit_streaming(file_path, resolved_path, old_string, new_string, replace_all)
+
+            with self._open_text(resolved_path) as f:
+                content = f.read()
             
             result = perform_string_replacement(content, old_string, new_string, replace_all)
             
@@ -287,18 +583,101 @@ class FilesystemBackend:
                 return EditResult(error=result)
             
             new_content, occurrences = result
-            
-            # Write securely
-            flags = os.O_WRONLY | os.O_TRUNC
-            if hasattr(os, "O_NOFOLLOW"):
-                flags |= os.O_NOFOLLOW
-            fd = os.open(resolved_path, flags)
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(new_content)
-            
+            self._atomic_rewrite(resolved_path, lambda f: f.write(new_content))
+            self._invalidate_metadata(resolved_path)
+
             return EditResult(path=file_path, files_update=None, occurrences=int(occurrences))
         except (OSError, UnicodeDecodeError, UnicodeEncodeError) as e:
             return EditResult(error=f"Error editing file '{file_path}': {e}")
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file with a single read and atomic rewrite, all or nothing.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        resolved_path = self._resolve_path(file_path)
+
+        if not resolved_path.exists() or not resolved_path.is_file():
+            return EditResult(error=f"Error: File '{file_path}' not found")
+
+        try:
+            with self._open_text(resolved_path) as f:
+                content = f.read()
+
+            result = perform_string_replacements(content, edits)
+            if isinstance(result, str):
+                return EditResult(error=result)
+
+            new_content, counts = result
+            self._atomic_rewrite(resolved_path, lambda f: f.write(new_content))
+            self._invalidate_metadata(resolved_path)
+            return EditResult(path=file_path, files_update=None, occurrences=sum(counts), occurrences_per_edit=counts)
+        except (OSError, UnicodeDecodeError, UnicodeEncodeError) as e:
+            return EditResult(error=f"Error editing file '{file_path}': {e}")
+
+    def _edit_streaming(
+        self,
+        file_path: str,
+        resolved_path: Path,
+        old_string: str,
+        new_string: str,
+        replace_all: bool,
+    ) -> EditResult:
+        """Edit a large file in bounded memory.
+
+        A counting pre-pass enforces the uniqueness/replace_all rules before
+        anything is written, then a second pass streams the replaced content
+        into a temp file that atomically replaces the original.
+        """
+        with self._open_text(resolved_path) as f:
+            occurrences = _stream_replace(f, old_string, new_string)
+        error = check_replacement_occurrences(old_string, occurrences, replace_all)
+        if error:
+            return EditResult(error=error)
+
+        with self._open_text(resolved_path) as src:
+            self._atomic_rewrite(resolved_path, lambda out: _stream_replace(src, old_string, new_string, out))
+        self._invalidate_metadata(resolved_path)
+        return EditResult(path=file_path, files_update=None, occurrences=occurrences)
+
+    def _open_text(self, resolved_path: Path) -> TextIO:
+        """Open a file for reading, refusing to follow symlinks where supported."""
+        try:
+            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            return os.fdopen(fd, "r", encoding="utf-8")
+        except OSError:
+            # Fallback to normal open if O_NOFOLLOW unsupported or fails
+            return open(resolved_path, "r", encoding="utf-8")  # noqa: SIM115
+
+    def _atomic_rewrite(self, resolved_path: Path, fill: Callable[[TextIO], object]) -> None:
+        """Replace resolved_path with content produced by fill.
+
+        Content goes to a temp file in the same directory which is renamed over
+        the original, so a crash mid-write never leaves a truncated file. A
+        symlink is resolved first and its target rewritten, so the link itself
+        survives the rename.
+        """
+        if resolved_path.is_symlink():
+            resolved_path = resolved_path.resolve()
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{resolved_path.name}.", suffix=".tmp", dir=resolved_path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                fill(f)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            with contextlib.suppress(OSError):
+                os.chmod(tmp_name, stat.S_IMODE(resolved_path.stat().st_mode))
+            os.replace(tmp_name, resolved_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+            raise
+        if self.fsync:
+            dir_fd = os.open(resolved_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
     
     # Removed legacy grep() convenience to keep lean surface
 
@@ -307,6 +686,10 @@ class FilesystemBackend:
         pattern: str,
         path: Optional[str] = None,
         glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
     ) -> list[GrepMatch] | str:
         # Validate regex
         try:
@@ -324,23 +707,94 @@ class FilesystemBackend:
             return []
 
         # Try ripgrep first
-        results = self._ripgrep_search(pattern, base_full, glob)
+        results = self._ripgrep(pattern, [base_full], glob, before=before, after=after, output_mode=output_mode)
         if results is None:
-            results = self._python_search(pattern, base_full, glob)
+            results = self._python_search(
+                pattern, base_full, glob, before=before, after=after, output_mode=output_mode
+            )
+        return [m for file_matches in results.values() for m in file_matches]
 
-        matches: list[GrepMatch] = []
-        for fpath, items in results.items():
-            for line_num, line_text in items:
-                matches.append({"path": fpath, "line": int(line_num), "text": line_text})
-        return matches
+    def _ripgrep(
+        self,
+        pattern: str,
+        targets: list[Path],
+        include_glob: Optional[str],
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> Optional[dict[str, list[GrepMatch]]]:
+        """Run ripgrep over the target files or directories in the given mode; None when it is unavailable."""
+        if output_mode == "content":
+            return self._ripgrep_search(pattern, targets, include_glob, before=before, after=after)
+        return self._ripgrep_summary(pattern, targets, include_glob, output_mode)
+
+    def _rg_virtual_path(self, ftext: str) -> Optional[str]:
+        """Map a path printed by ripgrep to the path reported to callers."""
+        p = Path(ftext)
+        if not self.virtual_mode:
+            return str(p)
+        try:
+            return "/" + str(p.resolve().relative_to(self.cwd))
+        except Exception:
+            return None
+
+    def _ripgrep_summary(
+        self, pattern: str, targets: list[Path], include_glob: Optional[str], output_mode: GrepOutputMode
+    ) -> Optional[dict[str, list[GrepMatch]]]:
+        """Run ripgrep in files-with-matches (-l) or --count mode.
+
+        rg stops reading a file at its first hit with -l and prints no line
+        text with --count, so per-file modes never pull matching lines back.
+        """
+        cmd = ["rg", "--null"]
+        if output_mode == "files_with_matches":
+            cmd.append("--files-with-matches")
+        else:
+            cmd.extend(["--count", "--with-filename"])
+        if include_glob:
+            cmd.extend(["--glob", include_glob])
+        cmd.extend(["--", pattern, *map(str, targets)])
+
+        try:
+            proc = subprocess.run(  # noqa: S603
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=30,
+                check=False,
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return None
+
+        results: dict[str, list[GrepMatch]] = {}
+        if output_mode == "files_with_matches":
+            # Paths are NUL-terminated with no newline between them
+            for ftext in proc.stdout.split("\0"):
+                virt = self._rg_virtual_path(ftext) if ftext else None
+                if virt is not None:
+                    results[virt] = [{"path": virt, "line": 0, "text": ""}]
+            return results
+        for line in proc.stdout.splitlines():
+            ftext, sep, count = line.partition("\0")
+            if not sep or not count.isdigit():
+                continue
+            virt = self._rg_virtual_path(ftext)
+            if virt is not None:
+                results[virt] = [{"path": virt, "line": 0, "text": "", "count": int(count)}]
+        return results
 
     def _ripgrep_search(
-        self, pattern: str, base_full: Path, include_glob: Optional[str]
-    ) -> Optional[dict[str, list[tuple[int, str]]]]:
+        self, pattern: str, targets: list[Path], include_glob: Optional[str], *, before: int = 0, after: int = 0
+    ) -> Optional[dict[str, list[GrepMatch]]]:
         cmd = ["rg", "--json"]
+        if before:
+            cmd.extend(["--before-context", str(before)])
+        if after:
+            cmd.extend(["--after-context", str(after)])
         if include_glob:
             cmd.extend(["--glob", include_glob])
-        cmd.extend(["--", pattern, str(base_full)])
+        cmd.extend(["--", pattern, *map(str, targets)])
 
         try:
             proc = subprocess.run(  # noqa: S603
@@ -353,43 +807,53 @@ class FilesystemBackend:
         except (subprocess.TimeoutExpired, FileNotFoundError):
             return None
 
-        results: dict[str, list[tuple[int, str]]] = {}
+        results: dict[str, list[GrepMatch]] = {}
+        # Context events arrive separately; collect every line rg reported per file
+        reported: dict[str, dict[int, str]] = {}
         for line in proc.stdout.splitlines():
             try:
                 data = json.loads(line)
             except json.JSONDecodeError:
                 continue
-            if data.get("type") != "match":
+            if data.get("type") not in ("match", "context"):
                 continue
             pdata = data.get("data", {})
             ftext = pdata.get("path", {}).get("text")
             if not ftext:
                 continue
-            p = Path(ftext)
-            if self.virtual_mode:
-                try:
-                    virt = "/" + str(p.resolve().relative_to(self.cwd))
-                except Exception:
-                    continue
-            else:
-                virt = str(p)
+            virt = self._rg_virtual_path(ftext)
+            if virt is None:
+                continue
             ln = pdata.get("line_number")
             lt = pdata.get("lines", {}).get("text", "").rstrip("\n")
             if ln is None:
                 continue
-            results.setdefault(virt, []).append((int(ln), lt))
+            if data["type"] == "match":
+                results.setdefault(virt, []).append({"path": virt, "line": int(ln), "text": lt})
+            elif before or after:
+                reported.setdefault(virt, {})[int(ln)] = lt
 
+        if before or after:
+            for virt, file_matches in results.items():
+                attach_grep_context(file_matches, reported.get(virt, {}), before=before, after=after)
         return results
 
     def _python_search(
-        self, pattern: str, base_full: Path, include_glob: Optional[str]
-    ) -> dict[str, list[tuple[int, str]]]:
+        self,
+        pattern: str,
+        base_full: Path,
+        include_glob: Optional[str],
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> dict[str, list[GrepMatch]]:
         try:
             regex = re.compile(pattern)
         except re.error:
             return {}
 
-        results: dict[str, list[tuple[int, str]]] = {}
+        results: dict[str, list[GrepMatch]] = {}
         root = base_full if base_full.is_dir() else base_full.parent
 
         for fp in root.rglob("*"):
@@ -406,19 +870,190 @@ class FilesystemBackend:
                 content = fp.read_text()
             except (UnicodeDecodeError, PermissionError, OSError):
                 continue
-            for line_num, line in enumerate(content.splitlines(), 1):
-                if regex.search(line):
-                    if self.virtual_mode:
-                        try:
-                            virt_path = "/" + str(fp.resolve().relative_to(self.cwd))
-                        except Exception:
-                            continue
-                    else:
-                        virt_path = str(fp)
-                    results.setdefault(virt_path, []).append((line_num, line))
+            file_matches = list(
+                grep_file("", content.splitlines(), regex, before=before, after=after, output_mode=output_mode)
+            )
+            if not file_matches:
+                continue
+            if self.virtual_mode:
+                try:
+                    virt_path = "/" + str(fp.resolve().relative_to(self.cwd))
+                except Exception:
+                    continue
+            else:
+                virt_path = str(fp)
+            for m in file_matches:
+                m["path"] = virt_path
+            results[virt_path] = file_matches
 
         return results
-    
+
+    def _walk_sorted(self, directory: Path, after: str | None) -> Iterator[tuple[str, Path]]:
+        """Yield (path, file) under directory in path order, starting at `after`.
+
+        Directory names are sorted with a trailing "/" so the walk order equals
+        the order of the full path strings; subtrees sorting entirely before
+        `after` are skipped without being listed.
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = [(e.name + "/" if e.is_dir(follow_symlinks=False) else e.name, e) for e in it]
+        except OSError:
+            return
+        entries.sort(key=lambda item: item[0])
+        for name, entry in entries:
+            key = self._to_virtual_path(entry.path) if self.virtual_mode else entry.path
+            if name.endswith("/"):
+                subtree = key + "/"
+                if after is not None and subtree < after and not after.startswith(subtree):
+                    continue
+                yield from self._walk_sorted(Path(entry.path), after)
+            elif (after is None or key >= after) and entry.is_file() and self._walkable_file(entry):
+                yield key, Path(entry.path)
+
+    def _walkable_file(self, entry: os.DirEntry) -> bool:
+        """Whether a file found by a directory walk may be searched.
+
+        Like ripgrep, walks do not follow symlinks in virtual mode. Otherwise a
+        symlinked file is searched only if it resolves inside the root, the
+        containment rule _resolve_path applies to virtual paths.
+        """
+        if not entry.is_symlink():
+            return True
+        if self.virtual_mode:
+            return False
+        try:
+            target = str(Path(entry.path).resolve())
+        except OSError:
+            return False
+        return target == self._cwd_str or target.startswith(self._cwd_prefix)
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        start_after: tuple[str, int] | None = None,
+        limit: int = 1000,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Return up to limit matches in (path, line) order after the given position.
+
+        Files are visited in path order starting at `start_after`, so resuming
+        from the last match does not rescan files already covered. With ripgrep
+        available, they are searched by rg (with its context, -l and --count
+        modes) in batches of RG_PAGE_BATCH_FILES, and the search stops after
+        the batch that fills the page. Otherwise each file is searched with
+        Python regular expressions.
+        """
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid regex pattern: {e}"
+        try:
+            base_full = self._resolve_path(path or ".")
+        except ValueError:
+            return []
+
+        after_path, after_line = start_after if start_after is not None else (None, 0)
+        if base_full.is_dir():
+            candidates = self._walk_sorted(base_full, after_path)
+        elif base_full.is_file():
+            key = self._to_virtual_path(str(base_full)) if self.virtual_mode else str(base_full)
+            candidates = iter([(key, base_full)] if after_path is None or key >= after_path else [])
+        else:
+            return []
+
+        matches: list[GrepMatch] = []
+        use_ripgrep = True
+        batch: list[tuple[str, Path]] = []
+        for key, fp in candidates:
+            if glob and not wcglob.globmatch(fp.name, glob, flags=wcglob.BRACE):
+                continue
+            try:
+                if fp.stat().st_size > self.max_file_size_bytes:
+                    continue
+            except OSError:
+                continue
+            batch.append((key, fp))
+            if len(batch) < RG_PAGE_BATCH_FILES and use_ripgrep:
+                continue
+            use_ripgrep = self._search_page_batch(
+                batch, pattern, regex, matches, after_path, after_line, limit,
+                before=before, after=after, output_mode=output_mode, use_ripgrep=use_ripgrep,
+            )
+            batch = []
+            if len(matches) >= limit:
+                return matches
+        if batch:
+            self._search_page_batch(
+                batch, pattern, regex, matches, after_path, after_line, limit,
+                before=before, after=after, output_mode=output_mode, use_ripgrep=use_ripgrep,
+            )
+        return matches
+
+    def _search_page_batch(
+        self,
+        batch: list[tuple[str, Path]],
+        pattern: str,
+        regex: re.Pattern[str],
+        matches: list[GrepMatch],
+        after_path: str | None,
+        after_line: int,
+        limit: int,
+        *,
+        before: int,
+        after: int,
+        output_mode: GrepOutputMode,
+        use_ripgrep: bool,
+    ) -> bool:
+        """Search files in path order and append their matches to the page until limit.
+
+        Returns:
+            Whether ripgrep is still usable for later batches.
+        """
+        found = None
+        if use_ripgrep:
+            found = self._ripgrep(
+                pattern, [fp for _, fp in batch], None, before=before, after=after, output_mode=output_mode
+            )
+        if found is not None:
+            matches.extend(self._page_of(found, after_path, after_line, limit - len(matches)))
+            return True
+        for key, fp in batch:
+            try:
+                lines = fp.read_text(encoding="utf-8").splitlines()
+            except (UnicodeDecodeError, OSError):
+                continue
+            skip_through = after_line if key == after_path else 0
+            for m in grep_file(
+                key, lines, regex, before=before, after=after, output_mode=output_mode, skip_through=skip_through
+            ):
+                matches.append(m)
+                if len(matches) >= limit:
+                    return False
+        return False
+
+    @staticmethod
+    def _page_of(
+        results: dict[str, list[GrepMatch]], after_path: str | None, after_line: int, limit: int
+    ) -> list[GrepMatch]:
+        """Cut one page in (path, line) order from per-file search results."""
+        matches: list[GrepMatch] = []
+        for key in sorted(results):
+            if after_path is not None and key < after_path:
+                continue
+            for m in results[key]:
+                if key == after_path and m["line"] <= after_line:
+                    continue
+                matches.append(m)
+                if len(matches) >= limit:
+                    return matches
+        return matches
+
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         if pattern.startswith("/"):
             pattern = pattern.lstrip("/")
@@ -427,6 +1062,16 @@ class FilesystemBackend:
         if not search_path.exists() or not search_path.is_dir():
             return []
 
+        if self.cache_metadata:
+            cached = self._cache_get_glob(pattern, search_path)
+            if cached is not None:
+                return cached
+            results = self._glob_dir(pattern, search_path)
+            self._cache_put_glob(pattern, search_path, results)
+            return results
+        return self._glob_dir(pattern, search_path)
+
+    def _glob_dir(self, pattern: str, search_path: Path) -> list[FileInfo]:
         results: list[FileInfo] = []
         try:
             # Use recursive globbing to match files in subdirectories as tests expect
@@ -450,16 +1095,7 @@ class FilesystemBackend:
                     except OSError:
                         results.append({"path": abs_path, "is_dir": False})
                 else:
-                    cwd_str = str(self.cwd)
-                    if not cwd_str.endswith("/"):
-                        cwd_str += "/"
-                    if abs_path.startswith(cwd_str):
-                        relative_path = abs_path[len(cwd_str):]
-                    elif abs_path.startswith(str(self.cwd)):
-                        relative_path = abs_path[len(str(self.cwd)):].lstrip("/")
-                    else:
-                        relative_path = abs_path
-                    virt = "/" + relative_path
+                    virt = self._to_virtual_path(abs_path)
                     try:
                         st = matched_path.stat()
                         results.append({
@@ -475,3 +1111,42 @@ class FilesystemBackend:
 
         results.sort(key=lambda x: x.get("path", ""))
         return results
+
+    def glob_page(
+        self,
+        pattern: str,
+        path: str = "/",
+        *,
+        start_after: str | None = None,
+        limit: int = 1000,
+    ) -> list[FileInfo]:
+        """Return up to limit matching files in path order after the given path.
+
+        Like glob_info, the pattern matches at any depth below path. Subtrees
+        sorting before `start_after` are skipped, so later pages do not rescan them.
+        """
+        pattern = "**/" + pattern.lstrip("/")
+        search_path = self.cwd if path == "/" else self._resolve_path(path)
+        if not search_path.is_dir():
+            return []
+
+        infos: list[FileInfo] = []
+        for key, fp in self._walk_sorted(search_path, start_after):
+            if key == start_after:
+                continue
+            relative = fp.relative_to(search_path).as_posix()
+            if not wcglob.globmatch(relative, pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR | wcglob.DOTGLOB):
+                continue
+            try:
+                st = fp.stat()
+                infos.append({
+                    "path": key,
+                    "is_dir": False,
+                    "size": int(st.st_size),
+                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                })
+            except OSError:
+                infos.append({"path": key, "is_dir": False})
+            if len(infos) >= limit:
+                break
+        return infos
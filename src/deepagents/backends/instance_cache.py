@@ -0,0 +1,142 @@
+"""BackendInstanceCache: Reuse factory-built backends across tool calls."""
+
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any
+
+from langchain.tools import ToolRuntime
+
+from deepagents.backends.protocol import BackendFactory, BackendProtocol
+
+_current_runtime: ContextVar[ToolRuntime] = ContextVar("deepagents_current_runtime")
+
+
+class _CurrentRuntime:
+    """Runtime stand-in that forwards attribute access to the current tool call's runtime.
+
+    Backends built once and reused (e.g. StateBackend reading `runtime.state`)
+    thereby always see the state of the call using them. The current runtime is
+    kept in a context variable, so parallel tool calls do not interfere.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_current_runtime.get(), name)
+
+
+def thread_id_of(config: Any) -> str | None:
+    """Return the thread id from a runnable config, if any."""
+    if not isinstance(config, dict):
+        return None
+    thread_id = config.get("configurable", {}).get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+
+class BackendInstanceCache:
+    """Memoizing wrapper around a backend factory, one instance per thread.
+
+    Calling the cache like a factory returns the backend built for the calling
+    runtime's thread, building it on first use. The factory receives a runtime
+    proxy instead of the first call's runtime, so backends bound to the runtime
+    keep working on later calls. Caches and indexes kept by backends (metadata
+    caches, lazily built routes, database connections) therefore survive
+    between tool calls.
+
+    Factories must not make per-call decisions from the runtime they are given
+    while building; they run once per thread. Runs without a thread id cannot
+    be told apart, so they get a fresh instance per call as before.
+
+    Lifecycle: release(thread_id) drops a thread's instance and calls its
+    close() method if it has one; clear() releases everything. Least recently
+    used threads beyond max_threads are released automatically. Runs sharing a
+    thread (e.g. parallel subagents) are counted with begin_run()/end_run(),
+    and the instance is released when the last of them ends.
+    """
+
+    def __init__(self, factory: BackendFactory, max_threads: int = 128) -> None:
+        """Initialize the cache.
+
+        Args:
+            factory: Backend factory taking a runtime.
+            max_threads: Maximum number of threads with a live instance.
+        """
+        self.factory = factory
+        self.max_threads = max_threads
+        self._instances: OrderedDict[str, BackendProtocol] = OrderedDict()
+        # thread id -> number of runs in progress on it
+        self._active_runs: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, runtime: ToolRuntime) -> BackendProtocol:
+        """Return the backend for runtime's thread and make runtime current for it."""
+        key = thread_id_of(getattr(runtime, "config", None))
+        if key is None:
+            return self.factory(runtime)
+        _current_runtime.set(runtime)
+        with self._lock:
+            backend = self._instances.get(key)
+            if backend is not None:
+                self._instances.move_to_end(key)
+                return backend
+        # Build outside the lock; factories may be slow (opening databases, etc.)
+        built = self.factory(_CurrentRuntime())  # type: ignore[arg-type]
+        evicted: list[BackendProtocol] = []
+        with self._lock:
+            backend = self._instances.setdefault(key, built)
+            self._instances.move_to_end(key)
+            while len(self._instances) > self.max_threads:
+                evicted.append(self._instances.popitem(last=False)[1])
+        if backend is not built:
+            evicted.append(built)
+        for instance in evicted:
+            self._close(instance)
+        return backend
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    @staticmethod
+    def _close(backend: BackendProtocol) -> None:
+        close = getattr(backend, "close", None)
+        if callable(close):
+            close()
+
+    def release(self, thread_id: str) -> bool:
+        """Drop and close the instance for thread_id.
+
+        Returns:
+            Whether an instance was released.
+        """
+        with self._lock:
+            backend = self._instances.pop(thread_id, None)
+        if backend is None:
+            return False
+        self._close(backend)
+        return True
+
+    def begin_run(self, thread_id: str) -> None:
+        """Record that a run using thread_id's instance has started."""
+        with self._lock:
+            self._active_runs[thread_id] = self._active_runs.get(thread_id, 0) + 1
+
+    def end_run(self, thread_id: str) -> bool:
+        """Record that a run has ended; release the instance once no run on the thread is left.
+
+        Returns:
+            Whether an instance was released.
+        """
+        with self._lock:
+            remaining = self._active_runs.get(thread_id, 0) - 1
+            if remaining > 0:
+                self._active_runs[thread_id] = remaining
+                return False
+            self._active_runs.pop(thread_id, None)
+        return self.release(thread_id)
+
+    def clear(self) -> None:
+        """Drop and close every instance."""
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for backend in instances:
+            self._close(backend)
@@ -0,0 +1,551 @@
+"""ObjectStoreBackend: Store files in an S3-compatible bucket.
+
+- read(offset, limit) fetches only the needed byte range, located through a
+  sparse line-offset sidecar object written alongside each file
+- Recursive listings (glob/grep) page through top-level prefixes in parallel
+- Optional bounded on-disk cache of small objects, revalidated by ETag
+
+Requires ``boto3`` (``pip install deepagents[s3]``).
+"""
+
+import contextvars
+import hashlib
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, TypeVar
+
+import wcmatch.glob as wcglob
+
+from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.utils import (
+    EMPTY_CONTENT_WARNING,
+    CacheStats,
+    FileInfo,
+    GrepMatch,
+    _validate_path,
+    check_empty_content,
+    format_content_with_line_numbers,
+    GrepOutputMode,
+    grep_file,
+    perform_string_replacement,
+    perform_string_replacements,
+)
+
+try:
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - boto3 is an optional dependency
+    ClientError = Exception  # type: ignore[assignment,misc]
+
+T = TypeVar("T")
+
+# Key prefix (under the backend prefix) holding line-offset sidecars
+LINE_INDEX_PREFIX = ".deepagents-lines/"
+# Every Nth line start is recorded in the sidecar
+LINE_INDEX_STRIDE = 256
+
+# Objects downloaded per batch while grepping
+_GREP_BATCH_SIZE = 64
+
+_NOT_FOUND = {"NoSuchKey", "404"}
+_PRECONDITION_FAILED = {"PreconditionFailed", "412"}
+
+
+def _error_code(error: Exception) -> str:
+    response = getattr(error, "response", None) or {}
+    return str(response.get("Error", {}).get("Code", ""))
+
+
+def _build_line_index(data: bytes) -> tuple[array, int]:
+    """Return byte offsets of every LINE_INDEX_STRIDE-th line start, and the line count.
+
+    Lines are split with str.splitlines so counts agree with format_read_response.
+    """
+    offsets = array("Q")
+    position = 0
+    count = 0
+    for count, line in enumerate(data.decode("utf-8").splitlines(keepends=True)):  # noqa: B007
+        if count % LINE_INDEX_STRIDE == 0:
+            offsets.append(position)
+        position += len(line.encode("utf-8"))
+    return offsets, (count + 1 if data else 0)
+
+
+class _DiskCache:
+    """Byte-bounded LRU of object bodies on local disk, keyed by object key."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        # key -> (etag, size, stored_at), most recently used last
+        self._entries: OrderedDict[str, tuple[str, int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> Path:
+        return self.directory / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def is_fresh(self, key: str, ttl: float) -> bool:
+        """Whether key is cached and was stored or revalidated within ttl seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[2] < ttl
+
+    def get(self, key: str) -> tuple[str, bytes, float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        try:
+            return entry[0], self._file(key).read_bytes(), entry[2]
+        except OSError:
+            self.discard(key)
+            return None
+
+    def put(self, key: str, etag: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        self._file(key).write_bytes(data)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (etag, len(data), time.monotonic())
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                evicted, (_, size, _) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.stats.evictions += 1
+                self._file(evicted).unlink(missing_ok=True)
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as revalidated now."""
+        with self._lock:
+            if key in self._entries:
+                etag, size, _ = self._entries[key]
+                self._entries[key] = (etag, size, time.monotonic())
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._bytes -= entry[1]
+            self.stats.invalidations += 1
+        self._file(key).unlink(missing_ok=True)
+
+
+class ObjectStoreBackend:
+    """Backend that stores files as objects in an S3-compatible bucket.
+
+    Each virtual path maps to the key ``prefix + path[1:]``. Writes also store a
+    small sidecar with the byte offset of every 256th line, so a windowed read
+    issues one ranged GET instead of downloading the whole object. The sidecar
+    records the ETag it was built from and ranged reads are conditional on it,
+    so objects changed by other writers fall back to a full download.
+
+    Example:
+        ```python
+        backend = CompositeBackend(
+            default=StateBackend(runtime),
+            routes={"/shared/": ObjectStoreBackend("agent-files", prefix="team-a/", cache_dir="/tmp/agent-cache")},
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        *,
+        client: Any = None,
+        endpoint_url: str | None = None,
+        cache_dir: str | Path | None = None,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        cache_object_max_bytes: int = 1024 * 1024,
+        cache_ttl: float = 5.0,
+        list_concurrency: int = 8,
+    ) -> None:
+        """Initialize ObjectStoreBackend.
+
+        Args:
+            bucket: Bucket name.
+            prefix: Key prefix all files live under, e.g. "agents/run-1/".
+            client: Preconfigured boto3 S3 client. Created from the environment when omitted.
+            endpoint_url: Endpoint for S3-compatible services (MinIO, R2, ...) when no client is given.
+            cache_dir: Directory for the local object cache. None disables it.
+            cache_max_bytes: Total size bound of the local cache.
+            cache_object_max_bytes: Objects larger than this are never cached and are
+                read with ranged GETs when a sidecar is available.
+            cache_ttl: Seconds a cached object is served without revalidating its ETag.
+            list_concurrency: Maximum concurrent requests for recursive listings and grep downloads.
+        """
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                msg = "ObjectStoreBackend requires boto3. Install it with `pip install boto3`."
+                raise ImportError(msg) from e
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.lstrip("/")
+        if self.prefix and not self.prefix.endswith("/"):
+            self.prefix += "/"
+        self.cache_object_max_bytes = cache_object_max_bytes
+        self.cache_ttl = cache_ttl
+        self.list_concurrency = list_concurrency
+        self._cache = _DiskCache(Path(cache_dir), cache_max_bytes) if cache_dir is not None else None
+
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        """Counters for the local object cache, or None when it is disabled."""
+        return self._cache.stats if self._cache is not None else None
+
+    def _key(self, path: str) -> str:
+        return self.prefix + path.lstrip("/")
+
+    def _index_key(self, path: str) -> str:
+        return self.prefix + LINE_INDEX_PREFIX + path.lstrip("/")
+
+    def _path(self, key: str) -> str:
+        return "/" + key[len(self.prefix):]
+
+    # ------------------------------------------------------------------
+    # Listing
+
+    def _list_pages(self, prefix: str, delimiter: str | None) -> tuple[list[dict[str, Any]], list[str]]:
+        """Page through one listing, returning (objects, common prefixes)."""
+        objects: list[dict[str, Any]] = []
+        prefixes: list[str] = []
+        kwargs: dict[str, Any] = {"Bucket": self.bucket, "Prefix": prefix}
+        if delimiter:
+            kwargs["Delimiter"] = delimiter
+        while True:
+            page = self.client.list_objects_v2(**kwargs)
+            objects.extend(o for o in page.get("Contents", []) if not o["Key"].endswith("/"))
+            prefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+            if not page.get("IsTruncated"):
+                return objects, prefixes
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+    def _list_recursive(self, prefix: str) -> list[dict[str, Any]]:
+        """List every object under prefix, paging each top-level subprefix concurrently."""
+        objects, subprefixes = self._list_pages(prefix, "/")
+        index_root = self.prefix + LINE_INDEX_PREFIX
+        subprefixes = [p for p in subprefixes if p != index_root]
+        for chunk in self._parallel([lambda p=p: self._list_pages(p, None)[0] for p in subprefixes]):
+            objects.extend(chunk)
+        objects.sort(key=lambda o: o["Key"])
+        return objects
+
+    def _parallel(self, calls: list[Callable[[], T]]) -> list[T]:
+        """Run calls concurrently, at most list_concurrency at a time, preserving order."""
+        if len(calls) <= 1:
+            return [call() for call in calls]
+        # A private pool: callers may already be running on the shared fan-out executor
+        with ThreadPoolExecutor(max_workers=min(self.list_concurrency, len(calls))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+            return [f.result() for f in futures]
+
+    def _file_info(self, obj: dict[str, Any]) -> FileInfo:
+        modified = obj.get("LastModified")
+        return {
+            "path": self._path(obj["Key"]),
+            "is_dir": False,
+            "size": int(obj.get("Size", 0)),
+            "modified_at": modified.isoformat() if modified is not None else "",
+        }
+
+    def ls_info(self, path: str) -> list[FileInfo]:
+        """List files and directories in the specified directory (non-recursive).
+
+        Args:
+            path: Absolute path to directory.
+
+        Returns:
+            List of FileInfo-like dicts for files and directories directly in the directory.
+            Directories have a trailing / in their path and is_dir=True.
+        """
+        objects, prefixes = self._list_pages(self._key(path if path.endswith("/") else path + "/"), "/")
+        infos: list[FileInfo] = [self._file_info(o) for o in objects]
+        index_root = self.prefix + LINE_INDEX_PREFIX
+        infos.extend(
+            {"path": self._path(p), "is_dir": True, "size": 0, "modified_at": ""} for p in prefixes if p != index_root
+        )
+        infos.sort(key=lambda x: x.get("path", ""))
+        return infos
+
+    def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        try:
+            base = _validate_path(path)
+        except ValueError:
+            return []
+        pattern = pattern.lstrip("/")
+        infos: list[FileInfo] = []
+        for obj in self._list_recursive(self._key(base)):
+            info = self._file_info(obj)
+            if wcglob.globmatch(info["path"][len(base):], pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+                infos.append(info)
+        return infos
+
+    # ------------------------------------------------------------------
+    # Reading
+
+    def _get_object(self, path: str) -> tuple[bytes, str] | None:
+        """Return (body, etag) for path, using the local cache when possible."""
+        fetched = self._fetch(path)
+        if fetched is None or fetched[0] is None:
+            return None
+        return fetched[0], fetched[1]
+
+    def _fetch(self, path: str, max_bytes: int | None = None) -> tuple[bytes | None, str] | None:
+        """Return (body, etag) for path, using the local cache when possible.
+
+        When max_bytes is given and the object is larger, the body is left
+        unread and returned as None.
+        """
+        key = self._key(path)
+        cached = self._cache.get(key) if self._cache is not None else None
+        if cached is not None:
+            etag, data, stored_at = cached
+            if time.monotonic() - stored_at < self.cache_ttl:
+                return data, etag
+        kwargs: dict[str, Any] = {"Bucket": self.bucket, "Key": key}
+        if cached is not None:
+            kwargs["IfNoneMatch"] = cached[0]
+        try:
+            response = self.client.get_object(**kwargs)
+        except ClientError as e:
+            code = _error_code(e)
+            if code == "304" and cached is not None and self._cache is not None:
+                self._cache.touch(key)
+                return cached[1], cached[0]
+            if code in _NOT_FOUND:
+                if self._cache is not None:
+                    self._cache.discard(key)
+                return None
+            raise
+        etag = response["ETag"]
+        if max_bytes is not None and int(response.get("ContentLength", 0)) > max_bytes:
+            response["Body"].close()
+            return None, etag
+        data = response["Body"].read()
+        if self._cache is not None and len(data) <= self.cache_object_max_bytes:
+            self._cache.put(key, etag, data)
+        return data, etag
+
+    def _get_line_index(self, path: str) -> tuple[array, int, int, str] | None:
+        """Return (offsets, line count, object size, source etag) from the sidecar, if present."""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._index_key(path))
+        except ClientError as e:
+            if _error_code(e) in _NOT_FOUND:
+                return None
+            raise
+        metadata = response.get("Metadata", {})
+        offsets = array("Q")
+        offsets.frombytes(response["Body"].read())
+        return offsets, int(metadata.get("lines", "0")), int(metadata.get("size", "0")), metadata.get("source-etag", "")
+
+    def _read_range(self, path: str, offset: int, limit: int, index: tuple[array, int, int, str]) -> str | None:
+        """Read a line window with one ranged GET, or None if the sidecar is stale."""
+        offsets, line_count, _, etag = index
+        if line_count == 0:
+            return EMPTY_CONTENT_WARNING
+        if offset >= line_count:
+            return f"Error: Line offset {offset} exceeds file length ({line_count} lines)"
+        first = offset // LINE_INDEX_STRIDE
+        last = -(-(offset + limit) // LINE_INDEX_STRIDE)
+        byte_range = f"bytes={offsets[first]}-" + (str(offsets[last] - 1) if last < len(offsets) else "")
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(path), Range=byte_range, IfMatch=etag)
+        except ClientError as e:
+            if _error_code(e) in _PRECONDITION_FAILED | _NOT_FOUND:
+                return None
+            raise
+        lines = response["Body"].read().decode("utf-8").splitlines()
+        skip = offset - first * LINE_INDEX_STRIDE
+        return format_content_with_line_numbers(lines[skip : skip + limit], start_line=offset + 1)
+
+    def read(
+        self,
+        file_path: str,
+        offset: int = 0,
+        limit: int = 2000,
+    ) -> str:
+        """Read file content with line numbers.
+
+        Objects up to cache_object_max_bytes are fetched whole with a single
+        GET (or served from the local cache). For larger objects that GET is
+        abandoned before the body is read, and the sidecar locates a single
+        ranged GET covering only the requested lines.
+
+        Args:
+            file_path: Absolute file path
+            offset: Line offset to start reading from (0-indexed)
+            limit: Maximum number of lines to read
+
+        Returns:
+            Formatted file content with line numbers, or error message.
+        """
+        fetched = self._fetch(file_path, self.cache_object_max_bytes)
+        if fetched is not None and fetched[0] is None:
+            index = self._get_line_index(file_path)
+            if index is not None and index[3] == fetched[1]:
+                ranged = self._read_range(file_path, offset, limit, index)
+                if ranged is not None:
+                    return ranged
+            fetched = self._get_object(file_path)
+        if fetched is None or fetched[0] is None:
+            return f"Error: File '{file_path}' not found"
+        content = fetched[0].decode("utf-8", errors="replace")
+        empty_msg = check_empty_content(content)
+        if empty_msg:
+            return empty_msg
+        lines = content.splitlines()
+        if offset >= len(lines):
+            return f"Error: Line offset {offset} exceeds file length ({len(lines)} lines)"
+        return format_content_with_line_numbers(lines[offset : offset + limit], start_line=offset + 1)
+
+    def grep_raw(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid regex pattern: {e}"
+        try:
+            base = _validate_path(path)
+        except ValueError:
+            return []
+
+        candidates = [
+            self._path(obj["Key"])
+            for obj in self._list_recursive(self._key(base))
+            if not glob or wcglob.globmatch(Path(obj["Key"]).name, glob, flags=wcglob.BRACE)
+        ]
+        matches: list[GrepMatch] = []
+        # Download in bounded batches so only a batch of bodies is held in memory at once
+        for start in range(0, len(candidates), _GREP_BATCH_SIZE):
+            batch = candidates[start : start + _GREP_BATCH_SIZE]
+            bodies = self._parallel([lambda p=p: self._get_object(p) for p in batch])
+            for file_path, fetched in zip(batch, bodies, strict=True):
+                if fetched is None:
+                    continue
+                lines = fetched[0].decode("utf-8", errors="replace").splitlines()
+                matches.extend(grep_file(file_path, lines, regex, before=before, after=after, output_mode=output_mode))
+        return matches
+
+    # ------------------------------------------------------------------
+    # Writing
+
+    def _put(self, file_path: str, data: bytes, **conditions: str) -> str:
+        """Upload file content and its line-offset sidecar; return the new ETag."""
+        key = self._key(file_path)
+        response = self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **conditions)
+        etag = response["ETag"]
+        offsets, line_count = _build_line_index(data)
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._index_key(file_path),
+            Body=offsets.tobytes(),
+            Metadata={"source-etag": etag, "lines": str(line_count), "size": str(len(data))},
+        )
+        if self._cache is not None:
+            self._cache.discard(key)
+            if len(data) <= self.cache_object_max_bytes:
+                self._cache.put(key, etag, data)
+        return etag
+
+    def read_content(self, file_path: str) -> Optional[str]:
+        """Return the exact text of an object, or None if it does not exist."""
+        fetched = self._get_object(file_path)
+        return fetched[0].decode("utf-8", errors="replace") if fetched is not None else None
+
+    def write(
+        self,
+        file_path: str,
+        content: str,
+    ) -> WriteResult:
+        """Create a new file with content.
+
+        Uses a conditional PUT (If-None-Match: *) so concurrent creators cannot
+        overwrite each other.
+        Returns WriteResult. External storage sets files_update=None.
+        """
+        try:
+            self._put(file_path, content.encode("utf-8"), IfNoneMatch="*")
+        except ClientError as e:
+            if _error_code(e) in _PRECONDITION_FAILED:
+                return WriteResult(error=f"Cannot write to {file_path} because it already exists. Read and then make an edit, or write to a new path.")
+            return WriteResult(error=f"Error writing file '{file_path}': {e}")
+        return WriteResult(path=file_path, files_update=None)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file by replacing string occurrences.
+
+        The upload is conditional on the ETag that was read, so an edit never
+        silently discards a concurrent change.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        def replace(content: str) -> tuple[str, list[int]] | str:
+            result = perform_string_replacement(content, old_string, new_string, replace_all)
+            return result if isinstance(result, str) else (result[0], [result[1]])
+
+        result = self._edit_object(file_path, replace)
+        result.occurrences_per_edit = None
+        return result
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file with one GET and one conditional PUT, all or nothing.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        return self._edit_object(file_path, lambda content: perform_string_replacements(content, edits))
+
+    def _edit_object(
+        self,
+        file_path: str,
+        apply: Callable[[str], tuple[str, list[int]] | str],
+    ) -> EditResult:
+        if self._cache is not None:
+            # Always edit the current version, not a cached one
+            self._cache.discard(self._key(file_path))
+        fetched = self._get_object(file_path)
+        if fetched is None:
+            return EditResult(error=f"Error: File '{file_path}' not found")
+        data, etag = fetched
+        result = apply(data.decode("utf-8"))
+        if isinstance(result, str):
+            return EditResult(error=result)
+        new_content, counts = result
+        try:
+            self._put(file_path, new_content.encode("utf-8"), IfMatch=etag)
+        except ClientError as e:
+            if _error_code(e) in _PRECONDITION_FAILED:
+                return EditResult(error=f"Error: File '{file_path}' was modified concurrently; read it again and retry the edit")
+            return EditResult(error=f"Error editing file '{file_path}': {e}")
+        return EditResult(path=file_path, files_update=None, occurrences=sum(counts), occurrences_per_edit=counts)
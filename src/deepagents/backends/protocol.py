@@ -7,7 +7,15 @@ database, etc.) and provide a uniform interface for file operations.
 
 from typing import TYPE_CHECKING, Optional, Protocol, runtime_checkable, Callable, TypeAlias, Any
 from langchain.tools import ToolRuntime
-from deepagents.backends.utils import FileInfo, GrepMatch
+from deepagents.backends.utils import (
+    FileInfo,
+    GrepMatch,
+    GrepOutputMode,
+    file_data_to_string,
+    grep_options,
+    perform_string_replacement,
+    update_file_data,
+)
 
 from dataclasses import dataclass
 
@@ -45,6 +53,7 @@ class EditResult:
             Checkpoint backends populate this with {file_path: file_data} for LangGraph state.
             External backends set None (already persisted to disk/S3/database/etc).
         occurrences: Number of replacements made, None on failure.
+        occurrences_per_edit: Replacements made by each edit of an edit_many call.
     Examples:
         >>> # Checkpoint storage
         >>> EditResult(path="/f.txt", files_update={"/f.txt": {...}}, occurrences=1)
@@ -58,6 +67,7 @@ class EditResult:
     path: str | None = None
     files_update: dict[str, Any] | None = None
     occurrences: int | None = None
+    occurrences_per_edit: list[int] | None = None
 
 @runtime_checkable
 class BackendProtocol(Protocol):
@@ -92,8 +102,21 @@ class BackendProtocol(Protocol):
         pattern: str,
         path: Optional[str] = None,
         glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: "GrepOutputMode" = "content",
     ) -> list["GrepMatch"] | str:
-        """Structured search results or error string for invalid input."""
+        """Structured search results or error string for invalid input.
+
+        before/after request that many context lines around each match, returned
+        in the match's context_before/context_after. output_mode
+        "files_with_matches" returns one entry per matching file and "count" one
+        entry per file with its count, so backends can stop at a file's first
+        hit or count without keeping line text. Callers only pass these
+        arguments when they differ from the defaults, so backends without
+        support keep working for plain searches.
+        """
         ...
 
     def glob_info(self, pattern: str, path: str = "/") -> list["FileInfo"]:
@@ -119,4 +142,235 @@ class BackendProtocol(Protocol):
         ...
 
 
+@runtime_checkable
+class SupportsReadMany(Protocol):
+    """Optional capability: read several files in one batched backend call.
+
+    Backends that can fetch many files cheaper than one at a time (e.g. one
+    database query) implement this; callers fall back to concurrent read() calls.
+    """
+
+    def read_many(self, requests: list[tuple[str, int, int]]) -> list[str]:
+        """Read each (file_path, offset, limit) and return results in request order."""
+        ...
+
+
+@runtime_checkable
+class SupportsReadContent(Protocol):
+    """Optional capability: return a file's exact content, without line numbers.
+
+    read() reports lines, so a trailing newline cannot be told apart from its
+    absence; copying files between backends (e.g. rebalancing shards) needs
+    the exact text instead.
+    """
+
+    def read_content(self, file_path: str) -> str | None:
+        """Return the full content of file_path, or None if it does not exist."""
+        ...
+
+
+@runtime_checkable
+class SupportsEditMany(Protocol):
+    """Optional capability: apply several edits to one file in a single read and write.
+
+    Implementations are all-or-nothing: if any edit fails validation, nothing
+    is written and the error names the failing edit.
+    """
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply (old_string, new_string, replace_all) edits in order. Returns EditResult."""
+        ...
+
+
+def apply_edits(backend: BackendProtocol, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+    """Apply edits through edit_many when supported, else one edit() call at a time.
+
+    The fallback stops at the first failing edit. Edits before it have already
+    been applied, which the error message states.
+
+    A backend that returns files_update (state-style) has not changed anything
+    yet, so a later edit() would still see the original content. Once an edit
+    returns files_update, the remaining edits are applied in memory to the
+    updated file and returned as a single files_update, all or nothing.
+    """
+    if isinstance(backend, SupportsEditMany):
+        return backend.edit_many(file_path, edits)
+    if not edits:
+        return EditResult(error="Error: No edits provided")
+    counts: list[int] = []
+    for i, (old_string, new_string, replace_all) in enumerate(edits, 1):
+        res = backend.edit(file_path, old_string, new_string, replace_all=replace_all)
+        if res.error:
+            applied = f" Edits 1-{i - 1} were already applied." if i > 1 else " No changes were made."
+            return EditResult(error=f"Error: Edit {i} of {len(edits)} failed.{applied} {res.error.removeprefix('Error: ')}")
+        counts.append(res.occurrences or 0)
+        if res.files_update:
+            return _fold_remaining_edits(file_path, edits, i, counts, res.files_update)
+    return EditResult(path=file_path, occurrences=sum(counts), occurrences_per_edit=counts)
+
+
+def _fold_remaining_edits(
+    file_path: str,
+    edits: list[tuple[str, str, bool]],
+    applied: int,
+    counts: list[int],
+    files_update: dict[str, Any],
+) -> EditResult:
+    """Apply edits after the first `applied` ones to the file data in files_update."""
+    if applied == len(edits):
+        return EditResult(path=file_path, files_update=files_update, occurrences=sum(counts), occurrences_per_edit=counts)
+    file_data = files_update.get(file_path)
+    if not isinstance(file_data, dict) or "content" not in file_data:
+        return EditResult(error=f"Error: Cannot apply {len(edits)} edits to {file_path} in one call on this backend. No changes were made.")
+    content = file_data_to_string(file_data)
+    counts = list(counts)
+    for i, (old_string, new_string, replace_all) in enumerate(edits[applied:], applied + 1):
+        result = perform_string_replacement(content, old_string, new_string, replace_all)
+        if isinstance(result, str):
+            return EditResult(error=f"Error: Edit {i} of {len(edits)} failed, no changes were made. {result.removeprefix('Error: ')}")
+        content, occurrences = result
+        counts.append(occurrences)
+    return EditResult(
+        path=file_path,
+        files_update={**files_update, file_path: update_file_data(file_data, content)},
+        occurrences=sum(counts),
+        occurrences_per_edit=counts,
+    )
+
+
+@runtime_checkable
+class SupportsGrepPage(Protocol):
+    """Optional capability: resume a grep after a given match instead of rescanning.
+
+    Pages are ordered by (path, line). A page shorter than limit means the
+    search is exhausted.
+    """
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        start_after: tuple[str, int] | None = None,
+        limit: int = 1000,
+        before: int = 0,
+        after: int = 0,
+        output_mode: "GrepOutputMode" = "content",
+    ) -> list["GrepMatch"] | str:
+        """Return up to limit entries strictly after the (path, line) position `start_after`.
+
+        In the per-file output modes a position inside a file means the file was already reported.
+        """
+        ...
+
+
+@runtime_checkable
+class SupportsGlobPage(Protocol):
+    """Optional capability: resume a glob after a given path instead of rescanning.
+
+    Pages are ordered by path. A page shorter than limit means the search is
+    exhausted.
+    """
+
+    def glob_page(
+        self,
+        pattern: str,
+        path: str = "/",
+        *,
+        start_after: str | None = None,
+        limit: int = 1000,
+    ) -> list["FileInfo"]:
+        """Return up to limit matching files whose path sorts strictly after `start_after`."""
+        ...
+
+
+def paginate_grep(
+    backend: BackendProtocol,
+    pattern: str,
+    path: Optional[str] = None,
+    glob: Optional[str] = None,
+    *,
+    start_after: tuple[str, int] | None = None,
+    limit: int = 1000,
+    before: int = 0,
+    after: int = 0,
+    output_mode: GrepOutputMode = "content",
+) -> list[GrepMatch] | str:
+    """Return one page of grep matches, resuming natively when the backend supports it.
+
+    Other backends run a full grep_raw() and the page is cut from its sorted result.
+    """
+    options = grep_options(before, after, output_mode)
+    if isinstance(backend, SupportsGrepPage):
+        return backend.grep_page(pattern, path, glob, start_after=start_after, limit=limit, **options)
+    raw = backend.grep_raw(pattern, path=path, glob=glob, **options)
+    if isinstance(raw, str):
+        return raw
+    ordered = sorted(raw, key=lambda m: (m["path"], m["line"]))
+    if start_after is not None:
+        ordered = [m for m in ordered if (m["path"], m["line"]) > start_after]
+    return ordered[:limit]
+
+
+def paginate_glob(
+    backend: BackendProtocol,
+    pattern: str,
+    path: str = "/",
+    *,
+    start_after: str | None = None,
+    limit: int = 1000,
+) -> list[FileInfo]:
+    """Return one page of glob results, resuming natively when the backend supports it.
+
+    Other backends run a full glob_info() and the page is cut from its sorted result.
+    """
+    if isinstance(backend, SupportsGlobPage):
+        return backend.glob_page(pattern, path, start_after=start_after, limit=limit)
+    ordered = sorted(backend.glob_info(pattern, path=path), key=lambda fi: fi.get("path", ""))
+    if start_after is not None:
+        ordered = [fi for fi in ordered if fi.get("path", "") > start_after]
+    return ordered[:limit]
+
+
 BackendFactory: TypeAlias = Callable[[ToolRuntime], BackendProtocol]
+
+
+@runtime_checkable
+class SupportsTree(Protocol):
+    """Optional capability: list a directory several levels deep in one call.
+
+    Backends that can enumerate a whole subtree cheaply (one prefix scan, one
+    bounded directory walk) implement this; callers fall back to one ls_info()
+    call per directory.
+    """
+
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list["FileInfo"]:
+        """Return up to max_entries entries at most depth levels below path, ordered by path.
+
+        Directories have a trailing / in their path and is_dir=True. depth=1
+        lists the same entries as ls_info().
+        """
+        ...
+
+
+def list_tree(backend: BackendProtocol, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+    """List path down to depth levels, using tree_info when the backend supports it.
+
+    Other backends are walked depth-first with ls_info(), stopping once
+    max_entries entries have been collected.
+    """
+    if isinstance(backend, SupportsTree):
+        return backend.tree_info(path, depth=depth, max_entries=max_entries)
+    entries: list[FileInfo] = []
+
+    def walk(directory: str, level: int) -> None:
+        for fi in sorted(backend.ls_info(directory), key=lambda fi: fi.get("path", "")):
+            if len(entries) >= max_entries:
+                return
+            entries.append(fi)
+            if fi.get("is_dir") and level < depth:
+                walk(fi.get("path", ""), level + 1)
+
+    walk(path, 1)
+    return entries
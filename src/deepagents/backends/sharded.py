@@ -0,0 +1,274 @@
+"""ShardedBackend: Spread files over several backends by consistent hashing."""
+
+import bisect
+import contextvars
+import hashlib
+import heapq
+from collections.abc import Callable
+from typing import Optional, TypeVar
+
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    EditResult,
+    SupportsReadContent,
+    WriteResult,
+    apply_edits,
+    list_tree,
+)
+from deepagents.backends.state import StateBackend
+from deepagents.backends.utils import (
+    EMPTY_CONTENT_WARNING,
+    FileInfo,
+    GrepMatch,
+    GrepOutputMode,
+    get_fanout_executor,
+    grep_options,
+    strip_line_numbers,
+)
+
+T = TypeVar("T")
+
+# Lines fetched per read() call when migrating a file between shards
+_MIGRATION_READ_LIMIT = 2000
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class ShardedBackend:
+    """Backend that consistently hashes file paths across N child backends.
+
+    Point operations (read/write/edit) go to the shard that owns the path.
+    Listings, globs and greps are scattered to every shard concurrently and
+    merged in path order. Each shard only reports files it owns, so copies left
+    behind on a previous owner after a rebalance stay hidden.
+
+    Example:
+        ```python
+        backend = ShardedBackend([
+            FilesystemBackend(root_dir="/data/shard0", virtual_mode=True),
+            FilesystemBackend(root_dir="/data/shard1", virtual_mode=True),
+        ])
+        backend.add_shard(FilesystemBackend(root_dir="/data/shard2", virtual_mode=True))
+        ```
+    """
+
+    def __init__(self, shards: list[BackendProtocol], virtual_nodes: int = 64) -> None:
+        """Initialize the sharded backend.
+
+        Args:
+            shards: Child backends. Order matters: ring positions are derived from
+                the shard index, so keep the same order across restarts.
+            virtual_nodes: Ring positions per shard; more positions even out load.
+        """
+        if not shards:
+            msg = "ShardedBackend requires at least one shard"
+            raise ValueError(msg)
+        self.shards = list(shards)
+        self.virtual_nodes = virtual_nodes
+        self._ring: list[tuple[int, int]] = []
+        for index in range(len(self.shards)):
+            self._add_to_ring(index)
+
+    def _add_to_ring(self, index: int) -> None:
+        for vnode in range(self.virtual_nodes):
+            bisect.insort(self._ring, (_hash(f"shard-{index}:{vnode}"), index))
+
+    def shard_index(self, file_path: str) -> int:
+        """Return the index of the shard that owns file_path."""
+        pos = bisect.bisect(self._ring, (_hash(file_path), len(self.shards)))
+        return self._ring[pos % len(self._ring)][1]
+
+    def _shard(self, file_path: str) -> BackendProtocol:
+        return self.shards[self.shard_index(file_path)]
+
+    def _scatter(self, fn: Callable[[BackendProtocol], T]) -> list[tuple[int, T]]:
+        """Call fn on every shard concurrently, returning (shard index, result)."""
+        if len(self.shards) == 1:
+            return [(0, fn(self.shards[0]))]
+        executor = get_fanout_executor()
+        futures = [
+            (index, executor.submit(contextvars.copy_context().run, fn, shard))
+            for index, shard in enumerate(self.shards)
+        ]
+        return [(index, future.result()) for index, future in futures]
+
+    def ls_info(self, path: str) -> list[FileInfo]:
+        """List a directory across all shards (non-recursive).
+
+        Args:
+            path: Absolute path to directory.
+
+        Returns:
+            Merged FileInfo dicts sorted by path. Directories present on several
+            shards are reported once.
+        """
+        merged: dict[str, FileInfo] = {}
+        for index, infos in self._scatter(lambda shard: shard.ls_info(path)):
+            for fi in infos:
+                p = fi.get("path", "")
+                if fi.get("is_dir"):
+                    merged.setdefault(p, fi)
+                elif self.shard_index(p) == index:
+                    merged[p] = fi
+        return [merged[p] for p in sorted(merged)]
+
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List a directory several levels deep across all shards, merged like ls_info."""
+        merged: dict[str, FileInfo] = {}
+        for index, infos in self._scatter(lambda shard: list_tree(shard, path, depth, max_entries)):
+            for fi in infos:
+                p = fi.get("path", "")
+                if fi.get("is_dir"):
+                    merged.setdefault(p, fi)
+                elif self.shard_index(p) == index:
+                    merged[p] = fi
+        return [merged[p] for p in heapq.nsmallest(max_entries, merged)]
+
+    def read(
+        self,
+        file_path: str,
+        offset: int = 0,
+        limit: int = 2000,
+    ) -> str:
+        """Read file content from the owning shard."""
+        return self._shard(file_path).read(file_path, offset=offset, limit=limit)
+
+    def grep_raw(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Search every shard concurrently and merge matches by path and line."""
+        context = grep_options(before, after, output_mode)
+        matches: list[GrepMatch] = []
+        for index, raw in self._scatter(lambda shard: shard.grep_raw(pattern, path, glob, **context)):
+            if isinstance(raw, str):
+                return raw
+            matches.extend(m for m in raw if self.shard_index(m["path"]) == index)
+        matches.sort(key=lambda m: (m["path"], m["line"]))
+        return matches
+
+    def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        """Glob every shard concurrently and merge results by path."""
+        results: list[FileInfo] = []
+        for index, infos in self._scatter(lambda shard: shard.glob_info(pattern, path)):
+            results.extend(fi for fi in infos if self.shard_index(fi.get("path", "")) == index)
+        results.sort(key=lambda fi: fi.get("path", ""))
+        return results
+
+    def write(
+        self,
+        file_path: str,
+        content: str,
+    ) -> WriteResult:
+        """Create a file on the owning shard."""
+        return self._shard(file_path).write(file_path, content)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file on the owning shard."""
+        return self._shard(file_path).edit(file_path, old_string, new_string, replace_all=replace_all)
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to a file on the owning shard."""
+        return apply_edits(self._shard(file_path), file_path, edits)
+
+    def add_shard(self, shard: BackendProtocol, *, rebalance: bool = True) -> int:
+        """Add a shard to the ring, optionally migrating the files it now owns.
+
+        Consistent hashing means only about 1/(N+1) of the files change owner.
+
+        Args:
+            shard: Backend to add.
+            rebalance: Copy files whose owner changed onto their new shard.
+
+        Returns:
+            Number of files migrated.
+
+        Raises:
+            ValueError: If rebalance is requested and a shard keeps files in agent state.
+        """
+        if rebalance:
+            self._check_rebalanceable([*self.shards, shard])
+        self.shards.append(shard)
+        self._add_to_ring(len(self.shards) - 1)
+        return self.rebalance() if rebalance else 0
+
+    def rebalance(self) -> int:
+        """Copy every file that is stored on a shard other than its owner.
+
+        The protocol has no delete, so the old copy is left in place; it is
+        hidden from listings and searches because its shard no longer owns it.
+        Files that already exist on the owning shard are not overwritten.
+
+        Content is copied exactly through read_content() where the source shard
+        supports it; otherwise it is reassembled from read(), which cannot
+        preserve a trailing newline.
+
+        Returns:
+            Number of files migrated.
+
+        Raises:
+            ValueError: If a shard keeps files in agent state. Its writes only take
+                effect through a state update, which a migration cannot apply.
+        """
+        self._check_rebalanceable(self.shards)
+        moved = 0
+        for index, infos in self._scatter(lambda shard: shard.glob_info("**/*", "/")):
+            source = self.shards[index]
+            for fi in infos:
+                file_path = fi.get("path", "")
+                owner = self.shard_index(file_path)
+                if owner == index:
+                    continue
+                content = self._read_all(source, file_path)
+                if content is None:
+                    continue
+                result = self.shards[owner].write(file_path, content)
+                if result.files_update:
+                    msg = f"Cannot migrate {file_path}: shard {owner} returned a state update, which rebalance cannot apply"
+                    raise ValueError(msg)
+                if not result.error:
+                    moved += 1
+        return moved
+
+    @staticmethod
+    def _check_rebalanceable(shards: list[BackendProtocol]) -> None:
+        for index, shard in enumerate(shards):
+            if isinstance(shard, StateBackend):
+                msg = f"Cannot rebalance: shard {index} is a StateBackend, whose writes need a state update"
+                raise ValueError(msg)
+
+    @staticmethod
+    def _read_all(shard: BackendProtocol, file_path: str) -> str | None:
+        """Read a whole file, exactly when the shard supports read_content()."""
+        if isinstance(shard, SupportsReadContent):
+            return shard.read_content(file_path)
+        lines: list[str] = []
+        offset = 0
+        while True:
+            chunk = shard.read(file_path, offset=offset, limit=_MIGRATION_READ_LIMIT)
+            if chunk == EMPTY_CONTENT_WARNING:
+                return ""
+            if chunk.startswith("Error: Line offset"):
+                break
+            if chunk.startswith("Error"):
+                return None
+            page = strip_line_numbers(chunk)
+            lines.extend(page)
+            if len(page) < _MIGRATION_READ_LIMIT:
+                break
+            offset += _MIGRATION_READ_LIMIT
+        return "\n".join(lines)
@@ -0,0 +1,140 @@
+"""ToolResultSpill: Keep evicted tool results on local disk instead of in agent state."""
+
+import shutil
+import threading
+import time
+from collections.abc import Collection
+from pathlib import Path
+
+from langchain.tools import ToolRuntime
+
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.instance_cache import thread_id_of
+from deepagents.backends.utils import sanitize_tool_call_id
+
+DEFAULT_THREAD_DIR = "_no_thread"
+
+
+class ToolResultSpill:
+    """Spill directory for oversized tool results, partitioned by thread.
+
+    With the default StateBackend, an evicted tool result lands in the `files`
+    state key and is copied into every later checkpoint. Passing a
+    ToolResultSpill to FilesystemMiddleware writes evicted results under
+    ``root_dir/<thread_id>/`` instead; the tool message only carries the path,
+    and the filesystem tools can still read it under /large_tool_results/.
+
+    Retention:
+        - delete_thread() removes a thread's results; call it next to
+          checkpointer.delete_thread().
+        - collect() removes thread directories untouched for max_age seconds,
+          then the least recently modified ones while the total exceeds
+          max_bytes. The middleware runs it at most every collect_interval
+          seconds after spilling, keeping the directory of the thread that
+          just spilled.
+
+    Example:
+        ```python
+        spill = ToolResultSpill("/var/lib/agent/tool-results", max_age=7 * 24 * 3600)
+        agent = create_agent(model, middleware=[FilesystemMiddleware(tool_result_spill=spill)])
+        ...
+        checkpointer.delete_thread(thread_id)
+        spill.delete_thread(thread_id)
+        ```
+    """
+
+    def __init__(
+        self,
+        root_dir: str | Path,
+        *,
+        max_age: float | None = None,
+        max_bytes: int | None = None,
+        collect_interval: float = 60.0,
+    ) -> None:
+        """Initialize the spill directory.
+
+        Args:
+            root_dir: Directory holding one subdirectory per thread. Created if missing.
+            max_age: Seconds since last write after which a thread's results are removed.
+            max_bytes: Upper bound on the total size of spilled results.
+            collect_interval: Minimum seconds between automatic collect() runs.
+        """
+        self.root_dir = Path(root_dir).resolve()
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.collect_interval = collect_interval
+        self._last_collect = 0.0
+        self._lock = threading.Lock()
+
+    def thread_dir(self, thread_id: str) -> Path:
+        """Return the directory holding a thread's spilled results."""
+        return self.root_dir / sanitize_tool_call_id(thread_id)
+
+    @staticmethod
+    def thread_id_for(runtime: ToolRuntime) -> str:
+        """Return the thread id whose directory receives the runtime's results."""
+        return thread_id_of(getattr(runtime, "config", None)) or DEFAULT_THREAD_DIR
+
+    def backend_for(self, runtime: ToolRuntime) -> FilesystemBackend:
+        """Return a sandboxed backend over the current thread's spill directory."""
+        directory = self.thread_dir(self.thread_id_for(runtime))
+        directory.mkdir(parents=True, exist_ok=True)
+        return FilesystemBackend(root_dir=directory, virtual_mode=True)
+
+    def delete_thread(self, thread_id: str) -> int:
+        """Remove every result spilled by a thread.
+
+        Returns:
+            Number of bytes freed.
+        """
+        directory = self.thread_dir(thread_id)
+        freed = self._size(directory)
+        shutil.rmtree(directory, ignore_errors=True)
+        return freed
+
+    @staticmethod
+    def _size(directory: Path) -> int:
+        return sum(f.stat().st_size for f in directory.rglob("*") if f.is_file()) if directory.is_dir() else 0
+
+    @staticmethod
+    def _last_modified(directory: Path) -> float:
+        return max((f.stat().st_mtime for f in directory.rglob("*")), default=directory.stat().st_mtime)
+
+    def collect(self, keep: Collection[str] = ()) -> int:
+        """Apply the retention policy now.
+
+        Args:
+            keep: Thread ids whose directories are never removed, e.g. threads
+                whose results were just referenced in a tool message.
+
+        Returns:
+            Number of thread directories removed.
+        """
+        with self._lock:
+            self._last_collect = time.monotonic()
+            kept = {self.thread_dir(thread_id) for thread_id in keep}
+            dirs = [d for d in self.root_dir.iterdir() if d.is_dir() and d not in kept]
+            aged = sorted(((self._last_modified(d), d) for d in dirs), key=lambda item: item[0])
+            removed = 0
+            if self.max_age is not None:
+                cutoff = time.time() - self.max_age
+                while aged and aged[0][0] < cutoff:
+                    shutil.rmtree(aged.pop(0)[1], ignore_errors=True)
+                    removed += 1
+            if self.max_bytes is not None:
+                sizes = {d: self._size(d) for _, d in aged}
+                total = sum(sizes.values())
+                while aged and total > self.max_bytes:
+                    _, oldest = aged.pop(0)
+                    shutil.rmtree(oldest, ignore_errors=True)
+                    total -= sizes[oldest]
+                    removed += 1
+            return removed
+
+    def maybe_collect(self, keep: Collection[str] = ()) -> None:
+        """Run collect(keep) if a retention limit is set and collect_interval has elapsed."""
+        if self.max_age is None and self.max_bytes is None:
+            return
+        if time.monotonic() - self._last_collect >= self.collect_interval:
+            self.collect(keep)
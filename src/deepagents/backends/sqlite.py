@@ -0,0 +1,451 @@
+"""SqliteBackend: Persist files in a single SQLite database (WAL mode).
+
+- Path-ordered primary index serves ls_info/glob_info as prefix range scans
+- FTS5 trigram index prefilters grep_raw candidates on a literal extracted
+  from the regex, followed by exact per-line regex verification
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import wcmatch.glob as wcglob
+
+from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.utils import (
+    FileInfo,
+    GrepMatch,
+    _validate_path,
+    format_read_response,
+    GrepOutputMode,
+    grep_file,
+    perform_string_replacement,
+    perform_string_replacements,
+)
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse  # type: ignore[no-redef]
+
+# Rows fetched per query while walking a directory listing
+_LS_BATCH_SIZE = 256
+# Files fetched per query while paging through grep results
+_GREP_BATCH_SIZE = 64
+# FTS5 trigram queries need at least three characters
+_MIN_TRIGRAM_LITERAL = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    modified_at TEXT NOT NULL
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    content, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE OF content ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO files_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _required_literal(pattern: str) -> str | None:
+    """Return the longest literal every match of pattern must contain, if any.
+
+    Only top-level literal runs are considered, so alternations, repeats and
+    groups simply end a run. Case-insensitive patterns only yield ASCII
+    literals, matching the trigram tokenizer's case folding.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    ignorecase = bool(parsed.state.flags & re.IGNORECASE)
+    best = ""
+    run: list[str] = []
+    for op, arg in list(parsed) + [(None, None)]:
+        if op is sre_parse.LITERAL and chr(arg) != "\n" and not (ignorecase and arg > 127):  # noqa: PLR2004
+            run.append(chr(arg))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best if len(best) >= _MIN_TRIGRAM_LITERAL else None
+
+
+class SqliteBackend:
+    """Backend that stores files in a SQLite database.
+
+    Suited to persistent agent files on a single node without a database
+    server. Content and metadata live in one table keyed by path; listings are
+    index range scans and grep uses an FTS5 trigram index to skip files that
+    cannot match before running the regex line by line.
+
+    A single connection is shared and serialized with a lock, so the backend is
+    safe to use from parallel tool calls; WAL mode keeps readers in other
+    processes unblocked by writes.
+    """
+
+    def __init__(self, db_path: str | Path = ":memory:", *, full_text_index: bool = True) -> None:
+        """Initialize SqliteBackend.
+
+        Args:
+            db_path: Database file path, or ":memory:" for an in-process database.
+            full_text_index: Maintain the FTS5 trigram index used to prefilter
+                grep. Requires SQLite 3.34+ built with FTS5.
+        """
+        self.db_path = str(db_path)
+        self.full_text_index = full_text_index
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            if full_text_index:
+                self._conn.executescript(_FTS_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: tuple[Any, ...] = ()) -> list[tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _get(self, file_path: str) -> tuple[str, str, str] | None:
+        rows = self._query("SELECT content, created_at, modified_at FROM files WHERE path = ?", (file_path,))
+        return rows[0] if rows else None
+
+    def ls_info(self, path: str) -> list[FileInfo]:
+        """List files and directories in the specified directory (non-recursive).
+
+        Walks the path index in order and jumps past each subdirectory once it
+        is seen, so large subtrees are not scanned row by row.
+
+        Args:
+            path: Absolute path to directory.
+
+        Returns:
+            List of FileInfo-like dicts for files and directories directly in the directory.
+            Directories have a trailing / in their path and is_dir=True.
+        """
+        prefix = path if path.endswith("/") else path + "/"
+        upper = _prefix_upper_bound(prefix)
+        infos: list[FileInfo] = []
+        cursor = prefix
+        inclusive = True
+        while True:
+            op = ">=" if inclusive else ">"
+            rows = self._query(
+                f"SELECT path, size, modified_at FROM files WHERE path {op} ? AND path < ? ORDER BY path LIMIT ?",  # noqa: S608
+                (cursor, upper, _LS_BATCH_SIZE),
+            )
+            if not rows:
+                break
+            jumped = False
+            for file_path, size, modified_at in rows:
+                relative = file_path[len(prefix):]
+                if "/" in relative:
+                    subdir = prefix + relative.split("/", 1)[0] + "/"
+                    infos.append({"path": subdir, "is_dir": True, "size": 0, "modified_at": ""})
+                    cursor = _prefix_upper_bound(subdir)
+                    inclusive = True
+                    jumped = True
+                    break
+                infos.append({"path": file_path, "is_dir": False, "size": int(size), "modified_at": modified_at})
+            if not jumped:
+                if len(rows) < _LS_BATCH_SIZE:
+                    break
+                cursor = rows[-1][0]
+                inclusive = False
+
+        infos.sort(key=lambda x: x.get("path", ""))
+        return infos
+
+    def read(
+        self,
+        file_path: str,
+        offset: int = 0,
+        limit: int = 2000,
+    ) -> str:
+        """Read file content with line numbers.
+
+        Args:
+            file_path: Absolute file path
+            offset: Line offset to start reading from (0-indexed)
+            limit: Maximum number of lines to read
+
+        Returns:
+            Formatted file content with line numbers, or error message.
+        """
+        row = self._get(file_path)
+        if row is None:
+            return f"Error: File '{file_path}' not found"
+        content, created_at, modified_at = row
+        file_data = {"content": content.split("\n"), "created_at": created_at, "modified_at": modified_at}
+        return format_read_response(file_data, offset, limit)
+
+    def read_content(self, file_path: str) -> str | None:
+        """Return the exact stored text of a file, or None if it does not exist."""
+        row = self._get(file_path)
+        return row[0] if row is not None else None
+
+    def read_many(self, requests: list[tuple[str, int, int]]) -> list[str]:
+        """Read several files with a single query.
+
+        Args:
+            requests: (file_path, offset, limit) tuples.
+
+        Returns:
+            One formatted result or error message per request, in request order.
+        """
+        paths = sorted({file_path for file_path, _, _ in requests})
+        placeholders = ", ".join("?" * len(paths))
+        rows = self._query(
+            f"SELECT path, content, created_at, modified_at FROM files WHERE path IN ({placeholders})",  # noqa: S608
+            tuple(paths),
+        ) if paths else []
+        found = {path: {"content": content.split("\n"), "created_at": created, "modified_at": modified} for path, content, created, modified in rows}
+        results = []
+        for file_path, offset, limit in requests:
+            file_data = found.get(file_path)
+            results.append(f"Error: File '{file_path}' not found" if file_data is None else format_read_response(file_data, offset, limit))
+        return results
+
+    def write(
+        self,
+        file_path: str,
+        content: str,
+    ) -> WriteResult:
+        """Create a new file with content.
+        Returns WriteResult. External storage sets files_update=None.
+        """
+        now = datetime.now(UTC).isoformat()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO files (path, content, size, created_at, modified_at) VALUES (?, ?, ?, ?, ?)",
+                    (file_path, content, len(content), now, now),
+                )
+        except sqlite3.IntegrityError:
+            return WriteResult(error=f"Cannot write to {file_path} because it already exists. Read and then make an edit, or write to a new path.")
+        return WriteResult(path=file_path, files_update=None)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file by replacing string occurrences.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        with self._lock:
+            row = self._get(file_path)
+            if row is None:
+                return EditResult(error=f"Error: File '{file_path}' not found")
+            result = perform_string_replacement(row[0], old_string, new_string, replace_all)
+            if isinstance(result, str):
+                return EditResult(error=result)
+            new_content, occurrences = result
+            self._conn.execute(
+                "UPDATE files SET content = ?, size = ?, modified_at = ? WHERE path = ?",
+                (new_content, len(new_content), datetime.now(UTC).isoformat(), file_path),
+            )
+        return EditResult(path=file_path, files_update=None, occurrences=int(occurrences))
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file in one transaction, all or nothing.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        with self._lock:
+            row = self._get(file_path)
+            if row is None:
+                return EditResult(error=f"Error: File '{file_path}' not found")
+            result = perform_string_replacements(row[0], edits)
+            if isinstance(result, str):
+                return EditResult(error=result)
+            new_content, counts = result
+            self._conn.execute(
+                "UPDATE files SET content = ?, size = ?, modified_at = ? WHERE path = ?",
+                (new_content, len(new_content), datetime.now(UTC).isoformat(), file_path),
+            )
+        return EditResult(path=file_path, files_update=None, occurrences=sum(counts), occurrences_per_edit=counts)
+
+    def grep_raw(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid regex pattern: {e}"
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+
+        matches: list[GrepMatch] = []
+        for file_path, content in self._grep_candidates(pattern, prefix, _prefix_upper_bound(prefix)):
+            if glob and not wcglob.globmatch(Path(file_path).name, glob, flags=wcglob.BRACE):
+                continue
+            lines = content.split("\n")
+            matches.extend(grep_file(file_path, lines, regex, before=before, after=after, output_mode=output_mode))
+        return matches
+
+    def _grep_candidates(
+        self, pattern: str, lower: str, upper: str, limit: int | None = None
+    ) -> list[tuple[str, str]]:
+        """Rows in [lower, upper) that may match pattern, in path order."""
+        literal = _required_literal(pattern) if self.full_text_index else None
+        limit_sql = "" if limit is None else f" LIMIT {int(limit)}"
+        if literal is not None:
+            phrase = '"' + literal.replace('"', '""') + '"'
+            return self._query(
+                "SELECT f.path, f.content FROM files_fts JOIN files f ON f.id = files_fts.rowid "  # noqa: S608
+                "WHERE files_fts MATCH ? AND f.path >= ? AND f.path < ? ORDER BY f.path" + limit_sql,
+                (phrase, lower, upper),
+            )
+        return self._query(
+            "SELECT path, content FROM files WHERE path >= ? AND path < ? ORDER BY path" + limit_sql,  # noqa: S608
+            (lower, upper),
+        )
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        *,
+        start_after: tuple[str, int] | None = None,
+        limit: int = 1000,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
+    ) -> list[GrepMatch] | str:
+        """Return up to limit matches in (path, line) order after the given position.
+
+        Rows are fetched in small path-ordered batches starting at `start_after`, so
+        resuming a search does not rescan the files already covered.
+        """
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Invalid regex pattern: {e}"
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+
+        upper = _prefix_upper_bound(prefix)
+        after_path, after_line = start_after if start_after is not None else (prefix, 0)
+        lower = max(prefix, after_path)
+        matches: list[GrepMatch] = []
+        while True:
+            rows = self._grep_candidates(pattern, lower, upper, _GREP_BATCH_SIZE)
+            for file_path, content in rows:
+                if glob and not wcglob.globmatch(Path(file_path).name, glob, flags=wcglob.BRACE):
+                    continue
+                skip_through = after_line if file_path == after_path else 0
+                lines = content.split("\n")
+                for m in grep_file(
+                    file_path, lines, regex, before=before, after=after, output_mode=output_mode, skip_through=skip_through
+                ):
+                    matches.append(m)
+                    if len(matches) >= limit:
+                        return matches
+            if len(rows) < _GREP_BATCH_SIZE:
+                return matches
+            # Smallest string sorting after the last path
+            lower = rows[-1][0] + "\0"
+
+    def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+        pattern = pattern.lstrip("/")
+
+        # Narrow the range scan with the pattern's literal leading directories
+        scan_prefix = prefix
+        literal_dirs = []
+        for part in pattern.split("/")[:-1]:
+            if any(ch in part for ch in "*?[]{}!"):
+                break
+            literal_dirs.append(part)
+        if literal_dirs:
+            scan_prefix = prefix + "/".join(literal_dirs) + "/"
+
+        rows = self._query(
+            "SELECT path, size, modified_at FROM files WHERE path >= ? AND path < ? ORDER BY path",
+            (scan_prefix, _prefix_upper_bound(scan_prefix)),
+        )
+        infos: list[FileInfo] = []
+        for file_path, size, modified_at in rows:
+            relative = file_path[len(prefix):]
+            if wcglob.globmatch(relative, pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+                infos.append({"path": file_path, "is_dir": False, "size": int(size), "modified_at": modified_at})
+        return infos
+
+    def glob_page(
+        self,
+        pattern: str,
+        path: str = "/",
+        *,
+        start_after: str | None = None,
+        limit: int = 1000,
+    ) -> list[FileInfo]:
+        """Return up to limit matching files in path order after the given path."""
+        try:
+            prefix = _validate_path(path)
+        except ValueError:
+            return []
+        pattern = pattern.lstrip("/")
+        upper = _prefix_upper_bound(prefix)
+        cursor = max(prefix, start_after) if start_after is not None else prefix
+        op = ">" if start_after is not None and start_after >= prefix else ">="
+        infos: list[FileInfo] = []
+        while True:
+            rows = self._query(
+                f"SELECT path, size, modified_at FROM files WHERE path {op} ? AND path < ? ORDER BY path LIMIT ?",  # noqa: S608
+                (cursor, upper, _LS_BATCH_SIZE),
+            )
+            for file_path, size, modified_at in rows:
+                if wcglob.globmatch(file_path[len(prefix):], pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+                    infos.append({"path": file_path, "is_dir": False, "size": int(size), "modified_at": modified_at})
+                    if len(infos) >= limit:
+                        return infos
+            if len(rows) < _LS_BATCH_SIZE:
+                return infos
+            cursor, op = rows[-1][0], ">"
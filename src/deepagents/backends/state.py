@@ -1,6 +1,8 @@
 """StateBackend: Store files in LangGraph agent state (ephemeral)."""
 
 import re
+from collections import ChainMap
+from collections.abc import Mapping
 from typing import Any, Literal, Optional, TYPE_CHECKING
 
 from langchain.tools import ToolRuntime
@@ -14,10 +16,12 @@ from .utils import (
     file_data_to_string,
     format_read_response,
     perform_string_replacement,
+    perform_string_replacements,
     _glob_search_files,
     grep_matches_from_files,
+    tree_paths,
 )
-from deepagents.backends.utils import FileInfo, GrepMatch
+from deepagents.backends.utils import FileInfo, GrepMatch, GrepOutputMode
 from deepagents.backends.protocol import WriteResult, EditResult
 
 
@@ -31,6 +35,10 @@ class StateBackend:
     Special handling: Since LangGraph state must be updated via Command objects
     (not direct mutation), operations return Command objects instead of None.
     This is indicated by the uses_state=True flag.
+
+    Subagents see their parent's files through the read-only `base_files` state
+    key and hold only their own writes in `files`, so fanning out does not copy
+    the parent's file map.
     """
     
     def __init__(self, runtime: "ToolRuntime"):
@@ -38,6 +46,12 @@ class StateBackend:
         
         Args:"""
         self.runtime = runtime
+
+    def _files(self) -> Mapping[str, Any]:
+        """Files visible to this agent: its own writes layered over the shared base files."""
+        files = self.runtime.state.get("files", {})
+        base = self.runtime.state.get("base_files")
+        return ChainMap(files, base) if base else files
     
     def ls_info(self, path: str) -> list[FileInfo]:
         """List files and directories in the specified directory (non-recursive).
@@ -49,7 +63,7 @@ class StateBackend:
             List of FileInfo-like dicts for files and directories directly in the directory.
             Directories have a trailing / in their path and is_dir=True.
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files()
         infos: list[FileInfo] = []
         subdirs: set[str] = set()
 
@@ -92,6 +106,32 @@ class StateBackend:
         infos.sort(key=lambda x: x.get("path", ""))
         return infos
 
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List files and directories down to depth levels below path in one pass over state.
+
+        Args:
+            path: Absolute path to directory.
+            depth: Number of levels to include (1 is the same as ls_info).
+            max_entries: Maximum number of entries to return.
+
+        Returns:
+            FileInfo-like dicts ordered by path. Directories have a trailing / and is_dir=True.
+        """
+        files = self._files()
+        infos: list[FileInfo] = []
+        for p in tree_paths(path, files, depth, max_entries):
+            if p.endswith("/"):
+                infos.append({"path": p, "is_dir": True, "size": 0, "modified_at": ""})
+                continue
+            fd = files[p]
+            infos.append({
+                "path": p,
+                "is_dir": False,
+                "size": len("\n".join(fd.get("content", []))),
+                "modified_at": fd.get("modified_at", ""),
+            })
+        return infos
+
     # Removed legacy ls() convenience to keep lean surface
     
     def read(
@@ -108,13 +148,18 @@ class StateBackend:
             limit: Maximum number of lines to readReturns:
             Formatted file content with line numbers, or error message.
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files()
         file_data = files.get(file_path)
         
         if file_data is None:
             return f"Error: File '{file_path}' not found"
         
         return format_read_response(file_data, offset, limit)
+
+    def read_content(self, file_path: str) -> str | None:
+        """Return the exact text of a file, or None if it does not exist."""
+        file_data = self._files().get(file_path)
+        return file_data_to_string(file_data) if file_data is not None else None
     
     def write(
         self, 
@@ -124,7 +169,7 @@ class StateBackend:
         """Create a new file with content.
         Returns WriteResult with files_update to update LangGraph state.
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files()
         
         if file_path in files:
             return WriteResult(error=f"Cannot write to {file_path} because it already exists. Read and then make an edit, or write to a new path.")
@@ -142,7 +187,7 @@ class StateBackend:
         """Edit a file by replacing string occurrences.
         Returns EditResult with files_update and occurrences.
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files()
         file_data = files.get(file_path)
         
         if file_data is None:
@@ -158,6 +203,23 @@ class StateBackend:
         new_file_data = update_file_data(file_data, new_content)
         return EditResult(path=file_path, files_update={file_path: new_file_data}, occurrences=int(occurrences))
     
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file, all or nothing.
+        Returns EditResult with files_update and per-edit occurrences.
+        """
+        files = self._files()
+        file_data = files.get(file_path)
+        if file_data is None:
+            return EditResult(error=f"Error: File '{file_path}' not found")
+
+        result = perform_string_replacements(file_data_to_string(file_data), edits)
+        if isinstance(result, str):
+            return EditResult(error=result)
+
+        new_content, counts = result
+        new_file_data = update_file_data(file_data, new_content)
+        return EditResult(path=file_path, files_update={file_path: new_file_data}, occurrences=sum(counts), occurrences_per_edit=counts)
+
     # Removed legacy grep() convenience to keep lean surface
 
     def grep_raw(
@@ -165,12 +227,16 @@ class StateBackend:
         pattern: str,
         path: str = "/",
         glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
     ) -> list[GrepMatch] | str:
-        files = self.runtime.state.get("files", {})
-        return grep_matches_from_files(files, pattern, path, glob)
+        files = self._files()
+        return grep_matches_from_files(files, pattern, path, glob, before=before, after=after, output_mode=output_mode)
     
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
-        files = self.runtime.state.get("files", {})
+        files = self._files()
         result = _glob_search_files(files, pattern, path)
         if result == "No files found":
             return []
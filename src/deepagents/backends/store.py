@@ -16,10 +16,12 @@ from deepagents.backends.utils import (
     file_data_to_string,
     format_read_response,
     perform_string_replacement,
+    perform_string_replacements,
     _glob_search_files,
     grep_matches_from_files,
+    tree_paths,
 )
-from deepagents.backends.utils import FileInfo, GrepMatch
+from deepagents.backends.utils import FileInfo, GrepMatch, GrepOutputMode
 
 
 class StoreBackend:
@@ -30,11 +32,16 @@ class StoreBackend:
     
     The namespace can include an optional assistant_id for multi-agent isolation.
     """
-    def __init__(self, runtime: "ToolRuntime"):
+    def __init__(self, runtime: "ToolRuntime", namespace: tuple[str, ...] | None = None):
         """Initialize StoreBackend with runtime.
         
-        Args:"""
+        Args:
+            runtime: Tool runtime providing the store and config.
+            namespace: Explicit store namespace. When omitted, the namespace is
+                derived from the assistant_id in the config (see _get_namespace).
+        """
         self.runtime = runtime
+        self.namespace = namespace
 
 
     def _get_store(self) -> BaseStore:
@@ -56,6 +63,7 @@ class StoreBackend:
         """Get the namespace for store operations.
         
         Preference order:
+        0) Use the explicit `namespace` passed to the constructor, if any.
         1) Use `self.runtime.config` if present (tests pass this explicitly).
         2) Fallback to `langgraph.config.get_config()` if available.
         3) Default to ("filesystem",).
@@ -63,6 +71,9 @@ class StoreBackend:
         If an assistant_id is available in the config metadata, return
         (assistant_id, "filesystem") to provide per-assistant isolation.
         """
+        if self.namespace is not None:
+            return self.namespace
+
         namespace = "filesystem"
 
         # Prefer the runtime-provided config when present
@@ -240,6 +251,35 @@ class StoreBackend:
         infos.sort(key=lambda x: x.get("path", ""))
         return infos
 
+    def tree_info(self, path: str, depth: int, max_entries: int) -> list[FileInfo]:
+        """List files and directories down to depth levels below path from one store scan.
+
+        Args:
+            path: Absolute path to directory.
+            depth: Number of levels to include (1 is the same as ls_info).
+            max_entries: Maximum number of entries to return.
+
+        Returns:
+            FileInfo-like dicts ordered by path. Directories have a trailing / and is_dir=True.
+        """
+        items = {str(item.key): item for item in self._search_store_paginated(self._get_store(), self._get_namespace())}
+        infos: list[FileInfo] = []
+        for p in tree_paths(path, items, depth, max_entries):
+            if p.endswith("/"):
+                infos.append({"path": p, "is_dir": True, "size": 0, "modified_at": ""})
+                continue
+            try:
+                fd = self._convert_store_item_to_file_data(items[p])
+            except ValueError:
+                continue
+            infos.append({
+                "path": p,
+                "is_dir": False,
+                "size": len("\n".join(fd.get("content", []))),
+                "modified_at": fd.get("modified_at", ""),
+            })
+        return infos
+
     # Removed legacy ls() convenience to keep lean surface
     
     def read(
@@ -270,6 +310,16 @@ class StoreBackend:
             return f"Error: {e}"
         
         return format_read_response(file_data, offset, limit)
+
+    def read_content(self, file_path: str) -> Optional[str]:
+        """Return the exact text of a file, or None if it does not exist or is malformed."""
+        item: Optional[Item] = self._get_store().get(self._get_namespace(), file_path)
+        if item is None:
+            return None
+        try:
+            return file_data_to_string(self._convert_store_item_to_file_data(item))
+        except ValueError:
+            return None
     
     def write(
         self, 
@@ -329,6 +379,29 @@ class StoreBackend:
         store_value = self._convert_file_data_to_store_value(new_file_data)
         store.put(namespace, file_path, store_value)
         return EditResult(path=file_path, files_update=None, occurrences=int(occurrences))
+
+    def edit_many(self, file_path: str, edits: list[tuple[str, str, bool]]) -> EditResult:
+        """Apply several edits to one file with a single get and put, all or nothing.
+        Returns EditResult. External storage sets files_update=None.
+        """
+        store = self._get_store()
+        namespace = self._get_namespace()
+
+        item = store.get(namespace, file_path)
+        if item is None:
+            return EditResult(error=f"Error: File '{file_path}' not found")
+        try:
+            file_data = self._convert_store_item_to_file_data(item)
+        except ValueError as e:
+            return EditResult(error=f"Error: {e}")
+
+        result = perform_string_replacements(file_data_to_string(file_data), edits)
+        if isinstance(result, str):
+            return EditResult(error=result)
+
+        new_content, counts = result
+        store.put(namespace, file_path, self._convert_file_data_to_store_value(update_file_data(file_data, new_content)))
+        return EditResult(path=file_path, files_update=None, occurrences=sum(counts), occurrences_per_edit=counts)
     
     # Removed legacy grep() convenience to keep lean surface
 
@@ -337,6 +410,10 @@ class StoreBackend:
         pattern: str,
         path: str = "/",
         glob: Optional[str] = None,
+        *,
+        before: int = 0,
+        after: int = 0,
+        output_mode: GrepOutputMode = "content",
     ) -> list[GrepMatch] | str:
         store = self._get_store()
         namespace = self._get_namespace()
@@ -347,7 +424,7 @@ class StoreBackend:
                 files[item.key] = self._convert_store_item_to_file_data(item)
             except ValueError:
                 continue
-        return grep_matches_from_files(files, pattern, path, glob)
+        return grep_matches_from_files(files, pattern, path, glob, before=before, after=after, output_mode=output_mode)
     
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         store = self._get_store()
@@ -5,17 +5,29 @@ helpers used by backends and the composite router. Structured helpers
 enable composition without fragile string parsing.
 """
 
+import heapq
 import re
+import threading
 import wcmatch.glob as wcglob
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Any, Literal, TypedDict, List, Dict
+from typing_extensions import NotRequired
 
 EMPTY_CONTENT_WARNING = "System reminder: File exists but has empty contents"
 MAX_LINE_LENGTH = 10000
 LINE_NUMBER_WIDTH = 6
 TOOL_RESULT_TOKEN_LIMIT = 20000  # Same threshold as eviction
 TRUNCATION_GUIDANCE = "... [results truncated, try being more specific with your parameters]"
+FANOUT_MAX_WORKERS = 32
+
+# Shared across backend instances, which are often rebuilt per tool call
+_fanout_executor: ThreadPoolExecutor | None = None
+_fanout_executor_lock = threading.Lock()
 
 
 class FileInfo(TypedDict, total=False):
@@ -30,11 +42,58 @@ class FileInfo(TypedDict, total=False):
     modified_at: str  # ISO timestamp if known
 
 
+GrepOutputMode = Literal["files_with_matches", "content", "count"]
+
+
 class GrepMatch(TypedDict):
-    """Structured grep match entry."""
+    """Structured grep match entry.
+
+    context_before/context_after are present when context lines were
+    requested. They never contain other matching lines; those are matches of
+    their own, so adjacent windows can be merged without losing matches.
+
+    In "files_with_matches" and "count" output modes there is one entry per
+    file with line 0 and empty text; count mode adds the number of matching
+    lines as count.
+    """
     path: str
     line: int
     text: str
+    context_before: NotRequired[list[str]]
+    context_after: NotRequired[list[str]]
+    count: NotRequired[int]
+
+
+@dataclass
+class CacheStats:
+    """Counters for backend-level caches.
+
+    Attributes:
+        hits: Lookups served from the cache.
+        misses: Lookups that fell through to the underlying storage.
+        invalidations: Entries dropped because the underlying data changed.
+        evictions: Entries dropped to respect a size bound.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache (0.0 when unused)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool used for scatter-gather across backends."""
+    global _fanout_executor  # noqa: PLW0603
+    with _fanout_executor_lock:
+        if _fanout_executor is None:
+            _fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="deepagents-backend")
+        return _fanout_executor
 
 
 def sanitize_tool_call_id(tool_call_id: str) -> str:
@@ -92,6 +151,47 @@ def format_content_with_line_numbers(
     return "\n".join(result_lines)
 
 
+def strip_line_numbers(formatted: str) -> list[str]:
+    """Invert format_content_with_line_numbers, returning the original lines.
+
+    Continuation chunks (e.g. 5.1, 5.2) are joined back onto their line.
+
+    Args:
+        formatted: Output of format_content_with_line_numbers
+
+    Returns:
+        Lines of content without line number prefixes
+    """
+    lines: list[str] = []
+    for row in formatted.split("\n"):
+        marker, sep, text = row.partition("\t")
+        if not sep:
+            continue
+        if "." in marker and lines:
+            lines[-1] += text
+        else:
+            lines.append(text)
+    return lines
+
+
+def head_lines(content: str, n: int) -> list[str]:
+    """Return the first n lines of content, scanning only up to the nth newline.
+
+    Equivalent to content.splitlines()[:n] for "\\n" and "\\r\\n" line endings,
+    without splitting the rest of a potentially huge string.
+    """
+    lines: list[str] = []
+    start = 0
+    while len(lines) < n and start < len(content):
+        end = content.find("\n", start)
+        if end == -1:
+            lines.append(content[start:])
+            break
+        lines.append(content[start:end].removesuffix("\r"))
+        start = end + 1
+    return lines
+
+
 def check_empty_content(content: str) -> str | None:
     """Check if content is empty and return warning message.
     
@@ -207,15 +307,61 @@ def perform_string_replacement(
         Tuple of (new_content, occurrences) on success, or error message string
     """
     occurrences = content.count(old_string)
+    error = check_replacement_occurrences(old_string, occurrences, replace_all)
+    if error:
+        return error
+    
+    new_content = content.replace(old_string, new_string)
+    return new_content, occurrences
+
+
+def perform_string_replacements(
+    content: str,
+    edits: Sequence[tuple[str, str, bool]],
+) -> tuple[str, list[int]] | str:
+    """Apply an ordered list of replacements in memory, all or nothing.
+
+    Each edit sees the result of the previous ones and is validated with the
+    same rules as a single edit.
+
+    Args:
+        content: Original content
+        edits: (old_string, new_string, replace_all) tuples, applied in order
+
+    Returns:
+        Tuple of (new_content, occurrences per edit) on success, or an error
+        message naming the first failing edit
+    """
+    if not edits:
+        return "Error: No edits provided"
+    counts: list[int] = []
+    for i, (old_string, new_string, replace_all) in enumerate(edits, 1):
+        result = perform_string_replacement(content, old_string, new_string, replace_all)
+        if isinstance(result, str):
+            detail = result.removeprefix("Error: ")
+            return f"Error: Edit {i} of {len(edits)} failed, no changes were made. {detail}"
+        content, occurrences = result
+        counts.append(occurrences)
+    return content, counts
+
+
+def check_replacement_occurrences(old_string: str, occurrences: int, replace_all: bool) -> str | None:
+    """Validate an occurrence count against the uniqueness/replace_all rules.
+    
+    Args:
+        old_string: String being replaced
+        occurrences: Number of occurrences found in the file
+        replace_all: Whether all occurrences may be replaced
     
+    Returns:
+        Error message if the replacement must not proceed, None otherwise
+    """
     if occurrences == 0:
         return f"Error: String not found in file: '{old_string}'"
     
     if occurrences > 1 and not replace_all:
         return f"Error: String '{old_string}' appears {occurrences} times in file. Use replace_all=True to replace all instances, or provide a more specific string with surrounding context."
-    
-    new_content = content.replace(old_string, new_string)
-    return new_content, occurrences
+    return None
 
 
 def truncate_if_too_long(result: list[str] | str) -> list[str] | str:
@@ -255,6 +401,32 @@ def _validate_path(path: str | None) -> str:
     return normalized
 
 
+def tree_paths(path: str, file_paths: Iterable[str], depth: int, max_entries: int) -> list[str]:
+    """Return the first max_entries tree entries under path, from a flat list of file paths.
+
+    For backends that can enumerate every file below a prefix in one scan.
+    Directories down to depth levels are derived from the file paths and
+    carry a trailing /. Sorting by path gives depth-first listing order.
+
+    Args:
+        path: Absolute directory path.
+        file_paths: Absolute file paths; those outside path are ignored.
+        depth: Number of levels to include (1 lists direct children only).
+        max_entries: Maximum number of entries to return.
+    """
+    prefix = path if path.endswith("/") else path + "/"
+    entries: set[str] = set()
+    for file_path in file_paths:
+        if not file_path.startswith(prefix):
+            continue
+        parts = file_path[len(prefix):].split("/")
+        for level in range(1, min(len(parts), depth + 1)):
+            entries.add(prefix + "/".join(parts[:level]) + "/")
+        if len(parts) <= depth:
+            entries.add(file_path)
+    return heapq.nsmallest(max_entries, entries)
+
+
 def _glob_search_files(
     files: dict[str, Any],
     pattern: str,
@@ -399,6 +571,10 @@ def grep_matches_from_files(
     pattern: str,
     path: str | None = None,
     glob: str | None = None,
+    *,
+    before: int = 0,
+    after: int = 0,
+    output_mode: GrepOutputMode = "content",
 ) -> list[GrepMatch] | str:
     """Return structured grep matches from an in-memory files mapping.
 
@@ -427,12 +603,153 @@ def grep_matches_from_files(
 
     matches: list[GrepMatch] = []
     for file_path, file_data in filtered.items():
-        for line_num, line in enumerate(file_data["content"], 1):
-            if regex.search(line):
-                matches.append({"path": file_path, "line": int(line_num), "text": line})
+        matches.extend(
+            grep_file(file_path, file_data["content"], regex, before=before, after=after, output_mode=output_mode)
+        )
     return matches
 
 
+def grep_lines(
+    file_path: str,
+    lines: Iterable[str],
+    regex: re.Pattern[str],
+    *,
+    before: int = 0,
+    after: int = 0,
+    start: int = 1,
+) -> Iterator[GrepMatch]:
+    """Yield matches of regex in lines, with up to before/after context lines each.
+
+    Lines are consumed lazily; a match is yielded once its trailing context is
+    complete, so callers can stop early.
+    """
+    window: deque[str] = deque(maxlen=before)
+    pending: GrepMatch | None = None
+    for line_num, line in enumerate(lines, start):
+        if regex.search(line):
+            if pending is not None:
+                yield pending
+                pending = None
+            match: GrepMatch = {"path": file_path, "line": line_num, "text": line}
+            if before:
+                match["context_before"] = list(window)
+                window.clear()
+            if after:
+                match["context_after"] = []
+                pending = match
+            else:
+                yield match
+            continue
+        if pending is not None:
+            pending["context_after"].append(line)
+            if len(pending["context_after"]) >= after:
+                yield pending
+                pending = None
+        window.append(line)
+    if pending is not None:
+        yield pending
+
+
+def grep_options(before: int = 0, after: int = 0, output_mode: GrepOutputMode = "content") -> dict[str, Any]:
+    """Keyword arguments for grep_raw, omitting defaults for backends that do not take them."""
+    options: dict[str, Any] = {name: value for name, value in (("before", before), ("after", after)) if value}
+    if output_mode != "content":
+        options["output_mode"] = output_mode
+    return options
+
+
+def grep_file(
+    file_path: str,
+    lines: Iterable[str],
+    regex: re.Pattern[str],
+    *,
+    before: int = 0,
+    after: int = 0,
+    output_mode: GrepOutputMode = "content",
+    skip_through: int = 0,
+) -> Iterator[GrepMatch]:
+    """Yield one file's grep entries for the given output mode.
+
+    files_with_matches stops reading at the first hit and count mode only
+    counts, so neither keeps line text. Entries at or before line
+    skip_through are left out; in the per-file modes any skip_through means
+    the file was already reported.
+    """
+    if output_mode == "content":
+        for match in grep_lines(file_path, lines, regex, before=before, after=after):
+            if match["line"] > skip_through:
+                yield match
+        return
+    if skip_through:
+        return
+    if output_mode == "files_with_matches":
+        if any(regex.search(line) for line in lines):
+            yield {"path": file_path, "line": 0, "text": ""}
+        return
+    count = sum(1 for line in lines if regex.search(line))
+    if count:
+        yield {"path": file_path, "line": 0, "text": "", "count": count}
+
+
+def attach_grep_context(
+    matches: Sequence[GrepMatch],
+    lines: dict[int, str],
+    *,
+    before: int = 0,
+    after: int = 0,
+) -> None:
+    """Fill context_before/context_after of one file's matches from known line texts.
+
+    For backends whose search engine reports context lines separately (e.g.
+    ripgrep). Context stops at other matches and at lines missing from lines.
+    """
+    matched = {m["line"] for m in matches}
+    for m in matches:
+        if before:
+            ctx: list[str] = []
+            n = m["line"] - 1
+            while len(ctx) < before and n in lines and n not in matched:
+                ctx.insert(0, lines[n])
+                n -= 1
+            m["context_before"] = ctx
+        if after:
+            ctx = []
+            n = m["line"] + 1
+            while len(ctx) < after and n in lines and n not in matched:
+                ctx.append(lines[n])
+                n += 1
+            m["context_after"] = ctx
+
+
+def format_grep_match_lines(match: GrepMatch, last_line: int | None) -> tuple[list[str], int]:
+    """Render one match with its context in content-mode format.
+
+    Matching lines are shown as "  N: text" and context lines as "  N- text".
+    Context already shown for the previous match in the same file is skipped,
+    and "  --" separates windows that do not touch.
+
+    Args:
+        match: Match to render.
+        last_line: Last line number already rendered for this file, or None.
+
+    Returns:
+        The rendered lines and the new last rendered line number.
+    """
+    line = match["line"]
+    before = match.get("context_before", [])
+    after = match.get("context_after", [])
+    out: list[str] = []
+    first = line - len(before)
+    if last_line is not None and first > last_line + 1 and ("context_before" in match or "context_after" in match):
+        out.append("  --")
+    for n, text in enumerate(before, first):
+        if last_line is None or n > last_line:
+            out.append(f"  {n}- {text}")
+    out.append(f"  {line}: {match['text']}")
+    out.extend(f"  {n}- {text}" for n, text in enumerate(after, line + 1))
+    return out, line + len(after)
+
+
 def build_grep_results_dict(matches: List[GrepMatch]) -> Dict[str, list[tuple[int, str]]]:
     """Group structured matches into the legacy dict form used by formatters."""
     grouped: Dict[str, list[tuple[int, str]]] = {}
@@ -448,4 +765,25 @@ def format_grep_matches(
     """Format structured grep matches using existing formatting logic."""
     if not matches:
         return "No matches found"
+    if output_mode != "content":
+        grouped = _group_by_path(matches)
+        if output_mode == "files_with_matches":
+            return "\n".join(file_path for file_path, _ in grouped)
+        return "\n".join(f"{file_path}: {sum(m.get('count', 1) for m in group)}" for file_path, group in grouped)
+    if any("context_before" in m or "context_after" in m for m in matches):
+        lines: list[str] = []
+        for file_path, group in _group_by_path(matches):
+            lines.append(f"{file_path}:")
+            last_line: int | None = None
+            for m in group:
+                rendered, last_line = format_grep_match_lines(m, last_line)
+                lines.extend(rendered)
+        return "\n".join(lines)
     return _format_grep_results(build_grep_results_dict(matches), output_mode)
+
+
+def _group_by_path(matches: Sequence[GrepMatch]) -> list[tuple[str, list[GrepMatch]]]:
+    grouped: Dict[str, list[GrepMatch]] = {}
+    for m in matches:
+        grouped.setdefault(m["path"], []).append(m)
+    return [(path, grouped[path]) for path in sorted(grouped)]
@@ -0,0 +1,190 @@
+"""Process-wide memoization of agent graph factories.
+
+LangGraph servers call the factory of a graph (e.g. ``mcp_agent_grok_fast.py:agent``)
+for every run. Building a deep agent means creating the model, the middleware
+stack and compiling the graph, which is wasted work when nothing changed since
+the previous run. cached_agent_factory builds each graph once per process and
+configuration key, and rebuilds it when the key changes or the cache is
+invalidated.
+"""
+
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, TypeVar
+
+from langchain_core.tools import BaseTool
+
+from deepagents.backends.utils import CacheStats
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class FactoryCacheStats(CacheStats):
+    """Counters for an agent factory cache.
+
+    Attributes:
+        build_seconds: Total time spent building graphs on misses.
+        saved_seconds: Estimated build time avoided by hits (average build time per hit).
+        last_saved_seconds: Estimated build time avoided by the most recent call (0.0 on a miss).
+    """
+
+    build_seconds: float = 0.0
+    saved_seconds: float = 0.0
+    last_saved_seconds: float = 0.0
+
+    @property
+    def average_build_seconds(self) -> float:
+        """Mean time to build a graph (0.0 before the first build)."""
+        return self.build_seconds / self.misses if self.misses else 0.0
+
+
+def tools_fingerprint(tools: Sequence[BaseTool | Callable | dict[str, Any]]) -> str:
+    """Return a digest of tool names, descriptions and argument schemas.
+
+    Use it as (part of) a factory cache key so the cached graph is rebuilt
+    when the set of tools exposed by MCP servers changes. The tools must come
+    from a fresh listing: a fingerprint of tools the caller keeps for the whole
+    process never changes.
+    """
+    described: list[Any] = []
+    for tool in tools:
+        if isinstance(tool, BaseTool):
+            described.append([tool.name, tool.description, tool.args])
+        elif isinstance(tool, dict):
+            described.append(tool)
+        else:
+            described.append([getattr(tool, "__qualname__", repr(tool)), getattr(tool, "__doc__", None)])
+    payload = json.dumps(sorted(described, key=lambda d: json.dumps(d, sort_keys=True, default=str)), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AgentFactoryCache:
+    """LRU of built agent graphs keyed by configuration.
+
+    Builds run outside the lock, so two concurrent misses on the same key may
+    both build; the later result replaces the earlier one.
+
+    Args:
+        max_entries: Maximum number of graphs kept before evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 8) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of cached graphs.
+        """
+        self.max_entries = max_entries
+        self.stats = FactoryCacheStats()
+        self._graphs: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def lookup(self, key: Hashable) -> Any | None:
+        """Return the graph cached under key, or None, updating the hit/miss counters."""
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                self.stats.misses += 1
+                self.stats.last_saved_seconds = 0.0
+                return None
+            self._graphs.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.last_saved_seconds = self.stats.average_build_seconds
+            self.stats.saved_seconds += self.stats.last_saved_seconds
+            return graph
+
+    def store(self, key: Hashable, graph: Any, build_seconds: float) -> None:
+        """Cache a freshly built graph and record how long it took to build."""
+        with self._lock:
+            self.stats.build_seconds += build_seconds
+            self._graphs[key] = graph
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_entries:
+                self._graphs.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop the graph cached under key, or every graph when key is None."""
+        with self._lock:
+            if key is None:
+                self.stats.invalidations += len(self._graphs)
+                self._graphs.clear()
+            elif self._graphs.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+
+def cached_agent_factory(
+    key: Callable[..., Hashable | Awaitable[Hashable]] | None = None,
+    *,
+    max_entries: int = 8,
+) -> Callable[[F], F]:
+    """Decorate a sync or async agent factory so each graph is built once per process and key.
+
+    The key function receives the factory's arguments and may be async if the
+    factory is. When it is None every call shares one graph. The decorated
+    factory exposes the cache as `.cache`, so `agent.cache.invalidate()` forces
+    a rebuild and `agent.cache.stats` reports hits, build time and time saved.
+
+    Args:
+        key: Computes the configuration key of a call, e.g. a tools_fingerprint of the MCP tools.
+        max_entries: Maximum number of graphs kept for this factory.
+
+    Example:
+        ```python
+        async def tool_set() -> str:
+            # List the tools again; a process-wide tool list would give a constant key
+            return tools_fingerprint(await mcp_client.get_tools())
+
+
+        @cached_agent_factory(key=tool_set)
+        async def agent():
+            tools = await mcp_client.get_tools()
+            return create_deep_agent(model=ChatXAI(model="grok-4"), tools=tools)
+        ```
+    """
+
+    def decorate(factory: F) -> F:
+        cache = AgentFactoryCache(max_entries=max_entries)
+
+        if inspect.iscoroutinefunction(factory):
+
+            @wraps(factory)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                cache_key = key(*args, **kwargs) if key is not None else None
+                if inspect.isawaitable(cache_key):
+                    cache_key = await cache_key
+                graph = cache.lookup(cache_key)
+                if graph is None:
+                    started = time.perf_counter()
+                    graph = await factory(*args, **kwargs)
+                    cache.store(cache_key, graph, time.perf_counter() - started)
+                return graph
+
+            async_wrapper.cache = cache  # type: ignore[attr-defined]
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(factory)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            cache_key = key(*args, **kwargs) if key is not None else None
+            graph = cache.lookup(cache_key)
+            if graph is None:
+                started = time.perf_counter()
+                graph = factory(*args, **kwargs)
+                cache.store(cache_key, graph, time.perf_counter() - started)
+            return graph
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
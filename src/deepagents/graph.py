@@ -1,5 +1,7 @@
 """Deepagents come with planning, filesystem, and subagents."""
 
+import threading
+from collections import OrderedDict
 from collections.abc import Callable, Sequence
 from typing import Any
 
@@ -20,7 +22,8 @@ from langgraph.types import Checkpointer
 from deepagents.backends.protocol import BackendProtocol, BackendFactory
 from deepagents.middleware.filesystem import FilesystemMiddleware
 from deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
-from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentMiddleware
+from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentMiddleware, _model_key
+from deepagents.middleware.token_accounting import MessageTokenCounter, TokenAccountingMiddleware
 
 BASE_AGENT_PROMPT = "In order to complete the objective that the user asks of you, you have access to a number of standard tools."
 
@@ -37,6 +40,50 @@ def get_default_model() -> ChatAnthropic:
     )
 
 
+# Default subagent middleware per model configuration, reused across create_deep_agent
+# calls; the token counter they share keeps its per-message counts between calls
+_SUBAGENT_STACK_CACHE_SIZE = 16
+_subagent_stacks: OrderedDict[Any, tuple[MessageTokenCounter, list[AgentMiddleware]]] = OrderedDict()
+_subagent_stacks_lock = threading.Lock()
+
+
+def _build_subagent_stack(
+    model: str | BaseChatModel, backend: BackendProtocol | BackendFactory | None
+) -> tuple[MessageTokenCounter, list[AgentMiddleware]]:
+    # Shared so each message is measured once, not on every summarization check;
+    # tuned per model like SummarizationMiddleware's default counter
+    token_counter = MessageTokenCounter.for_model(model)
+    return token_counter, [
+        TodoListMiddleware(),
+        FilesystemMiddleware(backend=backend),
+        TokenAccountingMiddleware(token_counter),
+        SummarizationMiddleware(
+            model=model,
+            max_tokens_before_summary=170000,
+            messages_to_keep=6,
+            token_counter=token_counter,
+        ),
+        AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
+        PatchToolCallsMiddleware(),
+    ]
+
+
+def _shared_subagent_stack(model: str | BaseChatModel) -> tuple[MessageTokenCounter, list[AgentMiddleware]]:
+    """Return the default-backend subagent middleware for model, built once per model configuration."""
+    key = _model_key(model)
+    with _subagent_stacks_lock:
+        stack = _subagent_stacks.get(key)
+        if stack is not None:
+            _subagent_stacks.move_to_end(key)
+            return stack
+    stack = _build_subagent_stack(model, None)
+    with _subagent_stacks_lock:
+        stack = _subagent_stacks.setdefault(key, stack)
+        while len(_subagent_stacks) > _SUBAGENT_STACK_CACHE_SIZE:
+            _subagent_stacks.popitem(last=False)
+    return stack
+
+
 def create_deep_agent(
     model: str | BaseChatModel | None = None,
     tools: Sequence[BaseTool | Callable | dict[str, Any]] | None = None,
@@ -57,7 +104,7 @@ def create_deep_agent(
     """Create a deep agent.
 
     This agent will by default have access to a tool to write todos (write_todos),
-    six file editing tools: write_file, ls, read_file, edit_file, glob_search, grep_search,
+    file tools: write_file, ls, read_file, read_files, edit_file, multi_edit, glob, grep,
     and a tool to call subagents.
 
     Args:
@@ -94,31 +141,33 @@ def create_deep_agent(
     if model is None:
         model = get_default_model()
 
+    subagents = subagents if subagents is not None else []
+    # Compiled subagent graphs are reused across calls only with the default backend,
+    # whose subagent middleware is shared per model configuration. Graphs built with
+    # a custom backend or subagent-specific middleware are compiled on every call.
+    cache_subagents = backend is None and not any("middleware" in spec for spec in subagents)
+    if cache_subagents:
+        token_counter, subagent_middleware = _shared_subagent_stack(model)
+    else:
+        token_counter, subagent_middleware = _build_subagent_stack(model, backend)
     deepagent_middleware = [
         TodoListMiddleware(),
         FilesystemMiddleware(backend=backend),
         SubAgentMiddleware(
             default_model=model,
             default_tools=tools,
-            subagents=subagents if subagents is not None else [],
-            default_middleware=[
-                TodoListMiddleware(),
-                FilesystemMiddleware(backend=backend),
-                SummarizationMiddleware(
-                    model=model,
-                    max_tokens_before_summary=170000,
-                    messages_to_keep=6,
-                ),
-                AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
-                PatchToolCallsMiddleware(),
-            ],
+            subagents=subagents,
+            default_middleware=subagent_middleware,
             default_interrupt_on=interrupt_on,
             general_purpose_agent=True,
+            cache_subagents=cache_subagents,
         ),
+        TokenAccountingMiddleware(token_counter),
         SummarizationMiddleware(
             model=model,
             max_tokens_before_summary=170000,
             messages_to_keep=6,
+            token_counter=token_counter,
         ),
         AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
         PatchToolCallsMiddleware(),
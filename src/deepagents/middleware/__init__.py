@@ -2,5 +2,15 @@
 
 from deepagents.middleware.filesystem import FilesystemMiddleware
 from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentMiddleware
+from deepagents.middleware.token_accounting import MessageTokenCounter, TokenAccountingMiddleware
+from deepagents.middleware.tool_result_aging import ToolResultAgingMiddleware
 
-__all__ = ["CompiledSubAgent", "FilesystemMiddleware", "SubAgent", "SubAgentMiddleware"]
+__all__ = [
+    "CompiledSubAgent",
+    "FilesystemMiddleware",
+    "MessageTokenCounter",
+    "SubAgent",
+    "SubAgentMiddleware",
+    "TokenAccountingMiddleware",
+    "ToolResultAgingMiddleware",
+]
@@ -1,8 +1,15 @@
 """Middleware for providing filesystem tools to an agent."""
 # ruff: noqa: E501
 
-from collections.abc import Awaitable, Callable, Sequence
-from typing import Annotated
+import base64
+import contextvars
+import hashlib
+import json
+import sys
+import threading
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Annotated, Any
 from typing_extensions import NotRequired
 
 import os
@@ -16,17 +23,39 @@ from langchain.agents.middleware.types import (
 )
 from langchain.tools import ToolRuntime
 from langchain.tools.tool_node import ToolCallRequest
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AnyMessage, ToolMessage
 from langchain_core.tools import BaseTool, tool
+from langgraph.config import get_config
+from langgraph.runtime import Runtime
 from langgraph.types import Command
 from typing_extensions import TypedDict
 
-from deepagents.backends.protocol import BackendProtocol, BackendFactory, WriteResult, EditResult
-from deepagents.backends import StateBackend
+from deepagents.backends.protocol import (
+    BackendFactory,
+    BackendProtocol,
+    EditResult,
+    SupportsGlobPage,
+    SupportsGrepPage,
+    SupportsReadMany,
+    WriteResult,
+    apply_edits,
+    list_tree,
+    paginate_glob,
+    paginate_grep,
+)
+from deepagents.backends import CompositeBackend, StateBackend
+from deepagents.backends.instance_cache import BackendInstanceCache, thread_id_of
+from deepagents.backends.spill import ToolResultSpill
 from deepagents.backends.utils import (
+    TOOL_RESULT_TOKEN_LIMIT,
+    FileInfo,
+    GrepMatch,
+    GrepOutputMode,
+    format_grep_match_lines,
+    get_fanout_executor,
     update_file_data,
     format_content_with_line_numbers,
-    format_grep_matches,
+    head_lines,
     truncate_if_too_long,
     sanitize_tool_call_id,
 )
@@ -36,6 +65,19 @@ MAX_LINE_LENGTH = 2000
 LINE_NUMBER_WIDTH = 6
 DEFAULT_READ_OFFSET = 0
 DEFAULT_READ_LIMIT = 2000
+UNCHANGED_READ_MSG = (
+    "File '{file_path}' (offset {offset}, limit {limit}) is unchanged since your last read {when}. "
+    "Refer to that result, or call read_file with force=True to read it again."
+)
+# Combined output size of one read_files call (rough estimate: 4 chars/token)
+READ_FILES_CHAR_BUDGET = TOOL_RESULT_TOKEN_LIMIT * 4
+# Output size of one ls/glob/grep page, and matches fetched per backend page call
+SEARCH_PAGE_CHAR_BUDGET = TOOL_RESULT_TOKEN_LIMIT * 4
+BACKEND_PAGE_SIZE = 500
+MORE_RESULTS_MSG = '... [more results: call {tool} again with the same arguments and cursor="{cursor}" to continue]'
+INVALID_CURSOR_MSG = "Error: cursor does not belong to this {tool} query. Repeat the call with the original arguments, or omit cursor to start over."
+TREE_MAX_ENTRIES = 1000
+TREE_TRUNCATED_MSG = "... [listing truncated after {shown} entries: list a subdirectory or use a smaller depth to see the rest]"
 BACKEND_TYPES = (
     BackendProtocol
     | BackendFactory
@@ -135,12 +177,41 @@ def _validate_path(path: str, *, allowed_prefixes: Sequence[str] | None = None)
 
     return normalized
 
+class ReadFileRequest(TypedDict):
+    """One file to read with the read_files tool."""
+
+    file_path: str
+    """Absolute path of the file."""
+
+    offset: NotRequired[int]
+    """Line offset to start reading from (0-indexed)."""
+
+    limit: NotRequired[int]
+    """Maximum number of lines to read."""
+
+
+class StringEdit(TypedDict):
+    """One replacement applied by the multi_edit tool."""
+
+    old_string: str
+    """Exact text to replace."""
+
+    new_string: str
+    """Replacement text."""
+
+    replace_all: NotRequired[bool]
+    """Replace every occurrence instead of requiring a unique match."""
+
+
 class FilesystemState(AgentState):
     """State for the filesystem middleware."""
 
     files: Annotated[NotRequired[dict[str, FileData]], _file_data_reducer]
     """Files in the filesystem."""
 
+    base_files: NotRequired[dict[str, FileData]]
+    """Read-only files shared by a parent agent; entries in `files` take precedence."""
+
 
 LIST_FILES_TOOL_DESCRIPTION = """Lists all files in the filesystem, filtering by directory.
 
@@ -148,7 +219,10 @@ Usage:
 - The path parameter must be an absolute path, not a relative path
 - The list_files tool will return a list of all files in the specified directory.
 - This is very useful for exploring the file system and finding the right file to read or edit.
-- You should almost ALWAYS use this tool before using the Read or Edit tools."""
+- You should almost ALWAYS use this tool before using the Read or Edit tools.
+- Large listings are returned in pages; pass the cursor from the last entry to get the next page.
+- Set depth above 1 to list several levels at once as an indented tree (directories end with /), e.g. `ls(path="/src", depth=3)`. This saves a call per subdirectory when exploring an unfamiliar layout.
+- Tree listings stop after max_entries entries (default 1000) and do not take a cursor; list a subdirectory to see more."""
 
 READ_FILE_TOOL_DESCRIPTION = """Reads a file from the filesystem. You can access any file directly by using this tool.
 Assume this tool is able to read all files on the machine. If the User provides a path to a file assume that path is valid. It is okay to read a file that does not exist; an error will be returned.
@@ -161,8 +235,17 @@ Usage:
 - Results are returned using cat -n format, with line numbers starting at 1
 - You have the capability to call multiple tools in a single response. It is always better to speculatively read multiple files as a batch that are potentially useful.
 - If you read a file that exists but has empty contents you will receive a system reminder warning in place of file contents.
+- If the same lines were already returned earlier in this conversation and the file has not changed since, a short notice is returned instead; set force to true to get the content again.
 - You should ALWAYS make sure a file has been read before editing it."""
 
+READ_FILES_TOOL_DESCRIPTION = """Reads several files from the filesystem in one call.
+
+Usage:
+- Prefer this over several read_file calls when you already know which files you need
+- The files parameter is a list of objects with a file_path (absolute path) and optional offset and limit, with the same meaning as in read_file
+- Each file's content is preceded by a `==> /path <==` header and uses the same cat -n format as read_file
+- The combined output is capped; files that do not fit are listed at the end so you can read them separately with read_file or a narrower offset/limit"""
+
 EDIT_FILE_TOOL_DESCRIPTION = """Performs exact string replacements in files.
 
 Usage:
@@ -173,6 +256,15 @@ Usage:
 - The edit will FAIL if `old_string` is not unique in the file. Either provide a larger string with more surrounding context to make it unique or use `replace_all` to change every instance of `old_string`.
 - Use `replace_all` for replacing and renaming strings across the file. This parameter is useful if you want to rename a variable for instance."""
 
+MULTI_EDIT_TOOL_DESCRIPTION = """Performs several exact string replacements in one file in a single operation.
+
+Usage:
+- Prefer this over several edit_file calls when changing more than one spot in the same file
+- The edits parameter is a list of objects with old_string, new_string and optional replace_all, with the same meaning as in edit_file
+- Edits are applied in order, each to the result of the previous one, so an old_string must match the file as it is after the earlier edits
+- The operation is atomic: if any edit fails (old_string not found, or not unique without replace_all), none of the edits are applied
+- The same rules as edit_file apply: read the file first and preserve exact indentation"""
+
 
 WRITE_FILE_TOOL_DESCRIPTION = """Writes to a new file in the filesystem.
 
@@ -190,6 +282,7 @@ Usage:
 - Supports standard glob patterns: `*` (any characters), `**` (any directories), `?` (single character)
 - Patterns can be absolute (starting with `/`) or relative
 - Returns a list of absolute file paths that match the pattern
+- Large results are returned in pages; pass the cursor from the last entry, with the same pattern and path, to get the next page
 
 Examples:
 - `**/*.py` - Find all Python files
@@ -207,21 +300,26 @@ Usage:
   - `files_with_matches`: List only file paths containing matches (default)
   - `content`: Show matching lines with file path and line numbers
   - `count`: Show count of matches per file
+- In `content` mode, `before` and `after` add that many lines of context around each match (like grep -B/-A). Context lines are shown as `N- text`, matching lines as `N: text`, and `--` separates non-adjacent regions. Prefer this over a follow-up read_file around each hit
+- Large results are returned in pages; pass the cursor from the end of the output, with the same other arguments, to continue where the previous page stopped instead of rerunning the search
 
 Examples:
 - Search all files: `grep(pattern="TODO")`
 - Search Python files only: `grep(pattern="import", glob="*.py")`
-- Show matching lines: `grep(pattern="error", output_mode="content")`"""
+- Show matching lines: `grep(pattern="error", output_mode="content")`
+- Show matches with surrounding code: `grep(pattern="def main", output_mode="content", before=2, after=10)`"""
 
-FILESYSTEM_SYSTEM_PROMPT = """## Filesystem Tools `ls`, `read_file`, `write_file`, `edit_file`, `glob`, `grep`
+FILESYSTEM_SYSTEM_PROMPT = """## Filesystem Tools `ls`, `read_file`, `read_files`, `write_file`, `edit_file`, `multi_edit`, `glob`, `grep`
 
 You have access to a filesystem which you can interact with using these tools.
 All file paths must start with a /.
 
 - ls: list files in a directory (requires absolute path)
 - read_file: read a file from the filesystem
+- read_files: read several files at once
 - write_file: write to a file in the filesystem
 - edit_file: edit a file in the filesystem
+- multi_edit: apply several edits to one file at once
 - glob: find files matching a pattern (e.g., "**/*.py")
 - grep: search for text within files"""
 
@@ -241,6 +339,160 @@ def _get_backend(backend: BACKEND_TYPES, runtime: ToolRuntime) -> BackendProtoco
     return backend
 
 
+def _consume_backend_notes(backend: BackendProtocol) -> list[str]:
+    """Collect notes (e.g. skipped routes) a backend recorded for its last call."""
+    consume_notes = getattr(backend, "consume_notes", None)
+    if not callable(consume_notes):
+        return []
+    return list(consume_notes())
+
+
+def _encode_cursor(query: list[Any], position: Any) -> str:
+    """Encode a resume position, bound to the query that produced it, as an opaque token."""
+    digest = hashlib.sha256(json.dumps(query).encode("utf-8")).hexdigest()[:12]
+    payload = json.dumps({"q": digest, "a": position}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, query: list[Any]) -> Any:
+    """Return the resume position in cursor, or None if it is malformed or from another query."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("q") != hashlib.sha256(json.dumps(query).encode("utf-8")).hexdigest()[:12]:
+        return None
+    return payload.get("a")
+
+
+def _take_page(entries: Iterable[str]) -> tuple[list[str], str | None]:
+    """Take entries until SEARCH_PAGE_CHAR_BUDGET is used up.
+
+    Returns:
+        The page and the last entry on it if more entries remain, else None.
+    """
+    page: list[str] = []
+    used = 0
+    for entry in entries:
+        if page and used + len(entry) > SEARCH_PAGE_CHAR_BUDGET:
+            return page, page[-1]
+        page.append(entry)
+        used += len(entry)
+    return page, None
+
+
+def _format_tree(path: str, infos: list[FileInfo], max_entries: int) -> str:
+    """Render a tree listing as names indented by level, within SEARCH_PAGE_CHAR_BUDGET.
+
+    infos holds up to max_entries + 1 entries; an extra entry means the
+    backend stopped early and the listing is marked as truncated.
+    """
+    if not infos:
+        return "No files found"
+    root = path if path.endswith("/") else path + "/"
+    rendered: list[str] = []
+    for fi in infos[:max_entries]:
+        entry = fi.get("path", "")
+        if not entry.startswith(root):
+            rendered.append(entry)
+            continue
+        parts = entry[len(root):].rstrip("/").split("/")
+        rendered.append("  " * len(parts) + parts[-1] + ("/" if fi.get("is_dir") else ""))
+    lines, cut = _take_page(rendered)
+    if cut is not None or len(infos) > max_entries:
+        lines.append(TREE_TRUNCATED_MSG.format(shown=len(lines)))
+    return "\n".join([root, *lines])
+
+
+def _grep_match_stream(
+    backend: BackendProtocol,
+    pattern: str,
+    path: str | None,
+    glob: str | None,
+    start_after: tuple[str, int] | None,
+    before: int = 0,
+    after: int = 0,
+    output_mode: GrepOutputMode = "content",
+) -> Iterator[GrepMatch] | str:
+    """Stream matches in (path, line) order after a position, fetching pages lazily.
+
+    Backends without native paging are searched once and the result is sorted.
+    In the per-file modes each entry stands for a whole file, so the next page
+    resumes after that file rather than after its line.
+    """
+    limit = BACKEND_PAGE_SIZE if isinstance(backend, SupportsGrepPage) else sys.maxsize
+    context = {"before": before, "after": after, "output_mode": output_mode}
+    first = paginate_grep(backend, pattern, path, glob, start_after=start_after, limit=limit, **context)
+    if isinstance(first, str):
+        return first
+
+    def stream(page: list[GrepMatch]) -> Iterator[GrepMatch]:
+        while True:
+            yield from page
+            if len(page) < limit:
+                return
+            last = page[-1]
+            position = (last["path"], last["line"] if output_mode == "content" else sys.maxsize)
+            next_page = paginate_grep(backend, pattern, path, glob, start_after=position, limit=limit, **context)
+            if isinstance(next_page, str):
+                return
+            page = next_page
+
+    return stream(first)
+
+
+def _format_grep_page(
+    matches: Iterator[GrepMatch],
+    output_mode: Literal["files_with_matches", "content", "count"],
+) -> tuple[str, tuple[str, int] | None]:
+    """Format matches until SEARCH_PAGE_CHAR_BUDGET is used up.
+
+    Output matches format_grep_matches. files_with_matches and count pages
+    only end at file boundaries, so per-file counts are never split.
+
+    Returns:
+        The formatted page and the position to resume after, or None when done.
+    """
+    lines: list[str] = []
+    used = 0
+    position: tuple[str, int] | None = None
+    current: str | None = None
+    count = 0
+    last_line: int | None = None
+
+    def emit(text: str, pos: tuple[str, int]) -> bool:
+        nonlocal used, position
+        if lines and used + len(text) + 1 > SEARCH_PAGE_CHAR_BUDGET:
+            return False
+        lines.append(text)
+        used += len(text) + 1
+        position = pos
+        return True
+
+    for m in matches:
+        if output_mode == "content":
+            rendered, next_last_line = format_grep_match_lines(m, last_line if m["path"] == current else None)
+            text = "\n".join(rendered)
+            if m["path"] != current:
+                text = f"{m['path']}:\n{text}"
+            if not emit(text, (m["path"], m["line"])):
+                return "\n".join(lines), position
+            last_line = next_last_line
+        elif m["path"] != current:
+            if output_mode == "files_with_matches":
+                if not emit(m["path"], (m["path"], sys.maxsize)):
+                    return "\n".join(lines), position
+            elif current is not None and not emit(f"{current}: {count}", (current, sys.maxsize)):
+                return "\n".join(lines), position
+            count = 0
+        current = m["path"]
+        count += m.get("count", 1)
+
+    if output_mode == "count" and current is not None and not emit(f"{current}: {count}", (current, sys.maxsize)):
+        return "\n".join(lines), position
+    return ("\n".join(lines) if lines else "No matches found"), None
+
+
 def _ls_tool_generator(
     backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
     custom_description: str | None = None,
@@ -257,44 +509,186 @@ def _ls_tool_generator(
     tool_description = custom_description or LIST_FILES_TOOL_DESCRIPTION
 
     @tool(description=tool_description)
-    def ls(runtime: ToolRuntime[None, FilesystemState], path: str) -> list[str]:
+    def ls(
+        runtime: ToolRuntime[None, FilesystemState],
+        path: str,
+        cursor: str | None = None,
+        depth: int = 1,
+        max_entries: int = TREE_MAX_ENTRIES,
+    ) -> list[str] | str:
         resolved_backend = _get_backend(backend, runtime)
         validated_path = _validate_path(path)
-        infos = resolved_backend.ls_info(validated_path)
-        return [fi.get("path", "") for fi in infos]
+        if depth > 1:
+            max_entries = max(1, max_entries)
+            infos = list_tree(resolved_backend, validated_path, depth, max_entries + 1)
+            return _format_tree(validated_path, infos, max_entries)
+        query = ["ls", validated_path]
+        start_after = _decode_cursor(cursor, query) if cursor else None
+        if cursor and not isinstance(start_after, str):
+            return INVALID_CURSOR_MSG.format(tool="ls")
+        paths = sorted(fi.get("path", "") for fi in resolved_backend.ls_info(validated_path))
+        page, last = _take_page(p for p in paths if start_after is None or p > start_after)
+        if last is not None:
+            page.append(MORE_RESULTS_MSG.format(tool="ls", cursor=_encode_cursor(query, last)))
+        return page
 
     return ls
 
 
+@dataclass
+class UnchangedReadStats:
+    """Counters for read_file calls answered with an "unchanged" notice.
+
+    Attributes:
+        stubs: Reads answered with the notice instead of the file content.
+        tokens_saved: Estimated tokens not resent (rough estimate: 4 chars/token).
+    """
+
+    stubs: int = 0
+    tokens_saved: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, content_chars: int, stub_chars: int) -> None:
+        """Count one notice sent in place of content_chars characters."""
+        with self._lock:
+            self.stubs += 1
+            self.tokens_saved += max(content_chars - stub_chars, 0) // 4
+
+
+def _previous_read(messages: Sequence[AnyMessage], window: list[Any]) -> dict[str, Any] | None:
+    """Return the artifact of the latest full read_file result for window still in messages."""
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage) or message.name != "read_file":
+            continue
+        artifact = message.artifact
+        if isinstance(artifact, dict) and artifact.get("window") == window and not artifact.get("unchanged"):
+            return {**artifact, "tool_call_id": message.tool_call_id}
+    return None
+
+
 def _read_file_tool_generator(
     backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
     custom_description: str | None = None,
+    *,
+    unchanged_read_stats: UnchangedReadStats | None = None,
 ) -> BaseTool:
     """Generate the read_file tool.
 
+    Each successful read records a hash of the returned window in the tool
+    message artifact. Repeating a read whose window is unchanged since an
+    earlier result still present in the conversation returns a short notice
+    instead, unless force is set.
+
     Args:
         backend: Backend to use for file storage, or a factory function that takes runtime and returns a backend.
         custom_description: Optional custom description for the tool.
+        unchanged_read_stats: Counters updated when a notice replaces the content. Detection
+            is disabled when None.
 
     Returns:
         Configured read_file tool that reads files using the backend.
     """
     tool_description = custom_description or READ_FILE_TOOL_DESCRIPTION
 
-    @tool(description=tool_description)
+    @tool(description=tool_description, response_format="content_and_artifact")
     def read_file(
         file_path: str,
         runtime: ToolRuntime[None, FilesystemState],
         offset: int = DEFAULT_READ_OFFSET,
         limit: int = DEFAULT_READ_LIMIT,
-    ) -> str:
+        force: bool = False,
+    ) -> tuple[str, dict[str, Any] | None]:
         resolved_backend = _get_backend(backend, runtime)
         file_path = _validate_path(file_path)
-        return resolved_backend.read(file_path, offset=offset, limit=limit)
+        content = resolved_backend.read(file_path, offset=offset, limit=limit)
+        if unchanged_read_stats is None or content.startswith("Error"):
+            return content, None
+
+        window = [file_path, offset, limit]
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+        step = (getattr(runtime, "config", None) or {}).get("metadata", {}).get("langgraph_step")
+        previous = None if force else _previous_read(runtime.state.get("messages", []), window)
+        if previous is not None and previous.get("sha") == digest:
+            when = f"at step {previous['step']}" if previous.get("step") is not None else f"(tool call {previous['tool_call_id']})"
+            stub = UNCHANGED_READ_MSG.format(file_path=file_path, offset=offset, limit=limit, when=when)
+            unchanged_read_stats.record(len(content), len(stub))
+            return stub, {"window": window, "sha": digest, "unchanged": True}
+        return content, {"window": window, "sha": digest, "step": step}
 
     return read_file
 
 
+def _read_many(backend: BackendProtocol, requests: list[tuple[str, int, int]]) -> list[str]:
+    """Read (file_path, offset, limit) requests, batched or concurrently, in request order."""
+    if isinstance(backend, SupportsReadMany):
+        return list(backend.read_many(requests))
+    if len(requests) <= 1:
+        return [backend.read(path, offset=offset, limit=limit) for path, offset, limit in requests]
+    executor = get_fanout_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, backend.read, path, offset, limit)
+        for path, offset, limit in requests
+    ]
+    return [future.result() for future in futures]
+
+
+def _read_files_tool_generator(
+    backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
+    custom_description: str | None = None,
+) -> BaseTool:
+    """Generate the read_files tool.
+
+    Args:
+        backend: Backend to use for file storage, or a factory function that takes runtime and returns a backend.
+        custom_description: Optional custom description for the tool.
+
+    Returns:
+        Configured read_files tool that reads several files in one call using the backend.
+    """
+    tool_description = custom_description or READ_FILES_TOOL_DESCRIPTION
+
+    @tool(description=tool_description)
+    def read_files(
+        files: list[ReadFileRequest],
+        runtime: ToolRuntime[None, FilesystemState],
+    ) -> str:
+        resolved_backend = _get_backend(backend, runtime)
+        headers: list[str] = []
+        outputs: dict[int, str] = {}
+        requests: list[tuple[str, int, int]] = []
+        request_slots: list[int] = []
+        for i, item in enumerate(files):
+            try:
+                file_path = _validate_path(item["file_path"])
+            except ValueError as e:
+                headers.append(item["file_path"])
+                outputs[i] = f"Error: {e}"
+                continue
+            headers.append(file_path)
+            requests.append((file_path, item.get("offset", DEFAULT_READ_OFFSET), item.get("limit", DEFAULT_READ_LIMIT)))
+            request_slots.append(i)
+        for slot, result in zip(request_slots, _read_many(resolved_backend, requests), strict=True):
+            outputs[slot] = result
+
+        sections: list[str] = []
+        remaining = READ_FILES_CHAR_BUDGET
+        omitted: list[str] = []
+        for i, header in enumerate(headers):
+            section = f"==> {header} <==\n{outputs[i]}"
+            if remaining <= 0:
+                omitted.append(header)
+                continue
+            if len(section) > remaining:
+                section = section[:remaining] + "\n... [truncated, read this file with read_file and a smaller limit]"
+            sections.append(section)
+            remaining -= len(section)
+        if omitted:
+            sections.append("Output limit reached; not included: " + ", ".join(omitted))
+        return "\n\n".join(sections)
+
+    return read_files
+
+
 def _write_file_tool_generator(
     backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
     custom_description: str | None = None,
@@ -381,6 +775,48 @@ def _edit_file_tool_generator(
     return edit_file
 
 
+def _multi_edit_tool_generator(
+    backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
+    custom_description: str | None = None,
+) -> BaseTool:
+    """Generate the multi_edit tool.
+
+    Args:
+        backend: Backend to use for file storage, or a factory function that takes runtime and returns a backend.
+        custom_description: Optional custom description for the tool.
+
+    Returns:
+        Configured multi_edit tool that applies several string replacements to one file using the backend.
+    """
+    tool_description = custom_description or MULTI_EDIT_TOOL_DESCRIPTION
+
+    @tool(description=tool_description)
+    def multi_edit(
+        file_path: str,
+        edits: list[StringEdit],
+        runtime: ToolRuntime[None, FilesystemState],
+    ) -> Command | str:
+        resolved_backend = _get_backend(backend, runtime)
+        file_path = _validate_path(file_path)
+        res: EditResult = apply_edits(
+            resolved_backend,
+            file_path,
+            [(e["old_string"], e["new_string"], e.get("replace_all", False)) for e in edits],
+        )
+        if res.error:
+            return res.error
+        counts = ", ".join(str(c) for c in res.occurrences_per_edit or [])
+        message = f"Successfully applied {len(edits)} edit(s) to '{res.path}' (instances replaced per edit: {counts})"
+        if res.files_update is not None:
+            return Command(update={
+                "files": res.files_update,
+                "messages": [ToolMessage(content=message, tool_call_id=runtime.tool_call_id)],
+            })
+        return message
+
+    return multi_edit
+
+
 def _glob_tool_generator(
     backend: BackendProtocol | Callable[[ToolRuntime], BackendProtocol],
     custom_description: str | None = None,
@@ -397,10 +833,46 @@ def _glob_tool_generator(
     tool_description = custom_description or GLOB_TOOL_DESCRIPTION
 
     @tool(description=tool_description)
-    def glob(pattern: str, runtime: ToolRuntime[None, FilesystemState], path: str = "/") -> list[str]:
+    def glob(
+        pattern: str,
+        runtime: ToolRuntime[None, FilesystemState],
+        path: str = "/",
+        cursor: str | None = None,
+    ) -> list[str] | str | ToolMessage:
         resolved_backend = _get_backend(backend, runtime)
-        infos = resolved_backend.glob_info(pattern, path=path)
-        return [fi.get("path", "") for fi in infos]
+        query = ["glob", pattern, path]
+        start_after = _decode_cursor(cursor, query) if cursor else None
+        if cursor and not isinstance(start_after, str):
+            return INVALID_CURSOR_MSG.format(tool="glob")
+
+        if isinstance(resolved_backend, SupportsGlobPage):
+
+            def stream(start_after: str | None) -> Iterator[str]:
+                while True:
+                    infos = paginate_glob(resolved_backend, pattern, path, start_after=start_after, limit=BACKEND_PAGE_SIZE)
+                    yield from (fi.get("path", "") for fi in infos)
+                    if len(infos) < BACKEND_PAGE_SIZE:
+                        return
+                    start_after = infos[-1].get("path", "")
+
+            page, last = _take_page(stream(start_after))
+        else:
+            paths = [fi.get("path", "") for fi in resolved_backend.glob_info(pattern, path=path)]
+            page, last = _take_page(paths)
+            if start_after is not None or last is not None:
+                # Cursors need a stable order; keep the backend's order when everything fits
+                page, last = _take_page(p for p in sorted(paths) if start_after is None or p > start_after)
+        if last is not None:
+            page.append(MORE_RESULTS_MSG.format(tool="glob", cursor=_encode_cursor(query, last)))
+        notes = _consume_backend_notes(resolved_backend)
+        if notes:
+            # The model must see that results are partial; the artifact keeps the paths apart
+            return ToolMessage(
+                content="\n".join(page) + "\n\n" + "\n".join(notes),
+                artifact={"paths": page, "notes": notes},
+                tool_call_id=runtime.tool_call_id,
+            )
+        return page
 
     return glob
 
@@ -427,13 +899,39 @@ def _grep_tool_generator(
         path: Optional[str] = None,
         glob: str | None = None,
         output_mode: Literal["files_with_matches", "content", "count"] = "files_with_matches",
+        before: int = 0,
+        after: int = 0,
+        cursor: str | None = None,
     ) -> str:
         resolved_backend = _get_backend(backend, runtime)
-        raw = resolved_backend.grep_raw(pattern, path=path, glob=glob)
-        if isinstance(raw, str):
-            return raw
-        formatted = format_grep_matches(raw, output_mode)
-        return truncate_if_too_long(formatted)  # type: ignore[arg-type]
+        if output_mode != "content":
+            before = after = 0
+        before, after = max(0, before), max(0, after)
+        query = ["grep", pattern, path, glob, output_mode, before, after]
+        start_after = _decode_cursor(cursor, query) if cursor else None
+        if cursor and not (isinstance(start_after, list) and len(start_after) == 2):  # noqa: PLR2004
+            return INVALID_CURSOR_MSG.format(tool="grep")
+        matches = _grep_match_stream(
+            resolved_backend,
+            pattern,
+            path,
+            glob,
+            tuple(start_after) if start_after else None,
+            before=before,
+            after=after,
+            output_mode=output_mode,
+        )
+        if isinstance(matches, str):
+            return matches
+        formatted, position = _format_grep_page(matches, output_mode)
+        # A single oversized line can still exceed the budget
+        formatted = truncate_if_too_long(formatted)  # type: ignore[assignment]
+        if position is not None:
+            formatted += "\n" + MORE_RESULTS_MSG.format(tool="grep", cursor=_encode_cursor(query, list(position)))
+        notes = _consume_backend_notes(resolved_backend)
+        if notes:
+            formatted = formatted + "\n" + "\n".join(notes)
+        return formatted
 
     return grep
 
@@ -441,8 +939,10 @@ def _grep_tool_generator(
 TOOL_GENERATORS = {
     "ls": _ls_tool_generator,
     "read_file": _read_file_tool_generator,
+    "read_files": _read_files_tool_generator,
     "write_file": _write_file_tool_generator,
     "edit_file": _edit_file_tool_generator,
+    "multi_edit": _multi_edit_tool_generator,
     "glob": _glob_tool_generator,
     "grep": _grep_tool_generator,
 }
@@ -451,25 +951,32 @@ TOOL_GENERATORS = {
 def _get_filesystem_tools(
     backend: BackendProtocol,
     custom_tool_descriptions: dict[str, str] | None = None,
+    unchanged_read_stats: UnchangedReadStats | None = None,
 ) -> list[BaseTool]:
     """Get filesystem tools.
 
     Args:
         backend: Backend to use for file storage, or a factory function that takes runtime and returns a backend.
         custom_tool_descriptions: Optional custom descriptions for tools.
+        unchanged_read_stats: Enables unchanged-read detection in read_file, recording into these counters.
 
     Returns:
-        List of configured filesystem tools (ls, read_file, write_file, edit_file, glob, grep).
+        List of configured filesystem tools (ls, read_file, read_files, write_file, edit_file, multi_edit, glob, grep).
     """
     if custom_tool_descriptions is None:
         custom_tool_descriptions = {}
     tools = []
     for tool_name, tool_generator in TOOL_GENERATORS.items():
-        tool = tool_generator(backend, custom_tool_descriptions.get(tool_name))
+        if tool_name == "read_file":
+            tool = _read_file_tool_generator(backend, custom_tool_descriptions.get(tool_name), unchanged_read_stats=unchanged_read_stats)
+        else:
+            tool = tool_generator(backend, custom_tool_descriptions.get(tool_name))
         tools.append(tool)
     return tools
 
 
+LARGE_TOOL_RESULTS_PREFIX = "/large_tool_results/"
+
 TOO_LARGE_TOOL_MSG = """Tool result too large, the result of this tool call {tool_call_id} was saved in the filesystem at this path: {file_path}
 You can read the result from the filesystem by using the read_file tool, but make sure to only read part of the result at a time.
 You can do this by specifying an offset and limit in the read_file tool call.
@@ -483,8 +990,8 @@ Here are the first 10 lines of the result:
 class FilesystemMiddleware(AgentMiddleware):
     """Middleware for providing filesystem tools to an agent.
 
-    This middleware adds six filesystem tools to the agent: ls, read_file, write_file,
-    edit_file, glob, and grep. Files can be stored using any backend that implements
+    This middleware adds eight filesystem tools to the agent: ls, read_file, read_files,
+    write_file, edit_file, multi_edit, glob, and grep. Files can be stored using any backend that implements
     the BackendProtocol.
 
     Args:
@@ -494,6 +1001,14 @@ class FilesystemMiddleware(AgentMiddleware):
         system_prompt: Optional custom system prompt override.
         custom_tool_descriptions: Optional custom tool descriptions override.
         tool_token_limit_before_evict: Optional token limit before evicting a tool result to the filesystem.
+        tool_result_spill: Optional spill directory for evicted tool results. When set, they are
+            written to local disk instead of the backend (keeping them out of checkpointed state)
+            and remain readable under /large_tool_results/.
+        backend_reuse: How long a backend built by a factory is reused: "call" builds one per
+            tool call, "run" reuses it until the agent run on the thread ends, and "thread"
+            until release_backends() is called. Requires a thread_id in the run config.
+        skip_unchanged_reads: Answer a repeated read_file of an unchanged window with a short
+            notice instead of the content. Savings are tracked in `unchanged_read_stats`.
 
     Example:
         ```python
@@ -522,6 +1037,9 @@ class FilesystemMiddleware(AgentMiddleware):
         system_prompt: str | None = None,
         custom_tool_descriptions: dict[str, str] | None = None,
         tool_token_limit_before_evict: int | None = 20000,
+        tool_result_spill: ToolResultSpill | None = None,
+        backend_reuse: Literal["call", "run", "thread"] = "run",
+        skip_unchanged_reads: bool = True,
     ) -> None:
         """Initialize the filesystem middleware.
 
@@ -530,16 +1048,42 @@ class FilesystemMiddleware(AgentMiddleware):
             system_prompt: Optional custom system prompt override.
             custom_tool_descriptions: Optional custom tool descriptions override.
             tool_token_limit_before_evict: Optional token limit before evicting a tool result to the filesystem.
+            tool_result_spill: Optional spill directory that receives evicted tool results instead of the backend.
+            backend_reuse: Reuse scope for factory-built backends ("call", "run" or "thread").
+            skip_unchanged_reads: Replace repeated reads of unchanged windows with a short notice.
         """
         self.tool_token_limit_before_evict = tool_token_limit_before_evict
+        self.tool_result_spill = tool_result_spill
 
         # Use provided backend or default to StateBackend factory
         self.backend = backend if backend is not None else (lambda rt: StateBackend(rt))
+        if tool_result_spill is not None:
+            self.backend = self._mount_spill(self.backend, tool_result_spill)
+
+        # Memoize factory-built backends so their caches survive between tool calls
+        self.backend_reuse = backend_reuse
+        self._backend_cache: BackendInstanceCache | None = None
+        if callable(self.backend) and backend_reuse != "call":
+            self._backend_cache = BackendInstanceCache(self.backend)
+            self.backend = self._backend_cache
 
         # Set system prompt (allow full override)
         self.system_prompt = system_prompt if system_prompt is not None else FILESYSTEM_SYSTEM_PROMPT
 
-        self.tools = _get_filesystem_tools(self.backend, custom_tool_descriptions)
+        self.unchanged_read_stats = UnchangedReadStats() if skip_unchanged_reads else None
+        self.tools = _get_filesystem_tools(self.backend, custom_tool_descriptions, self.unchanged_read_stats)
+
+    @staticmethod
+    def _mount_spill(backend: BACKEND_TYPES, spill: ToolResultSpill) -> BackendFactory:
+        """Wrap backend so /large_tool_results/ is served from the spill directory."""
+
+        def factory(runtime: ToolRuntime) -> BackendProtocol:
+            return CompositeBackend(
+                default=_get_backend(backend, runtime),
+                routes={LARGE_TOOL_RESULTS_PREFIX: lambda: spill.backend_for(runtime)},
+            )
+
+        return factory
 
     def _get_backend(self, runtime: ToolRuntime) -> BackendProtocol:
         """Get the resolved backend instance from backend or factory.
@@ -554,6 +1098,52 @@ class FilesystemMiddleware(AgentMiddleware):
             return self.backend(runtime)
         return self.backend
 
+    def release_backends(self, thread_id: str | None = None) -> None:
+        """Drop (and close, if supported) memoized backend instances.
+
+        Args:
+            thread_id: Thread whose backend to release; all threads when None.
+        """
+        if self._backend_cache is None:
+            return
+        if thread_id is None:
+            self._backend_cache.clear()
+        else:
+            self._backend_cache.release(thread_id)
+
+    def _run_thread_id(self) -> str | None:
+        """Thread id of the current run when backends are reused per run."""
+        if self._backend_cache is None or self.backend_reuse != "run":
+            return None
+        try:
+            return thread_id_of(get_config())
+        except RuntimeError:
+            return None
+
+    def before_agent(self, state: FilesystemState, runtime: Runtime) -> None:  # noqa: ARG002
+        """Count the run as a user of its thread's backend instance when backend_reuse is "run"."""
+        thread_id = self._run_thread_id()
+        if thread_id is not None:
+            self._backend_cache.begin_run(thread_id)  # type: ignore[union-attr]
+
+    async def abefore_agent(self, state: FilesystemState, runtime: Runtime) -> None:
+        """(async) Count the run as a user of its thread's backend instance."""
+        self.before_agent(state, runtime)
+
+    def after_agent(self, state: FilesystemState, runtime: Runtime) -> None:  # noqa: ARG002
+        """Release the run's backend instance when backend_reuse is "run".
+
+        Parallel subagents share this middleware and the parent's thread id, so
+        the instance is only released when the last run using it ends.
+        """
+        thread_id = self._run_thread_id()
+        if thread_id is not None:
+            self._backend_cache.end_run(thread_id)  # type: ignore[union-attr]
+
+    async def aafter_agent(self, state: FilesystemState, runtime: Runtime) -> None:
+        """(async) Release the run's backend instance when backend_reuse is "run"."""
+        self.after_agent(state, runtime)
+
     def wrap_model_call(
         self,
         request: ModelRequest,
@@ -594,17 +1184,21 @@ class FilesystemMiddleware(AgentMiddleware):
         self,
         message: ToolMessage,
         resolved_backend: BackendProtocol,
+        runtime: ToolRuntime,
     ) -> tuple[ToolMessage, dict[str, FileData] | None]:
         content = message.content
         if not isinstance(content, str) or len(content) <= 4 * self.tool_token_limit_before_evict:
             return message, None
 
         sanitized_id = sanitize_tool_call_id(message.tool_call_id)
-        file_path = f"/large_tool_results/{sanitized_id}"
+        file_path = f"{LARGE_TOOL_RESULTS_PREFIX}{sanitized_id}"
         result = resolved_backend.write(file_path, content)
         if result.error:
             return message, None
-        content_sample = format_content_with_line_numbers(content.splitlines()[:10], start_line=1)
+        if self.tool_result_spill is not None:
+            # The message about to be returned points into this thread's directory
+            self.tool_result_spill.maybe_collect(keep=[self.tool_result_spill.thread_id_for(runtime)])
+        content_sample = format_content_with_line_numbers(head_lines(content, 10), start_line=1)
         processed_message = ToolMessage(
             TOO_LARGE_TOOL_MSG.format(
                 tool_call_id=message.tool_call_id,
@@ -624,6 +1218,7 @@ class FilesystemMiddleware(AgentMiddleware):
             processed_message, files_update = self._process_large_message(
                 tool_result,
                 resolved_backend,
+                runtime,
             )
             return (Command(update={
                 "files": files_update,
@@ -648,6 +1243,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 processed_message, files_update = self._process_large_message(
                     message,
                     resolved_backend,
+                    runtime,
                 )
                 processed_messages.append(processed_message)
                 if files_update is not None:
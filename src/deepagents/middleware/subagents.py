@@ -1,5 +1,11 @@
 """Middleware for providing subagents to an agent via a `task` tool."""
 
+import hashlib
+import inspect
+import json
+import sys
+import threading
+from collections import OrderedDict
 from collections.abc import Awaitable, Callable, Sequence
 from typing import Any, TypedDict, cast
 from typing_extensions import NotRequired
@@ -13,6 +19,10 @@ from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.runnables import Runnable
 from langchain_core.tools import StructuredTool
 from langgraph.types import Command
+from pydantic import BaseModel, SecretStr
+
+from deepagents.backends.utils import CacheStats
+from deepagents.middleware.token_accounting import TOKEN_ACCOUNTING_STATE_KEYS
 
 
 class SubAgent(TypedDict):
@@ -61,8 +71,12 @@ class CompiledSubAgent(TypedDict):
 
 DEFAULT_SUBAGENT_PROMPT = "In order to complete the objective that the user asks of you, you have access to a number of standard tools."
 
-# State keys that should be excluded when passing state to subagents
-_EXCLUDED_STATE_KEYS = ("messages", "todos")
+# State keys that should be excluded when passing state to subagents and back.
+# Token counts describe the messages, which are not passed either; returning them
+# from parallel task calls would also write the same key twice in one step.
+_EXCLUDED_STATE_KEYS = ("messages", "todos", *TOKEN_ACCOUNTING_STATE_KEYS)
+# Parent files reach subagents as a shared read-only layer instead of a copy
+_FILE_LAYER_KEYS = ("files", "base_files")
 
 TASK_TOOL_DESCRIPTION = """Launch an ephemeral subagent to handle complex, multi-step independent tasks with isolated context windows.
 
@@ -206,6 +220,179 @@ When NOT to use the task tool:
 DEFAULT_GENERAL_PURPOSE_DESCRIPTION = "General-purpose agent for researching complex questions, searching for files and content, and executing multi-step tasks. When you are searching for a keyword or file and are not confident that you will find the right match in the first few tries use this agent to perform the search for you. This agent has access to all tools as the main agent."  # noqa: E501
 
 
+# Compiled subagent graphs shared across SubAgentMiddleware instances, most recently used last
+SUBAGENT_GRAPH_CACHE_SIZE = 64
+_subagent_graphs: OrderedDict[tuple[Any, ...], Runnable] = OrderedDict()
+_subagent_graphs_lock = threading.Lock()
+subagent_graph_cache_stats = CacheStats()
+"""Hits and misses of the compiled subagent graph cache."""
+
+
+def clear_subagent_graph_cache() -> None:
+    """Drop every cached compiled subagent graph."""
+    with _subagent_graphs_lock:
+        subagent_graph_cache_stats.invalidations += len(_subagent_graphs)
+        _subagent_graphs.clear()
+
+
+_CONFIG_KEY_DEPTH = 4
+
+
+def _settings_key(settings: Sequence[tuple[str, Any]], depth: int = _CONFIG_KEY_DEPTH) -> tuple[Any, ...]:
+    """Hashable summary of named settings, see _config_key."""
+    return tuple(sorted(((name, _config_key(value, depth)) for name, value in settings), key=lambda item: item[0]))
+
+
+def _type_key(cls: type, depth: int) -> tuple[Any, ...]:
+    """Classes compare by import path; classes built at runtime (e.g. by @wrap_tool_call) also by their methods."""
+    module = sys.modules.get(cls.__module__)
+    if getattr(module, cls.__qualname__, None) is cls or depth <= 0:
+        return (cls.__module__, cls.__qualname__)
+    members = [(name, value) for name, value in vars(cls).items() if not name.startswith("__")]
+    return (cls.__module__, cls.__qualname__, _settings_key(members, depth - 1))
+
+
+def _config_key(value: Any, depth: int = _CONFIG_KEY_DEPTH) -> Any:
+    """Hashable summary of a configuration value that is equal for equivalently built objects.
+
+    Plain values (str, numbers, None) compare as is and secrets by digest.
+    Functions compare by their code and the values they close over, so a
+    factory that recreates the same lambda on every call still matches while a
+    different handler does not. Tools compare like _tool_key, models like
+    _model_key, and other objects by class and public attributes. Past the
+    depth limit, objects are keyed by identity; a cached graph keeps them
+    alive, so ids are not reused.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, SecretStr):
+        return hashlib.sha256(value.get_secret_value().encode()).hexdigest()
+    if isinstance(value, BaseTool):
+        return _tool_key(value)
+    if isinstance(value, BaseChatModel):
+        return _model_key(value)
+    if depth <= 0:
+        return ("id", id(value))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_config_key(v, depth - 1) for v in value))
+    if isinstance(value, dict):
+        return ("dict", _settings_key([(repr(k), v) for k, v in value.items()], depth - 1))
+    if isinstance(value, type):
+        return _type_key(value, depth)
+    if inspect.ismethod(value):
+        return ("method", _config_key(value.__func__, depth), _config_key(value.__self__, depth - 1))
+    if inspect.isfunction(value):
+        cells = []
+        for cell in value.__closure__ or ():
+            try:
+                cells.append(_config_key(cell.cell_contents, depth - 1))
+            except ValueError:  # empty cell
+                cells.append(None)
+        defaults = _config_key(value.__defaults__, depth - 1)
+        return ("function", value.__code__.co_filename, value.__code__, tuple(cells), defaults)
+    attributes = getattr(value, "__dict__", None)
+    if attributes is None:
+        return ("id", id(value))
+    public = [(name, v) for name, v in attributes.items() if not name.startswith("_")]
+    return (_type_key(type(value), depth - 1), _settings_key(public, depth - 1))
+
+
+def _model_key(model: str | BaseChatModel) -> Any:
+    """Models compare by class and field values, so per-request instances of the same config match."""
+    if isinstance(model, str) or not isinstance(model, BaseModel):
+        return model if isinstance(model, str) else id(model)
+    fields = [(name, getattr(model, name, None)) for name, info in type(model).model_fields.items() if not info.exclude]
+    return (type(model).__module__, type(model).__qualname__, tuple(sorted((n, _model_field_key(v)) for n, v in fields)))
+
+
+def _model_field_key(value: Any) -> Any:
+    """Plain fields and JSON-able containers by value; clients and other objects by identity."""
+    if value is None or isinstance(value, (str, int, float, bool, SecretStr)):
+        return _config_key(value)
+    if isinstance(value, (list, tuple, dict)):
+        try:
+            return json.dumps(value, sort_keys=True)
+        except TypeError:
+            pass
+    return ("id", id(value))
+
+
+def _tool_key(tool: BaseTool | Callable | dict[str, Any]) -> Any:
+    """Tools compare by name, description and argument schema, so rebuilt tool objects still match.
+
+    Two different tools with the same name and schema are treated as the same
+    tool; the cached graph keeps calling the instances it was built with.
+    """
+    if isinstance(tool, dict):
+        return json.dumps(tool, sort_keys=True, default=str)
+    if isinstance(tool, BaseTool):
+        return (tool.name, tool.description, json.dumps(tool.args, sort_keys=True, default=str))
+    return _config_key(tool)
+
+
+def _middleware_key(middleware: AgentMiddleware) -> tuple[Any, ...]:
+    """Middleware compares by type and public settings, so rebuilt middleware objects still match.
+
+    Handlers and backend factories held by middleware compare by code and the
+    values they capture (see _config_key): recreating the same lambda matches,
+    a different handler does not. Private attributes are runtime state (locks,
+    caches) and are ignored.
+    """
+    public = [(name, value) for name, value in vars(middleware).items() if not name.startswith("_")]
+    return (_type_key(type(middleware), _CONFIG_KEY_DEPTH), _settings_key(public))
+
+
+def _subagent_graph_key(
+    model: str | BaseChatModel,
+    system_prompt: str,
+    tools: Sequence[BaseTool | Callable | dict[str, Any]],
+    middleware: Sequence[AgentMiddleware],
+    interrupt_on: dict[str, bool | InterruptOnConfig] | None,
+) -> tuple[Any, ...]:
+    return (
+        _model_key(model),
+        hashlib.sha256(system_prompt.encode()).hexdigest(),
+        tuple(_tool_key(t) for t in tools),
+        tuple(_middleware_key(m) for m in middleware),
+        repr(sorted(interrupt_on.items())) if interrupt_on else None,
+    )
+
+
+def _compile_subagent(
+    *,
+    model: str | BaseChatModel,
+    system_prompt: str,
+    tools: Sequence[BaseTool | Callable | dict[str, Any]],
+    middleware: list[AgentMiddleware],
+    interrupt_on: dict[str, bool | InterruptOnConfig] | None,
+    cache: bool,
+) -> Runnable:
+    """Build a subagent graph, or reuse a cached one built from the same configuration."""
+    if interrupt_on:
+        middleware = [*middleware, HumanInTheLoopMiddleware(interrupt_on=interrupt_on)]
+
+    def build() -> Runnable:
+        return create_agent(model, system_prompt=system_prompt, tools=tools, middleware=middleware)
+
+    if not cache:
+        return build()
+    key = _subagent_graph_key(model, system_prompt, tools, middleware, interrupt_on)
+    with _subagent_graphs_lock:
+        graph = _subagent_graphs.get(key)
+        if graph is not None:
+            _subagent_graphs.move_to_end(key)
+            subagent_graph_cache_stats.hits += 1
+            return graph
+        subagent_graph_cache_stats.misses += 1
+    graph = build()
+    with _subagent_graphs_lock:
+        _subagent_graphs[key] = graph
+        while len(_subagent_graphs) > SUBAGENT_GRAPH_CACHE_SIZE:
+            _subagent_graphs.popitem(last=False)
+            subagent_graph_cache_stats.evictions += 1
+    return graph
+
+
 def _get_subagents(
     *,
     default_model: str | BaseChatModel,
@@ -214,6 +401,7 @@ def _get_subagents(
     default_interrupt_on: dict[str, bool | InterruptOnConfig] | None,
     subagents: list[SubAgent | CompiledSubAgent],
     general_purpose_agent: bool,
+    cache_subagents: bool = False,
 ) -> tuple[dict[str, Any], list[str]]:
     """Create subagent instances from specifications.
 
@@ -226,6 +414,7 @@ def _get_subagents(
             are also the fallback for any subagents that don't specify their own tool configs.
         subagents: List of agent specifications or pre-compiled agents.
         general_purpose_agent: Whether to include a general-purpose subagent.
+        cache_subagents: Reuse compiled graphs built earlier from the same configuration.
 
     Returns:
         Tuple of (agent_dict, description_list) where agent_dict maps agent names
@@ -239,16 +428,14 @@ def _get_subagents(
 
     # Create general-purpose agent if enabled
     if general_purpose_agent:
-        general_purpose_middleware = [*default_subagent_middleware]
-        if default_interrupt_on:
-            general_purpose_middleware.append(HumanInTheLoopMiddleware(interrupt_on=default_interrupt_on))
-        general_purpose_subagent = create_agent(
-            default_model,
+        agents["general-purpose"] = _compile_subagent(
+            model=default_model,
             system_prompt=DEFAULT_SUBAGENT_PROMPT,
             tools=default_tools,
-            middleware=general_purpose_middleware,
+            middleware=[*default_subagent_middleware],
+            interrupt_on=default_interrupt_on,
+            cache=cache_subagents,
         )
-        agents["general-purpose"] = general_purpose_subagent
         subagent_descriptions.append(f"- general-purpose: {DEFAULT_GENERAL_PURPOSE_DESCRIPTION}")
 
     # Process custom subagents
@@ -264,19 +451,51 @@ def _get_subagents(
 
         _middleware = [*default_subagent_middleware, *agent_["middleware"]] if "middleware" in agent_ else [*default_subagent_middleware]
 
-        interrupt_on = agent_.get("interrupt_on", default_interrupt_on)
-        if interrupt_on:
-            _middleware.append(HumanInTheLoopMiddleware(interrupt_on=interrupt_on))
-
-        agents[agent_["name"]] = create_agent(
-            subagent_model,
+        agents[agent_["name"]] = _compile_subagent(
+            model=subagent_model,
             system_prompt=agent_["system_prompt"],
             tools=_tools,
             middleware=_middleware,
+            interrupt_on=agent_.get("interrupt_on", default_interrupt_on),
+            cache=cache_subagents,
         )
     return agents, subagent_descriptions
 
 
+def _accepts_base_files(runnable: Runnable) -> bool:
+    """Whether a subagent's input schema has the `base_files` layer.
+
+    Compiled subagents built on an older state schema only know `files` and are
+    given the parent's files there, as before base_files existed.
+    """
+    try:
+        properties = runnable.get_input_jsonschema().get("properties", {})
+    except Exception:  # noqa: BLE001
+        return False
+    return "base_files" in properties
+
+
+def _subagent_state_delta(subagent_state: dict[str, Any], result: dict[str, Any]) -> dict[str, Any]:
+    """Return the part of a subagent's final state that it changed, as a parent state update.
+
+    Keys the subagent left untouched are dropped, and `files` is reduced to the
+    entries that differ from the files the subagent was given. A no-op
+    rewrite of a parent file is not sent back either.
+    """
+    update: dict[str, Any] = {}
+    for key, value in result.items():
+        if key in _EXCLUDED_STATE_KEYS or key == "base_files":
+            continue
+        if key == "files":
+            base = subagent_state.get("base_files") or subagent_state.get("files") or {}
+            changed = {path: fd for path, fd in value.items() if base.get(path) is not fd and base.get(path) != fd}
+            if changed:
+                update["files"] = changed
+        elif key not in subagent_state or (subagent_state[key] is not value and subagent_state[key] != value):
+            update[key] = value
+    return update
+
+
 def _create_task_tool(
     *,
     default_model: str | BaseChatModel,
@@ -286,6 +505,7 @@ def _create_task_tool(
     subagents: list[SubAgent | CompiledSubAgent],
     general_purpose_agent: bool,
     task_description: str | None = None,
+    cache_subagents: bool = False,
 ) -> BaseTool:
     """Create a task tool for invoking subagents.
 
@@ -299,6 +519,7 @@ def _create_task_tool(
         general_purpose_agent: Whether to include general-purpose agent.
         task_description: Custom description for the task tool. If `None`,
             uses default template. Supports `{available_agents}` placeholder.
+        cache_subagents: Reuse compiled subagent graphs built earlier from the same configuration.
 
     Returns:
         A StructuredTool that can invoke subagents by type.
@@ -310,11 +531,13 @@ def _create_task_tool(
         default_interrupt_on=default_interrupt_on,
         subagents=subagents,
         general_purpose_agent=general_purpose_agent,
+        cache_subagents=cache_subagents,
     )
     subagent_description_str = "\n".join(subagent_descriptions)
+    layered_subagents = {name for name, graph in subagent_graphs.items() if _accepts_base_files(graph)}
 
-    def _return_command_with_state_update(result: dict, tool_call_id: str) -> Command:
-        state_update = {k: v for k, v in result.items() if k not in _EXCLUDED_STATE_KEYS}
+    def _return_command_with_state_update(result: dict, subagent_state: dict, tool_call_id: str) -> Command:
+        state_update = _subagent_state_delta(subagent_state, result)
         return Command(
             update={
                 **state_update,
@@ -329,8 +552,14 @@ def _create_task_tool(
             raise ValueError(msg)
         subagent = subagent_graphs[subagent_type]
         # Create a new state dict to avoid mutating the original
-        subagent_state = {k: v for k, v in runtime.state.items() if k not in _EXCLUDED_STATE_KEYS}
+        subagent_state = {k: v for k, v in runtime.state.items() if k not in _EXCLUDED_STATE_KEYS and k not in _FILE_LAYER_KEYS}
         subagent_state["messages"] = [HumanMessage(content=description)]
+        files = runtime.state.get("files") or {}
+        base_files = runtime.state.get("base_files")
+        # Nested subagents flatten their parent's two layers; the top level shares its dict as is
+        shared_files = {**base_files, **files} if base_files else files
+        if shared_files:
+            subagent_state["base_files" if subagent_type in layered_subagents else "files"] = shared_files
         return subagent, subagent_state
 
     # Use custom description if provided, otherwise use default template
@@ -350,7 +579,7 @@ def _create_task_tool(
         if not runtime.tool_call_id:
             value_error_msg = "Tool call ID is required for subagent invocation"
             raise ValueError(value_error_msg)
-        return _return_command_with_state_update(result, runtime.tool_call_id)
+        return _return_command_with_state_update(result, subagent_state, runtime.tool_call_id)
 
     async def atask(
         description: str,
@@ -362,7 +591,7 @@ def _create_task_tool(
         if not runtime.tool_call_id:
             value_error_msg = "Tool call ID is required for subagent invocation"
             raise ValueError(value_error_msg)
-        return _return_command_with_state_update(result, runtime.tool_call_id)
+        return _return_command_with_state_update(result, subagent_state, runtime.tool_call_id)
 
     return StructuredTool.from_function(
         name="task",
@@ -402,6 +631,11 @@ class SubAgentMiddleware(AgentMiddleware):
         general_purpose_agent: Whether to include the general-purpose agent. Defaults to `True`.
         task_description: Custom description for the task tool. If `None`, uses the
             default description template.
+        cache_subagents: Reuse compiled subagent graphs across middleware instances built
+            from the same configuration: model settings, tool names and argument schemas,
+            middleware types and public settings, system prompt and interrupt configs.
+            Handlers held by middleware compare by code and captured values, so a graph
+            factory that rebuilds the same tools and middleware on every call gets a hit.
 
     Example:
         ```python
@@ -444,6 +678,7 @@ class SubAgentMiddleware(AgentMiddleware):
         system_prompt: str | None = TASK_SYSTEM_PROMPT,
         general_purpose_agent: bool = True,
         task_description: str | None = None,
+        cache_subagents: bool = False,
     ) -> None:
         """Initialize the SubAgentMiddleware."""
         super().__init__()
@@ -456,6 +691,7 @@ class SubAgentMiddleware(AgentMiddleware):
             subagents=subagents or [],
             general_purpose_agent=general_purpose_agent,
             task_description=task_description,
+            cache_subagents=cache_subagents,
         )
         self.tools = [task_tool]
 
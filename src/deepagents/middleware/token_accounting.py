@@ -0,0 +1,247 @@
+"""Middleware that keeps a running token count of the message history in state."""
+
+import json
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from langchain.agents.middleware.types import AgentMiddleware, AgentState
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.runtime import Runtime
+from typing_extensions import NotRequired
+
+# Per-message overhead (role, separators), as in count_tokens_approximately
+MESSAGE_OVERHEAD_TOKENS = 3
+# Characters per token for Claude models, as tuned by SummarizationMiddleware
+ANTHROPIC_CHARS_PER_TOKEN = 3.3
+# Bounds of the usage-metadata correction, as in count_tokens_approximately
+MAX_USAGE_SCALE = 1.25
+
+# State keys written by TokenAccountingMiddleware. They describe one agent's own
+# message history, so they must not travel between a parent agent and its subagents.
+TOKEN_ACCOUNTING_STATE_KEYS = ("message_tokens", "history_tokens")
+
+
+def tiktoken_text_counter(encoding: str = "o200k_base") -> Callable[[str], int] | None:
+    """Return an exact text token counter backed by tiktoken, or None if it is unavailable.
+
+    Pass the result as MessageTokenCounter(count_text=...): with None the
+    counter falls back to its character heuristic.
+
+    Args:
+        encoding: tiktoken encoding name.
+    """
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding(encoding)
+    except Exception:  # noqa: BLE001 - missing package or encoding file
+        return None
+    return lambda text: len(enc.encode(text, disallowed_special=()))
+
+
+def _message_size(message: BaseMessage) -> int:
+    """Cheap fingerprint of a message's content, used to notice in-place rewrites."""
+    return len(message.text) + len(getattr(message, "tool_calls", None) or [])
+
+
+class MessageTokenCounter:
+    """Token counter for messages that remembers each message's count.
+
+    Messages are keyed by id and content size, so a message is counted once
+    however many times the history is measured. Instances are callable with a
+    list of messages, so one can be passed as `token_counter` to
+    SummarizationMiddleware and share counts with TokenAccountingMiddleware.
+    Use for_model() to get the same tuning as SummarizationMiddleware's
+    default counter.
+
+    Args:
+        count_text: Exact text token counter (e.g. from tiktoken_text_counter()).
+            When None, counts use count_tokens_approximately's character heuristic.
+        chars_per_token: Characters per token for the heuristic.
+        max_entries: Maximum number of remembered counts before LRU eviction.
+        use_usage_metadata_scaling: Scale history totals up by the ratio of the
+            latest AI message's reported total_tokens to the estimate at that
+            message, like count_tokens_approximately.
+    """
+
+    def __init__(
+        self,
+        count_text: Callable[[str], int] | None = None,
+        *,
+        chars_per_token: float = 4.0,
+        max_entries: int = 100_000,
+        use_usage_metadata_scaling: bool = False,
+    ) -> None:
+        """Initialize the counter.
+
+        Args:
+            count_text: Exact text token counter; None uses the character heuristic.
+            chars_per_token: Characters per token for the heuristic.
+            max_entries: Maximum number of remembered counts.
+            use_usage_metadata_scaling: Correct history totals with the usage reported by the model.
+        """
+        self.count_text = count_text
+        self.chars_per_token = chars_per_token
+        self.max_entries = max_entries
+        self.use_usage_metadata_scaling = use_usage_metadata_scaling
+        self._counts: OrderedDict[tuple[str, int], int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, model: str | BaseChatModel, **kwargs: Any) -> "MessageTokenCounter":
+        """Return a counter tuned like SummarizationMiddleware's default for model.
+
+        Claude models use 3.3 characters per token, and totals are corrected
+        with the usage metadata the model reports.
+
+        Args:
+            model: Chat model instance or "provider:model" string.
+            **kwargs: Other MessageTokenCounter arguments, e.g. max_entries.
+        """
+        if isinstance(model, BaseChatModel):
+            anthropic = model._llm_type.startswith("anthropic-chat")  # noqa: SLF001
+        else:
+            anthropic = model.startswith(("anthropic:", "claude"))
+        kwargs.setdefault("use_usage_metadata_scaling", True)
+        if anthropic:
+            kwargs.setdefault("chars_per_token", ANTHROPIC_CHARS_PER_TOKEN)
+        return cls(**kwargs)
+
+    def _measure(self, message: BaseMessage) -> int:
+        if self.count_text is None:
+            return count_tokens_approximately([message], chars_per_token=self.chars_per_token)
+        tokens = self.count_text(message.text) + MESSAGE_OVERHEAD_TOKENS
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            tokens += self.count_text(json.dumps(tool_calls, default=str))
+        return tokens
+
+    def remember(self, message_id: str, size: int, tokens: int) -> None:
+        """Record a known count, e.g. one restored from agent state."""
+        with self._lock:
+            self._counts[(message_id, size)] = tokens
+            self._counts.move_to_end((message_id, size))
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def count(self, message: BaseMessage) -> int:
+        """Return the token count of one message, measuring it only on first sight."""
+        if message.id is None:
+            return self._measure(message)
+        key = (message.id, _message_size(message))
+        with self._lock:
+            tokens = self._counts.get(key)
+            if tokens is not None:
+                self._counts.move_to_end(key)
+                return tokens
+        tokens = self._measure(message)
+        self.remember(*key, tokens)
+        return tokens
+
+    def __call__(self, messages: Iterable[Any]) -> int:
+        """Return the total token count of messages."""
+        total = 0
+        provider: str | None = None
+        mixed_providers = False
+        reported: int | None = None
+        estimated_at_report = 0
+        for m in messages:
+            if not isinstance(m, BaseMessage):
+                total += count_tokens_approximately([m], chars_per_token=self.chars_per_token)
+                continue
+            total += self.count(m)
+            if self.use_usage_metadata_scaling and isinstance(m, AIMessage):
+                model_provider = m.response_metadata.get("model_provider")
+                if provider is None:
+                    provider = model_provider
+                elif model_provider != provider:
+                    mixed_providers = True
+                total_tokens = (m.usage_metadata or {}).get("total_tokens")
+                if isinstance(total_tokens, int):
+                    reported, estimated_at_report = total_tokens, total
+        if provider is None or mixed_providers or reported is None or estimated_at_report <= 0:
+            return total
+        # Never scale down, and cap the correction, as count_tokens_approximately does
+        return math.ceil(total * min(MAX_USAGE_SCALE, max(1.0, reported / estimated_at_report)))
+
+
+class TokenAccountingState(AgentState):
+    """State for the token accounting middleware."""
+
+    message_tokens: NotRequired[dict[str, list[int]]]
+    """Message id -> [content size, token count] for every message in the history."""
+
+    history_tokens: NotRequired[int]
+    """Token count of the whole message history as of the last model call."""
+
+
+class TokenAccountingMiddleware(AgentMiddleware):
+    """Keep per-message token counts and the history total in agent state.
+
+    Before each model call, only messages added or rewritten since the last
+    call are measured; counts of removed messages are dropped. The work per
+    call is proportional to the new messages rather than the whole history.
+
+    Counts restored from a checkpoint are fed back into the counter, so
+    SummarizationMiddleware sharing the same counter does not re-measure the
+    history either. Place this middleware before SummarizationMiddleware.
+
+    Args:
+        counter: Shared message token counter. Defaults to the character heuristic.
+
+    Example:
+        ```python
+        counter = MessageTokenCounter()
+        agent = create_agent(
+            model,
+            middleware=[
+                TokenAccountingMiddleware(counter),
+                SummarizationMiddleware(model, trigger=("tokens", 170000), token_counter=counter),
+            ],
+        )
+        ```
+    """
+
+    state_schema = TokenAccountingState
+
+    def __init__(self, counter: MessageTokenCounter | None = None) -> None:
+        """Initialize the middleware.
+
+        Args:
+            counter: Shared message token counter. Defaults to MessageTokenCounter().
+        """
+        self.counter = counter if counter is not None else MessageTokenCounter()
+
+    def _update_counts(self, messages: list[AnyMessage], previous: dict[str, list[int]]) -> dict[str, list[int]]:
+        counts: dict[str, list[int]] = {}
+        for message in messages:
+            if message.id is None:
+                continue
+            size = _message_size(message)
+            known = previous.get(message.id)
+            if known is not None and known[0] == size:
+                self.counter.remember(message.id, size, known[1])
+                counts[message.id] = known
+            else:
+                counts[message.id] = [size, self.counter.count(message)]
+        return counts
+
+    def before_model(self, state: TokenAccountingState, runtime: Runtime[Any]) -> dict[str, Any] | None:  # noqa: ARG002
+        """Measure messages added since the last call and update the running total."""
+        messages = state["messages"]
+        previous = state.get("message_tokens") or {}
+        counts = self._update_counts(messages, previous)
+        # Every count is now cached; messages without an id are counted on the fly
+        total = self.counter(messages)
+        if counts == previous and state.get("history_tokens") == total:
+            return None
+        return {"message_tokens": counts, "history_tokens": total}
+
+    async def abefore_model(self, state: TokenAccountingState, runtime: Runtime[Any]) -> dict[str, Any] | None:
+        """(async) Measure messages added since the last call and update the running total."""
+        return self.before_model(state, runtime)
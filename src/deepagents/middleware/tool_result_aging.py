@@ -0,0 +1,149 @@
+"""Middleware that moves old tool results out of the message history into files."""
+
+from typing import Any
+
+from langchain.agents.middleware.types import AgentMiddleware
+from langchain.tools import ToolRuntime
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+from langgraph.config import get_config
+from langgraph.runtime import Runtime
+
+from deepagents.backends import StateBackend
+from deepagents.backends.spill import ToolResultSpill
+from deepagents.backends.utils import format_content_with_line_numbers, head_lines, sanitize_tool_call_id
+from deepagents.middleware.filesystem import (
+    BACKEND_TYPES,
+    LARGE_TOOL_RESULTS_PREFIX,
+    TOOL_GENERATORS,
+    FilesystemMiddleware,
+    FilesystemState,
+    _get_backend,
+)
+
+AGED_TOOL_RESULT_MSG = """This {tool} result is {turns}+ turns old and was moved to {file_path} ({lines} lines) to keep the conversation short.
+Use the read_file tool on that path if you need it again. Its first lines were:
+{content_sample}"""
+AGED_SAMPLE_LINES = 5
+AGED_SAMPLE_LINE_CHARS = 200
+
+
+class ToolResultAgingMiddleware(AgentMiddleware):
+    """Replace old tool results in the message history with stubs pointing to file copies.
+
+    Tool-heavy threads (browser snapshots, scraped pages) otherwise resend every
+    old result on each model call until summarization kicks in. Before each
+    model call, tool results followed by at least `keep_turns` AI messages and
+    longer than `min_chars` are written to /large_tool_results/<tool_call_id>
+    and replaced in state by a short stub. The stub keeps the message id,
+    tool_call_id and name, so every tool call stays paired with its result.
+
+    Results of the filesystem tools are left alone; the agent can run them again.
+    Use the same backend (and spill directory, if any) as FilesystemMiddleware so
+    the agent can read the copies back.
+
+    Args:
+        backend: Backend receiving the copies, or a factory. Defaults to StateBackend.
+        keep_turns: Number of most recent model turns whose tool results are kept in full.
+        min_chars: Results this short are never moved.
+        tool_result_spill: Optional spill directory that receives the copies instead of the backend.
+
+    Example:
+        ```python
+        agent = create_deep_agent(middleware=[ToolResultAgingMiddleware(keep_turns=4)])
+        ```
+    """
+
+    state_schema = FilesystemState
+
+    def __init__(
+        self,
+        *,
+        backend: BACKEND_TYPES | None = None,
+        keep_turns: int = 3,
+        min_chars: int = 2000,
+        tool_result_spill: ToolResultSpill | None = None,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            backend: Backend for the file copies, or a factory callable. Defaults to StateBackend.
+            keep_turns: Number of most recent model turns whose tool results are kept in full.
+            min_chars: Minimum result length, in characters, worth moving to a file.
+            tool_result_spill: Optional spill directory that receives the copies instead of the backend.
+        """
+        self.backend = backend if backend is not None else (lambda rt: StateBackend(rt))
+        if tool_result_spill is not None:
+            self.backend = FilesystemMiddleware._mount_spill(self.backend, tool_result_spill)  # noqa: SLF001
+        self.keep_turns = keep_turns
+        self.min_chars = min_chars
+
+    def _aged_results(self, messages: list[AnyMessage]) -> list[ToolMessage]:
+        """Return the tool results at least keep_turns AI messages old that are worth moving."""
+        aged: list[ToolMessage] = []
+        turns = 0
+        for message in reversed(messages):
+            if isinstance(message, AIMessage):
+                turns += 1
+            elif (
+                isinstance(message, ToolMessage)
+                and turns >= self.keep_turns
+                and message.id is not None
+                and message.name not in TOOL_GENERATORS
+                and isinstance(message.content, str)
+                and len(message.content) > self.min_chars
+            ):
+                aged.append(message)
+        return aged
+
+    def before_model(self, state: FilesystemState, runtime: Runtime[Any]) -> dict[str, Any] | None:
+        """Move aged tool results to files and replace them in state with stubs."""
+        aged = self._aged_results(state["messages"])
+        if not aged:
+            return None
+        try:
+            config = get_config()
+        except RuntimeError:
+            config = {}
+        backend = _get_backend(
+            self.backend,
+            ToolRuntime(
+                state=state,
+                context=runtime.context,
+                config=config,
+                stream_writer=runtime.stream_writer,
+                tool_call_id=None,
+                store=runtime.store,
+            ),
+        )
+
+        stubs: list[ToolMessage] = []
+        files_update: dict[str, Any] = {}
+        for message in aged:
+            content: str = message.content  # type: ignore[assignment]
+            file_path = f"{LARGE_TOOL_RESULTS_PREFIX}{sanitize_tool_call_id(message.tool_call_id)}"
+            result = backend.write(file_path, content)
+            if result.error:
+                continue
+            if result.files_update:
+                files_update.update(result.files_update)
+            sample = [line[:AGED_SAMPLE_LINE_CHARS] for line in head_lines(content, AGED_SAMPLE_LINES)]
+            stub = AGED_TOOL_RESULT_MSG.format(
+                tool=message.name or "tool",
+                turns=self.keep_turns,
+                file_path=file_path,
+                lines=content.count("\n") + 1,
+                content_sample=format_content_with_line_numbers(sample, start_line=1),
+            )
+            # Same id, so the messages reducer replaces the original in place
+            stubs.append(message.model_copy(update={"content": stub}))
+
+        if not stubs:
+            return None
+        update: dict[str, Any] = {"messages": stubs}
+        if files_update:
+            update["files"] = files_update
+        return update
+
+    async def abefore_model(self, state: FilesystemState, runtime: Runtime[Any]) -> dict[str, Any] | None:
+        """(async) Move aged tool results to files and replace them in state with stubs."""
+        return self.before_model(state, runtime)
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from deepagents.backends.archive import ArchiveBackend, build_archive, main
+from deepagents.backends.composite import CompositeBackend
+from deepagents.backends.filesystem import FilesystemBackend
+
+
+def _make_corpus(root: Path) -> None:
+    (root / "lyrics" / "rock").mkdir(parents=True)
+    (root / "lyrics" / "rock" / "a.txt").write_text("first line\nthe chorus again\nlast line\n")
+    (root / "lyrics" / "b.txt").write_text("\n".join(f"line {i}" for i in range(50)))
+    (root / "notes.md").write_text("chorus notes")
+    (root / "empty.txt").write_text("")
+
+
+def test_archive_backend_reads_from_index(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_corpus(src)
+    archive = tmp_path / "corpus.zip"
+    assert build_archive(src, archive) == 4
+
+    be = ArchiveBackend(archive)
+    assert [fi["path"] for fi in be.ls_info("/")] == ["/empty.txt", "/lyrics/", "/notes.md"]
+    assert [fi["path"] for fi in be.ls_info("/lyrics")] == ["/lyrics/b.txt", "/lyrics/rock/"]
+    assert be.ls_info("/missing/") == []
+
+    assert "the chorus again" in be.read("/lyrics/rock/a.txt")
+    window = be.read("/lyrics/b.txt", offset=10, limit=2)
+    assert "line 10" in window and "line 11" in window and "line 12" not in window
+    assert "exceeds file length (50 lines)" in be.read("/lyrics/b.txt", offset=60)
+    assert "not found" in be.read("/nope.txt")
+    assert "empty contents" in be.read("/empty.txt")
+
+    assert [fi["path"] for fi in be.glob_info("**/*.txt", "/lyrics/")] == ["/lyrics/b.txt", "/lyrics/rock/a.txt"]
+    assert [fi["path"] for fi in be.glob_info("*.md")] == ["/notes.md"]
+
+    assert be.grep_raw("chorus", "/") == [
+        {"path": "/lyrics/rock/a.txt", "line": 2, "text": "the chorus again"},
+        {"path": "/notes.md", "line": 1, "text": "chorus notes"},
+    ]
+    assert [m["path"] for m in be.grep_raw("chorus", "/", glob="*.md")] == ["/notes.md"]
+    assert isinstance(be.grep_raw("[", "/"), str)
+
+    assert be.write("/new.txt", "x").error is not None
+    assert be.edit("/notes.md", "chorus", "verse").error is not None
+    be.close()
+
+
+def test_archive_backend_mounted_under_composite(tmp_path: Path, capsys):
+    src = tmp_path / "src"
+    _make_corpus(src)
+    archive = tmp_path / "corpus.zip"
+    assert main([str(src), str(archive)]) == 0
+    assert "Packed 4 files" in capsys.readouterr().out
+
+    root = tmp_path / "work"
+    root.mkdir()
+    comp = CompositeBackend(
+        default=FilesystemBackend(root_dir=str(root), virtual_mode=True),
+        routes={"/corpus/": ArchiveBackend(archive)},
+    )
+    assert "/corpus/" in [fi["path"] for fi in comp.ls_info("/")]
+    assert [fi["path"] for fi in comp.ls_info("/corpus/lyrics/")] == ["/corpus/lyrics/b.txt", "/corpus/lyrics/rock/"]
+    assert "the chorus again" in comp.read("/corpus/lyrics/rock/a.txt")
+    assert {m["path"] for m in comp.grep_raw("chorus", "/corpus/")} == {"/corpus/lyrics/rock/a.txt", "/corpus/notes.md"}
+    assert comp.write("/corpus/x.txt", "x").error is not None
+    assert comp.write("/x.txt", "x").error is None
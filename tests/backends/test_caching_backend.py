@@ -0,0 +1,163 @@
+from pathlib import Path
+
+from langchain.tools import ToolRuntime
+from langgraph.store.memory import InMemoryStore
+
+from deepagents.backends.caching import CachingBackend
+from deepagents.backends.composite import CompositeBackend
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.state import StateBackend
+from deepagents.backends.store import StoreBackend
+
+
+def make_runtime():
+    return ToolRuntime(
+        state={"messages": [], "files": {}},
+        context=None,
+        tool_call_id="tc",
+        store=InMemoryStore(),
+        stream_writer=lambda _: None,
+        config={},
+    )
+
+
+class CountingBackend(StoreBackend):
+    def __init__(self, runtime):
+        super().__init__(runtime)
+        self.calls = 0
+
+    def ls_info(self, path):
+        self.calls += 1
+        return super().ls_info(path)
+
+    def read(self, file_path, offset=0, limit=2000):
+        self.calls += 1
+        return super().read(file_path, offset=offset, limit=limit)
+
+    def grep_raw(self, pattern, path="/", glob=None):
+        self.calls += 1
+        return super().grep_raw(pattern, path, glob)
+
+    def glob_info(self, pattern, path="/"):
+        self.calls += 1
+        return super().glob_info(pattern, path)
+
+
+def test_caching_backend_hits_and_precise_invalidation():
+    inner = CountingBackend(make_runtime())
+    be = CachingBackend(inner)
+    be.write("/docs/a.md", "alpha")
+    be.write("/notes/b.md", "beta")
+
+    assert "alpha" in be.read("/docs/a.md")
+    assert "alpha" in be.read("/docs/a.md")
+    notes_listing = be.ls_info("/notes/")
+    be.ls_info("/notes/")
+    be.grep_raw("alpha", path="/docs")
+    be.grep_raw("alpha", path="/docs")
+    assert inner.calls == 3
+    assert be.stats.hits == 3 and be.stats.misses == 3
+
+    # Editing /docs/a.md leaves /notes/ entries alone
+    res = be.edit("/docs/a.md", "alpha", "gamma")
+    assert res.error is None
+    assert "gamma" in be.read("/docs/a.md")
+    assert be.grep_raw("alpha", path="/docs") == []
+    assert be.ls_info("/notes/") == notes_listing
+    assert inner.calls == 5
+
+    # Writing a new file invalidates ancestor listings and globs
+    be.glob_info("**/*.md", path="/")
+    be.ls_info("/")
+    be.write("/docs/deep/c.md", "c")
+    assert "/docs/deep/c.md" in [fi["path"] for fi in be.glob_info("**/*.md", path="/")]
+    assert "/docs/" in [fi["path"] for fi in be.ls_info("/")]
+
+
+def test_caching_backend_lru_eviction_and_copies():
+    be = CachingBackend(CountingBackend(make_runtime()), max_entries=2)
+    be.write("/a.txt", "a")
+    be.read("/a.txt")
+    be.ls_info("/")
+    be.glob_info("*.txt")
+    assert be.stats.evictions == 1
+    listing = be.ls_info("/")
+    listing[0]["path"] = "/mutated"
+    assert be.ls_info("/")[0]["path"] == "/a.txt"
+
+
+def test_caching_backend_in_composite(tmp_path: Path):
+    rt = make_runtime()
+    fs = CachingBackend(FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True))
+    comp = CompositeBackend(default=CachingBackend(StateBackend(rt)), routes={"/disk/": fs})
+
+    assert comp.write("/disk/x.txt", "hello").error is None
+    assert "hello" in comp.read("/disk/x.txt")
+    assert "hello" in comp.read("/disk/x.txt")
+    assert fs.stats.hits == 1
+
+    # State updates flow through the wrapped backend's runtime
+    res = comp.write("/state.txt", "in state")
+    assert res.files_update is not None and "/state.txt" in rt.state["files"]
+
+
+def test_caching_backend_serves_batched_and_paged_calls_from_cache():
+    from deepagents.backends.protocol import SupportsGrepPage, SupportsReadMany
+    from deepagents.backends.sqlite import SqliteBackend
+
+    calls: list[str] = []
+
+    class CountingSqlite(SqliteBackend):
+        def read_many(self, requests):
+            calls.append("read_many")
+            return super().read_many(requests)
+
+        def grep_page(self, *args, **kwargs):
+            calls.append("grep_page")
+            return super().grep_page(*args, **kwargs)
+
+        def glob_page(self, *args, **kwargs):
+            calls.append("glob_page")
+            return super().glob_page(*args, **kwargs)
+
+    be = CachingBackend(CountingSqlite())
+    be.write("/a.txt", "needle")
+    be.write("/b.txt", "needle")
+    assert isinstance(be, SupportsReadMany) and isinstance(be, SupportsGrepPage)
+
+    be.read("/a.txt")
+    pages = be.read_many([("/a.txt", 0, 2000), ("/b.txt", 0, 2000)])
+    assert all("needle" in p for p in pages)
+    assert be.read_many([("/b.txt", 0, 2000)]) == pages[1:]
+    assert [m["path"] for m in be.grep_page("needle", "/", limit=1)] == ["/a.txt"]
+    assert [m["path"] for m in be.grep_page("needle", "/", limit=1)] == ["/a.txt"]
+    assert [fi["path"] for fi in be.glob_page("*.txt", "/")] == ["/a.txt", "/b.txt"]
+    be.glob_page("*.txt", "/")
+    # Only /b.txt was fetched in bulk; each page was computed once
+    assert calls == ["read_many", "grep_page", "glob_page"]
+
+    be.edit("/b.txt", "needle", "thread")
+    assert "thread" in be.read_many([("/b.txt", 0, 2000)])[0]
+    assert [fi["path"] for fi in be.glob_page("*.txt", "/")] == ["/a.txt", "/b.txt"]
+    assert calls[-2:] == ["read_many", "glob_page"]
+
+
+def test_caching_backend_pages_backends_without_native_paging_from_one_scan():
+    inner = CountingBackend(make_runtime())
+    be = CachingBackend(inner)
+    for i in range(5):
+        be.write(f"/f{i}.txt", "needle")
+
+    pages, start_after = [], None
+    while True:
+        page = be.grep_page("needle", "/", start_after=start_after, limit=2)
+        pages.append([m["path"] for m in page])
+        if len(page) < 2:
+            break
+        start_after = (page[-1]["path"], page[-1]["line"])
+    assert pages == [["/f0.txt", "/f1.txt"], ["/f2.txt", "/f3.txt"], ["/f4.txt"]]
+    assert inner.calls == 1
+
+    assert [fi["path"] for fi in be.glob_page("*.txt", start_after="/f2.txt", limit=1)] == ["/f3.txt"]
+    be.write("/f5.txt", "needle")
+    assert [m["path"] for m in be.grep_page("needle", "/", start_after=("/f4.txt", 1))] == ["/f5.txt"]
@@ -343,6 +343,33 @@ def test_composite_backend_ls_trailing_slash(tmp_path: Path):
     assert [fi["path"] for fi in listing1] == [fi["path"] for fi in listing2]
 
 
+
+def test_composite_backend_tree_descends_into_routes():
+    rt = make_runtime("t-tree")
+    be = CompositeBackend(
+        default=StateBackend(rt),
+        routes={"/memories/": StoreBackend(rt), "/users/7/": StoreBackend(make_runtime("t-tree-user"))},
+    )
+    for path in ["/notes.txt", "/memories/a/b.md", "/users/7/c.txt", "/users/list.txt"]:
+        res = be.write(path, "x")
+        if res.files_update:
+            rt.state["files"].update(res.files_update)
+    # Shadowed by the /memories/ route
+    rt.state["files"]["/memories/hidden.txt"] = {"content": ["x"], "created_at": "", "modified_at": ""}
+
+    assert [fi["path"] for fi in be.tree_info("/", 3, 100)] == [
+        "/memories/",
+        "/memories/a/",
+        "/memories/a/b.md",
+        "/notes.txt",
+        "/users/",
+        "/users/7/",
+        "/users/7/c.txt",
+        "/users/list.txt",
+    ]
+    assert [fi["path"] for fi in be.tree_info("/memories/", 1, 100)] == ["/memories/a/"]
+    assert len(be.tree_info("/", 3, 4)) == 4
+
 def test_composite_backend_intercept_large_tool_result():
     from deepagents.middleware.filesystem import FilesystemMiddleware
     from langchain_core.messages import ToolMessage
@@ -390,3 +417,202 @@ def test_composite_backend_intercept_large_tool_result_routed_to_store():
     stored_item = rt.store.get(("filesystem",), "/test_routed_123")
     assert stored_item is not None
     assert stored_item.value["content"] == [large_content]
+
+
+def test_composite_backend_fan_out_partial_results():
+    import time
+
+    rt = make_runtime("t12")
+
+    class SlowBackend(StateBackend):
+        def grep_raw(self, pattern, path="/", glob=None):
+            time.sleep(1)
+            return super().grep_raw(pattern, path, glob)
+
+        def glob_info(self, pattern, path="/"):
+            time.sleep(1)
+            return super().glob_info(pattern, path)
+
+    class FailingBackend(StateBackend):
+        def grep_raw(self, pattern, path="/", glob=None):
+            raise RuntimeError("connection refused")
+
+        def glob_info(self, pattern, path="/"):
+            raise RuntimeError("connection refused")
+
+    rt.state["files"]["/a.txt"] = {"content": ["needle"], "created_at": "", "modified_at": ""}
+    store = StoreBackend(rt)
+    store.write("/b.txt", "needle")
+    comp = CompositeBackend(
+        default=StateBackend(rt),
+        routes={"/memories/": store, "/slow/": SlowBackend(rt), "/broken/": FailingBackend(rt)},
+        route_timeout=0.2,
+    )
+
+    started = time.monotonic()
+    matches = comp.grep_raw("needle", path="/")
+    assert time.monotonic() - started < 0.9
+    assert sorted(m["path"] for m in matches) == ["/a.txt", "/memories/b.txt"]
+    notes = comp.consume_notes()
+    assert any("/slow/" in n and "timed out" in n for n in notes)
+    assert any("/broken/" in n and "connection refused" in n for n in notes)
+    assert comp.consume_notes() == []
+
+    infos = comp.glob_info("*.txt", path="/")
+    assert [fi["path"] for fi in infos] == ["/a.txt", "/memories/b.txt"]
+    assert len(comp.consume_notes()) == 2
+
+
+def test_composite_backend_grep_tool_reports_skipped_routes():
+    from deepagents.middleware.filesystem import FilesystemMiddleware
+
+    rt = make_runtime("t13")
+
+    class FailingBackend(StateBackend):
+        def grep_raw(self, pattern, path="/", glob=None):
+            raise RuntimeError("boom")
+
+    rt.state["files"]["/a.txt"] = {"content": ["needle"], "created_at": "", "modified_at": ""}
+    middleware = FilesystemMiddleware(
+        backend=lambda r: CompositeBackend(default=StateBackend(r), routes={"/broken/": FailingBackend(r)})
+    )
+    grep_tool = next(t for t in middleware.tools if t.name == "grep")
+    result = grep_tool.invoke({"pattern": "needle", "runtime": rt})
+    assert "/a.txt" in result
+    assert "results from /broken/ are missing" in result
+
+
+def test_composite_backend_hung_routes_do_not_starve_later_fan_outs():
+    import threading
+
+    rt = make_runtime("t13b")
+    release = threading.Event()
+
+    class HungBackend(StateBackend):
+        def glob_info(self, pattern, path="/"):
+            release.wait(10)
+            return []
+
+    rt.state["files"]["/a.txt"] = {"content": ["x"], "created_at": "", "modified_at": ""}
+    comp = CompositeBackend(
+        default=StateBackend(rt), routes={f"/hung{i}/": HungBackend(rt) for i in range(4)}, route_timeout=0.05
+    )
+    try:
+        # Far more hung calls than a shared 32-worker pool could hold
+        for _ in range(20):
+            assert [fi["path"] for fi in comp.glob_info("*.txt", "/")] == ["/a.txt"]
+            assert len(comp.consume_notes()) == 4
+    finally:
+        release.set()
+
+
+def test_composite_backend_glob_tool_reports_skipped_routes():
+    from langchain_core.messages import ToolMessage
+
+    from deepagents.middleware.filesystem import FilesystemMiddleware
+
+    rt = make_runtime("t13c")
+
+    class FailingBackend(StateBackend):
+        def glob_info(self, pattern, path="/"):
+            raise RuntimeError("boom")
+
+    rt.state["files"]["/a.txt"] = {"content": ["x"], "created_at": "", "modified_at": ""}
+    middleware = FilesystemMiddleware(
+        backend=lambda r: CompositeBackend(default=StateBackend(r), routes={"/broken/": FailingBackend(r)})
+    )
+    glob_tool = next(t for t in middleware.tools if t.name == "glob")
+    result = glob_tool.invoke({"pattern": "*.txt", "runtime": rt})
+    assert isinstance(result, ToolMessage)
+    assert result.content.startswith("/a.txt\n\n")
+    assert "results from /broken/ are missing" in result.content
+    assert result.artifact["paths"] == ["/a.txt"]
+    assert "results from /broken/ are missing" in result.artifact["notes"][0]
+
+
+def test_composite_backend_trie_routing_with_lazy_factories():
+    rt = make_runtime("t14")
+    built: list[str] = []
+
+    def make_factory(user_id: str):
+        def factory():
+            built.append(user_id)
+            return StateBackend(rt)
+        return factory
+
+    routes = {f"/users/{i}/": make_factory(str(i)) for i in range(1000)}
+    routes["/users/7/archive/"] = make_factory("7-archive")
+    comp = CompositeBackend(default=StateBackend(rt), routes=routes, max_cached_backends=2)
+
+    # Listing shows mounts without building any backend
+    assert [fi["path"] for fi in comp.ls_info("/")] == ["/users/"]
+    users = [fi["path"] for fi in comp.ls_info("/users/")]
+    assert len(users) == 1000 and "/users/42/" in users
+    assert built == []
+
+    # Longest prefix wins and only the touched backends are built
+    backend, key = comp._get_backend_and_key("/users/7/archive/old.txt")
+    assert key == "/old.txt" and built == ["7-archive"]
+    backend, key = comp._get_backend_and_key("/users/7/notes.txt")
+    assert key == "/notes.txt" and built == ["7-archive", "7"]
+    assert comp._get_backend_and_key("/users/7")[0] is comp.default
+    assert comp._get_backend_and_key("/users/70x/a.txt")[0] is comp.default
+
+    # Built backends are cached and evicted LRU
+    assert comp._get_backend_and_key("/users/7/other.txt")[0] is backend
+    comp._get_backend_and_key("/users/8/a.txt")
+    comp._get_backend_and_key("/users/9/a.txt")
+    assert list(comp._built_backends) == ["/users/8/", "/users/9/"]
+
+
+def test_composite_backend_root_search_skips_unbuilt_routes():
+    rt = make_runtime("t14b")
+    rt.state["files"]["/top.txt"] = {"content": ["hit"], "created_at": "", "modified_at": ""}
+    built: list[str] = []
+
+    def make_factory(user_id: str):
+        def factory():
+            built.append(user_id)
+            be = StateBackend(make_runtime(f"t14b-{user_id}"))
+            be.runtime.state["files"]["/note.txt"] = {"content": ["hit"], "created_at": "", "modified_at": ""}
+            return be
+        return factory
+
+    routes = {f"/users/{i}/": make_factory(str(i)) for i in range(500)}
+    comp = CompositeBackend(default=StateBackend(rt), routes=routes)
+
+    # A search from the root does not instantiate every per-user mount
+    assert [m["path"] for m in comp.grep_raw("hit", "/")] == ["/top.txt"]
+    assert [fi["path"] for fi in comp.glob_info("*.txt", "/")] == ["/top.txt"]
+    assert [m["path"] for m in comp.grep_page("hit", "/")] == ["/top.txt"]
+    assert [fi["path"] for fi in comp.glob_page("*.txt", "/")] == ["/top.txt"]
+    assert built == []
+    # Skipped mounts are named, up to a bound, so partial results are not mistaken for complete ones
+    (note,) = comp.consume_notes()
+    assert "/users/0/, /users/1/" in note and "and 480 more" in note
+
+    # Routes in use are searched, and searching inside a route builds it
+    assert [m["path"] for m in comp.grep_raw("hit", "/users/3/")] == ["/users/3/note.txt"]
+    assert [m["path"] for m in comp.grep_raw("hit", "/")] == ["/top.txt", "/users/3/note.txt"]
+    assert built == ["3"]
+    assert "/users/3/" not in comp.consume_notes()[0]
+
+    # Opting in searches every route
+    comp = CompositeBackend(default=StateBackend(rt), routes=routes, search_unbuilt_routes=True)
+    assert len(comp.glob_info("*.txt", "/")) == 501
+
+
+def test_composite_backend_paging_merges_routes():
+    rt = make_runtime("t15")
+    default = StateBackend(rt)
+    for p in ["/a.txt", "/z.txt"]:
+        rt.state["files"][p] = {"content": ["hit", "hit"], "created_at": "", "modified_at": ""}
+    routed = StateBackend(make_runtime("t15b"))
+    routed.runtime.state["files"]["/m.txt"] = {"content": ["hit"], "created_at": "", "modified_at": ""}
+    comp = CompositeBackend(default=default, routes={"/mem/": routed})
+
+    page = comp.grep_page("hit", limit=3)
+    assert [(m["path"], m["line"]) for m in page] == [("/a.txt", 1), ("/a.txt", 2), ("/mem/m.txt", 1)]
+    page = comp.grep_page("hit", start_after=("/mem/m.txt", 1), limit=3)
+    assert [(m["path"], m["line"]) for m in page] == [("/z.txt", 1), ("/z.txt", 2)]
+    assert [fi["path"] for fi in comp.glob_page("*.txt", start_after="/a.txt")] == ["/mem/m.txt", "/z.txt"]
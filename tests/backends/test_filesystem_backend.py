@@ -1,8 +1,10 @@
 import os
 from pathlib import Path
 
+import pytest
+
 from deepagents.backends.filesystem import FilesystemBackend
-from deepagents.backends.protocol import WriteResult, EditResult
+from deepagents.backends.protocol import WriteResult, EditResult, list_tree
 
 
 def write_file(p: Path, content: str):
@@ -190,6 +192,31 @@ def test_filesystem_backend_ls_trailing_slash(tmp_path: Path):
     assert empty == []
 
 
+
+def test_filesystem_backend_tree_info_matches_ls_walk(tmp_path: Path):
+    for rel in ["src/main.py", "src/utils/helper.py", "src/utils/deep/x.py", "src-old.txt", "docs/readme.md"]:
+        write_file(tmp_path / rel, "x")
+    (tmp_path / "empty").mkdir()
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    class LsOnly:
+        def ls_info(self, path):
+            return be.ls_info(path)
+
+    for depth in (1, 2, 3):
+        for max_entries in (3, 100):
+            assert be.tree_info("/", depth, max_entries) == list_tree(LsOnly(), "/", depth, max_entries)
+    assert [fi["path"] for fi in be.tree_info("/", 2, 100)] == [
+        "/docs/",
+        "/docs/readme.md",
+        "/empty/",
+        "/src-old.txt",
+        "/src/",
+        "/src/main.py",
+        "/src/utils/",
+    ]
+    assert be.tree_info("/missing", 2, 100) == []
+
 def test_filesystem_backend_intercept_large_tool_result(tmp_path: Path):
     """Test that FilesystemBackend properly handles large tool result interception."""
     from deepagents.middleware.filesystem import FilesystemMiddleware
@@ -221,3 +248,365 @@ def test_filesystem_backend_intercept_large_tool_result(tmp_path: Path):
     saved_file = root / "large_tool_results" / "test_fs_123"
     assert saved_file.exists()
     assert saved_file.read_text() == large_content
+
+
+def test_filesystem_backend_metadata_cache(tmp_path: Path):
+    root = tmp_path
+    write_file(root / "a.txt", "a")
+    write_file(root / "dir" / "b.py", "b")
+
+    be = FilesystemBackend(root_dir=str(root), virtual_mode=True, cache_metadata=True)
+
+    first = [fi["path"] for fi in be.ls_info("/")]
+    second = [fi["path"] for fi in be.ls_info("/")]
+    assert first == second == ["/a.txt", "/dir/"]
+    assert be.cache_stats.hits == 1 and be.cache_stats.misses == 1
+
+    assert [fi["path"] for fi in be.glob_info("**/*.py", path="/")] == ["/dir/b.py"]
+    be.glob_info("**/*.py", path="/")
+    assert be.cache_stats.hits == 2
+
+    # Own writes invalidate the parent listing and ancestor globs
+    be.write("/dir/c.py", "c")
+    assert [fi["path"] for fi in be.glob_info("**/*.py", path="/")] == ["/dir/b.py", "/dir/c.py"]
+    be.write("/new/deep/d.txt", "d")
+    assert "/new/" in [fi["path"] for fi in be.ls_info("/")]
+
+    # Outside changes are picked up through the directory mtime
+    write_file(root / "outside.txt", "x")
+    os.utime(root, ns=(0, 0))
+    assert "/outside.txt" in [fi["path"] for fi in be.ls_info("/")]
+
+    # Returned listings are copies and do not corrupt the cache
+    listing = be.ls_info("/")
+    listing[0]["path"] = "/mutated"
+    assert be.ls_info("/")[0]["path"] != "/mutated"
+
+
+def test_filesystem_backend_metadata_cache_ttl(tmp_path: Path):
+    write_file(tmp_path / "a.txt", "a")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, cache_metadata=True, metadata_cache_ttl=0)
+    be.ls_info("/")
+    be.ls_info("/")
+    assert be.cache_stats.hits == 0 and be.cache_stats.misses == 2
+
+
+def test_filesystem_backend_metadata_cache_is_bounded(tmp_path: Path):
+    for i in range(4):
+        write_file(tmp_path / f"d{i}" / "f.txt", "x")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, cache_metadata=True, metadata_cache_size=2)
+    for i in range(4):
+        be.ls_info(f"/d{i}/")
+        be.glob_info(f"*{i}*", path="/")
+    assert len(be._ls_cache) == 2 and len(be._glob_cache) == 2
+
+    # Recently used entries survive eviction
+    be.ls_info("/d2/")
+    be.ls_info("/d0/")
+    assert list(be._ls_cache) == [str(tmp_path / "d2"), str(tmp_path / "d0")]
+
+
+def test_filesystem_backend_streaming_edit(tmp_path: Path, monkeypatch):
+    import deepagents.backends.filesystem as fs_module
+
+    # Tiny chunks force matches to straddle chunk boundaries
+    monkeypatch.setattr(fs_module, "STREAM_EDIT_CHUNK_CHARS", 7)
+    content = "alpha beta\n" * 50 + "unique-marker\n"
+    write_file(tmp_path / "big.txt", content)
+    os.chmod(tmp_path / "big.txt", 0o640)
+
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, stream_edit_threshold_mb=0)
+
+    res = be.edit("/big.txt", "beta", "gamma")
+    assert res.error is not None and "appears 50 times" in res.error
+    assert (tmp_path / "big.txt").read_text() == content
+
+    res = be.edit("/big.txt", "missing", "x")
+    assert res.error is not None and "not found" in res.error
+
+    res = be.edit("/big.txt", "beta\nalpha", "B\nA", replace_all=True)
+    assert res.error is None and res.occurrences == 49
+    assert (tmp_path / "big.txt").read_text() == content.replace("beta\nalpha", "B\nA")
+
+    res = be.edit("/big.txt", "unique-marker", "done")
+    assert res.error is None and res.occurrences == 1
+    assert (tmp_path / "big.txt").read_text().endswith("done\n")
+
+    # Permissions survive the rename and no temp files are left behind
+    assert (tmp_path / "big.txt").stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["big.txt"]
+
+
+def test_filesystem_backend_edit_keeps_symlinks(tmp_path: Path):
+    write_file(tmp_path / "real" / "config.txt", "mode = fast\nlevel = 1")
+    link = tmp_path / "config.txt"
+    link.symlink_to(tmp_path / "real" / "config.txt")
+
+    be = FilesystemBackend(root_dir=str(tmp_path))
+    assert be.edit(str(link), "fast", "safe").error is None
+    assert be.edit_many(str(link), [("level = 1", "level = 2", False)]).error is None
+
+    assert link.is_symlink()
+    assert (tmp_path / "real" / "config.txt").read_text() == "mode = safe\nlevel = 2"
+
+
+def test_filesystem_backend_resolved_path_cache(tmp_path: Path):
+    write_file(tmp_path / "a.txt", "hello")
+    be = FilesystemBackend(root_dir=str(tmp_path), path_cache_size=2)
+
+    assert be._resolve_path("a.txt") == tmp_path.resolve() / "a.txt"
+    assert "a.txt" in be._path_cache
+    be._resolve_path("b.txt")
+    be._resolve_path("c.txt")
+    assert list(be._path_cache) == ["b.txt", "c.txt"]
+
+    # Writes that create directories drop cached resolutions
+    be.write(str(tmp_path / "newdir" / "file.txt"), "x")
+    assert len(be._path_cache) == 0
+    assert "hello" in be.read("a.txt")
+
+
+def test_filesystem_backend_virtual_mode_rechecks_every_resolution(tmp_path: Path):
+    root = tmp_path / "root"
+    write_file(root / "sub" / "notes.txt", "inside")
+    write_file(tmp_path / "outside" / "notes.txt", "SECRET")
+    be = FilesystemBackend(root_dir=str(root), virtual_mode=True, path_cache_ttl=3600)
+    assert "inside" in be.read("/sub/notes.txt")
+
+    # A directory swapped for a symlink out of the root is refused right away
+    (root / "sub" / "notes.txt").unlink()
+    (root / "sub").rmdir()
+    (root / "sub").symlink_to(tmp_path / "outside")
+    with pytest.raises(ValueError, match="outside root"):
+        be.read("/sub/notes.txt")
+    assert len(be._path_cache) == 0
+
+
+def test_filesystem_backend_edit_many(tmp_path: Path):
+    from deepagents.backends.protocol import apply_edits
+
+    write_file(tmp_path / "a.py", "def f():\n    return f\n")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    res = be.edit_many("/a.py", [("return f", "return g", False), ("f", "g", False)])
+    assert res.error is not None and "Edit 2 of 2 failed" in res.error
+    assert (tmp_path / "a.py").read_text() == "def f():\n    return f\n"
+
+    res = be.edit_many("/a.py", [("return f", "return g", False), ("f()", "g()", False)])
+    assert res.error is None and res.occurrences_per_edit == [1, 1]
+    assert (tmp_path / "a.py").read_text() == "def g():\n    return g\n"
+
+    class EditOnly:
+        def edit(self, *args, **kwargs):
+            return be.edit(*args, **kwargs)
+
+    # Backends without edit_many fall back to sequential edit() calls
+    res = apply_edits(EditOnly(), "/a.py", [("def g", "def h", False), ("missing", "x", False)])
+    assert res.error is not None and "Edits 1-1 were already applied" in res.error
+    assert (tmp_path / "a.py").read_text().startswith("def h():")
+
+
+def test_filesystem_backend_paging_skips_covered_subtrees(tmp_path: Path, monkeypatch):
+    for rel in ["a/x.txt", "a/b/y.txt", "a.txt", "a.d/z.txt", "c.py"]:
+        write_file(tmp_path / rel, "hit 1\nmiss\nhit 2\n")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    expected = sorted((m["path"], m["line"]) for m in be.grep_raw("hit"))
+    collected, start_after = [], None
+    while True:
+        page = be.grep_page("hit", start_after=start_after, limit=3)
+        collected += [(m["path"], m["line"]) for m in page]
+        if len(page) < 3:
+            break
+        start_after = (page[-1]["path"], page[-1]["line"])
+    assert collected == expected
+
+    # Resuming inside /a/ does not list /a.d/ again
+    listed: list[str] = []
+    original_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda p: listed.append(str(p)) or original_scandir(p))
+    page = be.grep_page("hit", start_after=("/a/b/y.txt", 1), limit=2)
+    assert [(m["path"], m["line"]) for m in page] == [("/a/b/y.txt", 3), ("/a/x.txt", 1)]
+    assert str(tmp_path / "a.d") not in listed
+
+    assert [fi["path"] for fi in be.glob_page("*.txt", start_after="/a.txt")] == ["/a/b/y.txt", "/a/x.txt"]
+
+
+def test_filesystem_backend_ripgrep_context_events(tmp_path: Path, monkeypatch):
+    import json
+    import subprocess
+    import types
+
+    lines = ["a", "hit 1", "b", "c", "d", "hit 2"]
+    write_file(tmp_path / "f.txt", "\n".join(lines))
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    def event(kind, n):
+        data = {"path": {"text": str(tmp_path / "f.txt")}, "line_number": n, "lines": {"text": lines[n - 1] + "\n"}}
+        return json.dumps({"type": kind, "data": data})
+
+    calls = []
+    events = [event("context", 1), event("match", 2), event("context", 3), event("context", 5), event("match", 6)]
+    monkeypatch.setattr(
+        subprocess, "run", lambda cmd, **_: calls.append(cmd) or types.SimpleNamespace(stdout="\n".join(events))
+    )
+    via_rg = be.grep_raw("hit", before=1, after=1)
+    assert "--before-context" in calls[0] and "--after-context" in calls[0]
+
+    # ripgrep and the Python fallback agree
+    monkeypatch.setattr(subprocess, "run", lambda *_, **__: (_ for _ in ()).throw(FileNotFoundError()))
+    assert via_rg == be.grep_raw("hit", before=1, after=1)
+    assert via_rg[1] == {"path": "/f.txt", "line": 6, "text": "hit 2", "context_before": ["d"], "context_after": []}
+
+
+def test_filesystem_backend_ripgrep_per_file_modes(tmp_path: Path, monkeypatch):
+    import subprocess
+    import types
+
+    write_file(tmp_path / "a.txt", "hit\nmiss\nhit")
+    write_file(tmp_path / "b.txt", "hit")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+    a, b = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+
+    outputs = {"--files-with-matches": f"{a}\0{b}\0", "--count": f"{a}\x002\n{b}\x001\n"}
+    calls = []
+
+    def fake_run(cmd, **_):
+        calls.append(cmd)
+        return types.SimpleNamespace(stdout=next(v for k, v in outputs.items() if k in cmd))
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    files = be.grep_raw("hit", output_mode="files_with_matches")
+    counts = be.grep_raw("hit", output_mode="count")
+    assert all("--json" not in cmd for cmd in calls)
+    assert files == [{"path": "/a.txt", "line": 0, "text": ""}, {"path": "/b.txt", "line": 0, "text": ""}]
+    assert [(m["path"], m["count"]) for m in counts] == [("/a.txt", 2), ("/b.txt", 1)]
+
+    # ripgrep and the Python fallback agree
+    monkeypatch.setattr(subprocess, "run", lambda *_, **__: (_ for _ in ()).throw(FileNotFoundError()))
+    assert sorted(be.grep_raw("hit", output_mode="files_with_matches"), key=lambda m: m["path"]) == files
+    assert sorted(be.grep_raw("hit", output_mode="count"), key=lambda m: m["path"]) == counts
+
+
+def _grep_tool(be: FilesystemBackend):
+    from langchain.tools import ToolRuntime
+
+    from deepagents.middleware.filesystem import FilesystemMiddleware
+
+    tool = next(t for t in FilesystemMiddleware(backend=be).tools if t.name == "grep")
+    runtime = ToolRuntime(state={"messages": []}, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+    return lambda **args: tool.invoke({**args, "runtime": runtime})
+
+
+def test_filesystem_backend_grep_page_skips_symlinks_out_of_root(tmp_path: Path, monkeypatch):
+    import subprocess
+
+    root = tmp_path / "root"
+    write_file(root / "sub" / "plain.txt", "SECRET=none")
+    write_file(tmp_path / "outside" / "secret.txt", "SECRET=hunter2")
+    (root / "sub" / "link.txt").symlink_to(tmp_path / "outside" / "secret.txt")
+    monkeypatch.setattr(subprocess, "run", lambda *_, **__: (_ for _ in ()).throw(FileNotFoundError()))
+
+    be = FilesystemBackend(root_dir=str(root), virtual_mode=True)
+    assert [m["path"] for m in be.grep_page("SECRET")] == ["/sub/plain.txt"]
+    out = _grep_tool(be)(pattern="SECRET", output_mode="content")
+    assert "hunter2" not in out and "/sub/link.txt" not in out
+
+    be = FilesystemBackend(root_dir=str(root), virtual_mode=False)
+    assert [m["path"] for m in be.grep_page("SECRET", str(root))] == [str(root / "sub" / "plain.txt")]
+
+
+def _fake_rg(monkeypatch, outputs):
+    import subprocess
+    import types
+
+    calls = []
+
+    def fake_run(cmd, **_):
+        calls.append(cmd)
+        return types.SimpleNamespace(stdout=next(v for k, v in outputs.items() if k in cmd))
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    return calls
+
+
+def _rg_event(kind, path, n, text):
+    import json
+
+    return json.dumps({"type": kind, "data": {"path": {"text": path}, "line_number": n, "lines": {"text": text + "\n"}}})
+
+
+def test_grep_tool_uses_ripgrep_on_filesystem_backend(tmp_path: Path, monkeypatch):
+    write_file(tmp_path / "b.txt", "hit")
+    write_file(tmp_path / "a.txt", "x\nhit\nhit")
+    a, b = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+    # rg output is unordered; pages are sorted by path
+    events = [_rg_event("match", b, 1, "hit"), _rg_event("match", a, 2, "hit"), _rg_event("match", a, 3, "hit")]
+    calls = _fake_rg(monkeypatch, {"--json": "\n".join(events)})
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    content = _grep_tool(be)(pattern="hit", output_mode="content")
+    assert calls and "--json" in calls[-1]
+    assert content.index("/a.txt") < content.index("/b.txt")
+    page = be.grep_page("hit", start_after=("/a.txt", 2), limit=1)
+    assert [(m["path"], m["line"]) for m in page] == [("/a.txt", 3)]
+
+
+def test_grep_page_resumes_ripgrep_after_the_cursor(tmp_path: Path, monkeypatch):
+    import subprocess
+    import types
+
+    from deepagents.backends import filesystem
+
+    names = [f"f{i}.txt" for i in range(6)]
+    for name in names:
+        write_file(tmp_path / name, "hit\nhit")
+    searched = []
+
+    def fake_run(cmd, **_):
+        files = cmd[cmd.index("--") + 2:]
+        searched.append([Path(f).name for f in files])
+        events = [_rg_event("match", f, n, "hit") for f in files for n in (1, 2)]
+        return types.SimpleNamespace(stdout="\n".join(events))
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    monkeypatch.setattr(filesystem, "RG_PAGE_BATCH_FILES", 2)
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    # A page only runs rg over the batches it needs
+    page = be.grep_page("hit", limit=3)
+    assert [(m["path"], m["line"]) for m in page] == [("/f0.txt", 1), ("/f0.txt", 2), ("/f1.txt", 1)]
+    assert searched == [["f0.txt", "f1.txt"]]
+
+    # Resuming starts at the cursor's file instead of rescanning the tree
+    searched.clear()
+    page = be.grep_page("hit", start_after=("/f3.txt", 1), limit=100)
+    assert [(m["path"], m["line"]) for m in page][:2] == [("/f3.txt", 2), ("/f4.txt", 1)]
+    assert len(page) == 5
+    assert searched == [["f3.txt", "f4.txt"], ["f5.txt"]]
+
+
+def test_grep_tool_passes_context_to_ripgrep(tmp_path: Path, monkeypatch):
+    write_file(tmp_path / "a.txt", "x\nhit\ny")
+    a = str(tmp_path / "a.txt")
+    events = [_rg_event("context", a, 1, "x"), _rg_event("match", a, 2, "hit"), _rg_event("context", a, 3, "y")]
+    calls = _fake_rg(monkeypatch, {"--json": "\n".join(events)})
+    grep = _grep_tool(FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True))
+
+    content = grep(pattern="hit", output_mode="content", before=1, after=1)
+    assert "--before-context" in calls[-1] and "--after-context" in calls[-1]
+    assert "x" in content and "y" in content
+
+
+def test_grep_tool_uses_ripgrep_per_file_modes(tmp_path: Path, monkeypatch):
+    write_file(tmp_path / "b.txt", "hit")
+    write_file(tmp_path / "a.txt", "hit\nhit")
+    a, b = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+    calls = _fake_rg(monkeypatch, {"--files-with-matches": f"{b}\0{a}\0", "--count": f"{b}\x001\n{a}\x002\n"})
+    grep = _grep_tool(FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True))
+
+    assert grep(pattern="hit").split("\n") == ["/a.txt", "/b.txt"]
+    assert "--files-with-matches" in calls[-1]
+    assert grep(pattern="hit", output_mode="count").split("\n") == ["/a.txt: 2", "/b.txt: 1"]
+    assert "--count" in calls[-1]
+    assert all("--json" not in cmd for cmd in calls)
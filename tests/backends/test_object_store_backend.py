@@ -0,0 +1,129 @@
+from pathlib import Path
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from deepagents.backends.object_store import LINE_INDEX_STRIDE, ObjectStoreBackend  # noqa: E402
+
+
+class _RecordingClient:
+    """Forward to a boto3 client and record get_object calls."""
+
+    def __init__(self, client):
+        self._client = client
+        self.gets = []
+
+    def get_object(self, **kwargs):
+        self.gets.append(kwargs)
+        return self._client.get_object(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+@pytest.fixture
+def s3_client():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="agent-files")
+        yield client
+
+
+def test_object_store_crud_and_listing(s3_client):
+    be = ObjectStoreBackend("agent-files", prefix="run-1", client=s3_client)
+
+    assert be.write("/notes/a.txt", "hello\nworld").error is None
+    assert "already exists" in be.write("/notes/a.txt", "again").error
+    assert "world" in be.read("/notes/a.txt", offset=1, limit=1)
+    assert "not found" in be.read("/missing.txt")
+
+    res = be.edit("/notes/a.txt", "world", "there")
+    assert res.error is None and res.occurrences == 1
+    assert "there" in be.read("/notes/a.txt")
+    assert "not found" in be.edit("/nope.txt", "a", "b").error
+
+    for p in ["/notes/sub/b.md", "/notes/sub/deep/c.txt", "/top.txt"]:
+        be.write(p, f"content of {p}")
+    assert [fi["path"] for fi in be.ls_info("/")] == ["/notes/", "/top.txt"]
+    assert [fi["path"] for fi in be.ls_info("/notes/")] == ["/notes/a.txt", "/notes/sub/"]
+    assert [fi["path"] for fi in be.glob_info("**/*.txt", "/")] == ["/notes/a.txt", "/notes/sub/deep/c.txt", "/top.txt"]
+    assert [fi["path"] for fi in be.glob_info("*.md", "/notes/sub/")] == ["/notes/sub/b.md"]
+
+    assert [(m["path"], m["line"]) for m in be.grep_raw("content|there", "/")] == [
+        ("/notes/a.txt", 2),
+        ("/notes/sub/b.md", 1),
+        ("/notes/sub/deep/c.txt", 1),
+        ("/top.txt", 1),
+    ]
+    assert [m["path"] for m in be.grep_raw("content", "/notes", glob="*.md")] == ["/notes/sub/b.md"]
+
+    # Another prefix in the same bucket is isolated
+    other = ObjectStoreBackend("agent-files", prefix="run-2/", client=s3_client)
+    assert other.ls_info("/") == []
+
+
+def test_object_store_ranged_read_uses_sidecar(s3_client):
+    client = _RecordingClient(s3_client)
+    be = ObjectStoreBackend("agent-files", client=client, cache_object_max_bytes=0)
+    lines = [f"line {i} ü" for i in range(LINE_INDEX_STRIDE * 4)]
+    be.write("/big.txt", "\n".join(lines))
+
+    client.gets.clear()
+    out = be.read("/big.txt", offset=600, limit=3)
+    assert "line 600 ü" in out and "line 602 ü" in out and "line 603" not in out
+    assert out.split("\t")[0].strip() == "601"
+    ranged = [g for g in client.gets if "Range" in g]
+    assert len(ranged) == 1 and ranged[0]["Range"] != "bytes=0-"
+    assert "exceeds file length (1024 lines)" in be.read("/big.txt", offset=2000)
+
+    # A change by another writer invalidates the sidecar; the read falls back to a full GET
+    s3_client.put_object(Bucket="agent-files", Key="big.txt", Body=b"replaced\ncontent")
+    assert "content" in be.read("/big.txt", offset=1, limit=1)
+
+
+def test_object_store_small_read_skips_sidecar(s3_client):
+    client = _RecordingClient(s3_client)
+    be = ObjectStoreBackend("agent-files", client=client)
+    be.write("/small.txt", "one\ntwo\nthree")
+
+    client.gets.clear()
+    assert "two" in be.read("/small.txt", offset=1, limit=1)
+    assert [g["Key"] for g in client.gets] == ["small.txt"]
+
+
+def test_object_store_grep_downloads_in_batches(s3_client, monkeypatch):
+    from deepagents.backends import object_store
+
+    monkeypatch.setattr(object_store, "_GREP_BATCH_SIZE", 3)
+    be = ObjectStoreBackend("agent-files", client=s3_client)
+    batches = []
+    parallel = be._parallel
+    monkeypatch.setattr(be, "_parallel", lambda calls: batches.append(len(calls)) or parallel(calls))
+    for i in range(7):
+        be.write(f"/logs/{i}.txt", f"entry {i}\nneedle" if i % 2 else f"entry {i}")
+
+    assert [m["path"] for m in be.grep_raw("needle", "/logs")] == ["/logs/1.txt", "/logs/3.txt", "/logs/5.txt"]
+    assert batches[-3:] == [3, 3, 1]
+
+
+def test_object_store_disk_cache(s3_client, tmp_path: Path):
+    client = _RecordingClient(s3_client)
+    be = ObjectStoreBackend("agent-files", client=client, cache_dir=tmp_path / "cache", cache_ttl=60)
+    be.write("/a.txt", "cached body")
+
+    client.gets.clear()
+    for _ in range(3):
+        assert "cached body" in be.read("/a.txt")
+    assert client.gets == []
+    assert be.cache_stats.hits == 3
+
+    be.edit("/a.txt", "body", "text")
+    assert "cached text" in be.read("/a.txt")
+
+    # Expired entries are revalidated with If-None-Match
+    be.cache_ttl = 0
+    client.gets.clear()
+    assert "cached text" in be.read("/a.txt")
+    assert any("IfNoneMatch" in g for g in client.gets)
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+from langchain.tools import ToolRuntime
+from langgraph.store.memory import InMemoryStore
+
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.sharded import ShardedBackend
+from deepagents.backends.state import StateBackend
+from deepagents.backends.store import StoreBackend
+
+
+def make_store_shards(n: int):
+    rt = ToolRuntime(
+        state={"messages": []},
+        context=None,
+        tool_call_id="ts",
+        store=InMemoryStore(),
+        stream_writer=lambda _: None,
+        config={},
+    )
+    return [StoreBackend(rt, namespace=("shard", str(i))) for i in range(n)]
+
+
+def test_sharded_backend_routes_and_merges():
+    shards = make_store_shards(3)
+    be = ShardedBackend(shards)
+
+    paths = [f"/results/task_{i}.md" for i in range(30)]
+    for p in paths:
+        assert be.write(p, f"output of {p}").error is None
+
+    # Every file lives on exactly one shard, and load is spread out
+    per_shard = [len(s.glob_info("**/*.md", "/")) for s in shards]
+    assert sum(per_shard) == 30 and all(n > 0 for n in per_shard)
+
+    assert "output of /results/task_7.md" in be.read("/results/task_7.md")
+    assert be.edit("/results/task_7.md", "output", "final").occurrences == 1
+
+    assert [fi["path"] for fi in be.ls_info("/results/")] == sorted(paths)
+    assert [fi["path"] for fi in be.ls_info("/")] == ["/results/"]
+    assert [fi["path"] for fi in be.glob_info("**/*.md", "/")] == sorted(paths)
+
+    matches = be.grep_raw("final", "/")
+    assert [m["path"] for m in matches] == ["/results/task_7.md"]
+    assert isinstance(be.grep_raw("[", "/"), str)
+
+
+def test_sharded_backend_add_shard_rebalances(tmp_path: Path):
+    shards = [FilesystemBackend(root_dir=str(tmp_path / f"s{i}"), virtual_mode=True) for i in range(2)]
+    for s in shards:
+        Path(s.cwd).mkdir(parents=True, exist_ok=True)
+    be = ShardedBackend(shards)
+    paths = [f"/docs/{i}.txt" for i in range(60)]
+    for p in paths:
+        be.write(p, f"line one {p}\nline two")
+
+    new_root = tmp_path / "s2"
+    new_root.mkdir()
+    moved = be.add_shard(FilesystemBackend(root_dir=str(new_root), virtual_mode=True))
+
+    owned_by_new = [p for p in paths if be.shard_index(p) == 2]
+    assert moved == len(owned_by_new) and 0 < moved < 60
+    for p in owned_by_new:
+        assert (new_root / p.lstrip("/")).read_text() == f"line one {p}\nline two"
+
+    # Stale copies on the previous owner are not reported twice
+    assert [fi["path"] for fi in be.glob_info("**/*.txt", "/")] == sorted(paths)
+    assert len(be.grep_raw("line two", "/")) == 60
+
+
+def test_sharded_backend_rebalance_keeps_exact_content(tmp_path: Path):
+    shards = [FilesystemBackend(root_dir=str(tmp_path / f"s{i}"), virtual_mode=True) for i in range(2)]
+    be = ShardedBackend(shards)
+    paths = [f"/notes/{i}.md" for i in range(40)]
+    for p in paths:
+        be.write(p, f"# {p}\n\nbody\n")
+
+    new_root = tmp_path / "s2"
+    assert be.add_shard(FilesystemBackend(root_dir=str(new_root), virtual_mode=True)) > 0
+    for p in paths:
+        if be.shard_index(p) == 2:
+            assert (new_root / p.lstrip("/")).read_text() == f"# {p}\n\nbody\n"
+
+
+def test_sharded_backend_refuses_to_rebalance_state_shards():
+    rt = ToolRuntime(state={"messages": [], "files": {}}, context=None, tool_call_id="ts", store=None, stream_writer=lambda _: None, config={})
+    be = ShardedBackend([StateBackend(rt)])
+    with pytest.raises(ValueError, match="StateBackend"):
+        be.add_shard(StateBackend(rt))
+    assert len(be.shards) == 1
+    with pytest.raises(ValueError, match="StateBackend"):
+        be.rebalance()
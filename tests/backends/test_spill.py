@@ -0,0 +1,43 @@
+import os
+import time
+from pathlib import Path
+
+from langchain.tools import ToolRuntime
+
+from deepagents.backends.spill import ToolResultSpill
+from deepagents.backends.utils import head_lines
+
+
+def _runtime(thread_id: str) -> ToolRuntime:
+    return ToolRuntime(
+        state={"messages": []}, context=None, tool_call_id="t", store=None, stream_writer=lambda _: None,
+        config={"configurable": {"thread_id": thread_id}},
+    )
+
+
+def _age(directory: Path, seconds: float) -> None:
+    past = time.time() - seconds
+    for f in [directory, *directory.rglob("*")]:
+        os.utime(f, (past, past))
+
+
+def test_spill_retention_by_age_and_size(tmp_path: Path):
+    spill = ToolResultSpill(tmp_path, max_age=3600, max_bytes=150)
+    for thread_id in ["old", "mid", "new"]:
+        assert spill.backend_for(_runtime(thread_id)).write("/result", "x" * 100).error is None
+    _age(spill.thread_dir("old"), 7200)
+    _age(spill.thread_dir("mid"), 60)
+
+    # "old" exceeds max_age; "mid" is then the oldest while the total exceeds max_bytes
+    assert spill.collect() == 2
+    assert sorted(d.name for d in tmp_path.iterdir()) == ["new"]
+
+    # Threads without an id share a fallback directory; ids cannot escape the root
+    assert spill.backend_for(ToolRuntime(state={}, context=None, tool_call_id="t", store=None, stream_writer=lambda _: None, config={})).cwd.parent == tmp_path.resolve()
+    assert spill.thread_dir("../etc").parent == tmp_path.resolve()
+
+
+def test_head_lines_matches_splitlines_prefix():
+    for content in ["", "a", "a\n", "a\r\nb\r\n", "\n\nx", "\n".join(str(i) for i in range(50))]:
+        for n in [0, 1, 3, 10]:
+            assert head_lines(content, n) == content.splitlines()[:n], (content, n)
@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.sqlite import SqliteBackend, _required_literal
+
+
+def test_sqlite_backend_crud_and_listing(tmp_path: Path):
+    be = SqliteBackend(tmp_path / "files.db")
+
+    res = be.write("/docs/readme.md", "hello sqlite\nsecond line")
+    assert isinstance(res, WriteResult) and res.error is None and res.files_update is None
+    assert be.write("/docs/readme.md", "again").error is not None
+
+    assert "hello sqlite" in be.read("/docs/readme.md")
+    assert "second line" in be.read("/docs/readme.md", offset=1, limit=1)
+    assert "not found" in be.read("/missing.txt")
+
+    res2 = be.edit("/docs/readme.md", "hello", "hi")
+    assert isinstance(res2, EditResult) and res2.error is None and res2.occurrences == 1
+    assert "appears" in be.edit("/docs/readme.md", "i", "I").error
+
+    for p in ["/docs/a.txt", "/docs/sub/b.txt", "/docs/sub/deep/c.txt", "/docsx.txt", "/top.txt"]:
+        be.write(p, p)
+    assert [fi["path"] for fi in be.ls_info("/docs/")] == ["/docs/a.txt", "/docs/readme.md", "/docs/sub/"]
+    assert [fi["path"] for fi in be.ls_info("/")] == ["/docs/", "/docsx.txt", "/top.txt"]
+    assert be.ls_info("/nothing/") == []
+
+    assert [fi["path"] for fi in be.glob_info("**/*.txt", "/docs")] == ["/docs/a.txt", "/docs/sub/b.txt", "/docs/sub/deep/c.txt"]
+    assert [fi["path"] for fi in be.glob_info("*.txt", "/")] == ["/docsx.txt", "/top.txt"]
+    assert [fi["path"] for fi in be.glob_info("sub/**/*.txt", "/docs/")] == ["/docs/sub/b.txt", "/docs/sub/deep/c.txt"]
+
+    # Data survives reopening the database
+    be.close()
+    reopened = SqliteBackend(tmp_path / "files.db")
+    assert "hi sqlite" in reopened.read("/docs/readme.md")
+
+
+def test_sqlite_backend_grep_prefilter_matches_full_scan():
+    indexed = SqliteBackend()
+    plain = SqliteBackend(full_text_index=False)
+    files = {
+        "/a.py": "import os\nERROR: disk full\nprint('x')",
+        "/b.py": "error: 42 retries\nok",
+        "/sub/c.md": "no problems here",
+    }
+    for be in (indexed, plain):
+        for p, c in files.items():
+            be.write(p, c)
+        be.edit("/sub/c.md", "no problems", "error: late")
+
+    for pattern in ["error: \\d+", "(?i)error", "ERROR|ok", "disk", "late$", "x"]:
+        assert indexed.grep_raw(pattern, "/") == plain.grep_raw(pattern, "/"), pattern
+
+    assert indexed.grep_raw("error", "/sub") == [{"path": "/sub/c.md", "line": 1, "text": "error: late here"}]
+    assert [m["path"] for m in indexed.grep_raw("error", "/", glob="*.py")] == ["/b.py"]
+    assert isinstance(indexed.grep_raw("[", "/"), str)
+
+
+
+def test_sqlite_backend_grep_per_file_modes():
+    be = SqliteBackend()
+    be.write("/a.txt", "hit\nmiss\nhit")
+    be.write("/b.txt", "miss")
+    be.write("/c.txt", "hit")
+
+    assert be.grep_raw("hit", "/", output_mode="files_with_matches") == [
+        {"path": "/a.txt", "line": 0, "text": ""},
+        {"path": "/c.txt", "line": 0, "text": ""},
+    ]
+    assert [(m["path"], m["count"]) for m in be.grep_raw("hit", "/", output_mode="count")] == [("/a.txt", 2), ("/c.txt", 1)]
+    # A reported file is not reported again when paging resumes after it
+    page = be.grep_page("hit", "/", start_after=("/a.txt", sys.maxsize), limit=5, output_mode="count")
+    assert [(m["path"], m["count"]) for m in page] == [("/c.txt", 1)]
+
+def test_required_literal_extraction():
+    assert _required_literal("error: \\d+") == "error: "
+    assert _required_literal("foo|barbaz") is None
+    assert _required_literal("ab") is None
+    assert _required_literal("(?i)café latte") == " latte"
+
+
+def test_sqlite_backend_read_many_matches_read():
+    be = SqliteBackend()
+    be.write("/a.txt", "one\ntwo\nthree")
+    be.write("/b.txt", "")
+    requests = [("/a.txt", 1, 1), ("/missing.txt", 0, 10), ("/b.txt", 0, 10), ("/a.txt", 0, 2000)]
+    assert be.read_many(requests) == [be.read(p, offset=o, limit=l) for p, o, l in requests]
+    assert be.read_many([]) == []
+
+
+def test_sqlite_backend_paging_resumes_in_path_order(monkeypatch):
+    import deepagents.backends.sqlite as sqlite_module
+
+    monkeypatch.setattr(sqlite_module, "_GREP_BATCH_SIZE", 2)
+    monkeypatch.setattr(sqlite_module, "_LS_BATCH_SIZE", 2)
+    be = SqliteBackend()
+    for i in range(5):
+        be.write(f"/src/f{i}.py", "needle\nhay\nneedle")
+    be.write("/src/notes.txt", "needle")
+
+    expected = sorted((m["path"], m["line"]) for m in be.grep_raw("needle", path="/src", glob="*.py"))
+    pages, start_after = [], None
+    while True:
+        page = be.grep_page("needle", path="/src", glob="*.py", start_after=start_after, limit=3)
+        pages.append([(m["path"], m["line"]) for m in page])
+        if len(page) < 3:
+            break
+        start_after = (page[-1]["path"], page[-1]["line"])
+    assert [pos for page in pages for pos in page] == expected
+    assert pages[0] == [("/src/f0.py", 1), ("/src/f0.py", 3), ("/src/f1.py", 1)]
+
+    assert [fi["path"] for fi in be.glob_page("*.py", path="/src", start_after="/src/f1.py", limit=2)] == ["/src/f2.py", "/src/f3.py"]
+    assert [fi["path"] for fi in be.glob_page("*.py", path="/src", start_after="/src/f3.py")] == ["/src/f4.py"]
@@ -1,7 +1,7 @@
 import pytest
 from langchain.tools import ToolRuntime
 from langchain_core.messages import ToolMessage
-from deepagents.backends.protocol import WriteResult, EditResult
+from deepagents.backends.protocol import WriteResult, EditResult, list_tree
 
 from deepagents.backends.state import StateBackend
 
@@ -119,6 +119,27 @@ def test_state_backend_ls_nested_directories():
     assert empty_listing == []
 
 
+
+def test_state_backend_tree_info_matches_ls_walk():
+    rt = make_runtime()
+    be = StateBackend(rt)
+    for path in ["/src/main.py", "/src/utils/helper.py", "/src/utils/deep/x.py", "/src-old.txt", "/docs/readme.md"]:
+        rt.state["files"].update(be.write(path, "x").files_update)
+
+    class LsOnly:
+        def ls_info(self, path):
+            return be.ls_info(path)
+
+    for depth in (1, 2, 3):
+        for max_entries in (2, 100):
+            assert be.tree_info("/", depth, max_entries) == list_tree(LsOnly(), "/", depth, max_entries)
+    assert [fi["path"] for fi in be.tree_info("/src", 2, 100)] == [
+        "/src/main.py",
+        "/src/utils/",
+        "/src/utils/deep/",
+        "/src/utils/helper.py",
+    ]
+
 def test_state_backend_ls_trailing_slash():
     rt = make_runtime()
     be = StateBackend(rt)
@@ -162,3 +183,47 @@ def test_state_backend_intercept_large_tool_result():
     assert "/large_tool_results/test_123" in result.update["files"]
     assert result.update["files"]["/large_tool_results/test_123"]["content"] == [large_content]
     assert "Tool result too large" in result.update["messages"][0].content
+
+
+def test_state_backend_reads_through_base_files():
+    from deepagents.backends.utils import create_file_data
+
+    base = {"/shared.txt": create_file_data("parent copy"), "/dir/a.txt": create_file_data("alpha")}
+    rt = make_runtime()
+    rt.state["base_files"] = base
+    be = StateBackend(rt)
+
+    assert "parent copy" in be.read("/shared.txt")
+    assert be.write("/shared.txt", "again").error is not None
+
+    res = be.edit("/shared.txt", "parent", "child")
+    assert res.error is None
+    rt.state["files"].update(res.files_update)
+    assert "child copy" in be.read("/shared.txt")
+    assert set(rt.state["files"]) == {"/shared.txt"}
+    assert "parent copy" in "".join(base["/shared.txt"]["content"])
+
+    assert [i["path"] for i in be.ls_info("/")] == ["/dir/", "/shared.txt"]
+    assert [m["path"] for m in be.grep_raw("alpha")] == ["/dir/a.txt"]
+    assert sorted(i["path"] for i in be.glob_info("**/*.txt")) == ["/dir/a.txt", "/shared.txt"]
+
+
+def test_apply_edits_fallback_folds_state_updates():
+    from deepagents.backends.protocol import apply_edits
+    from deepagents.backends.utils import create_file_data, file_data_to_string
+
+    rt = make_runtime({"/a.py": create_file_data("def f():\n    return f\n")})
+    be = StateBackend(rt)
+
+    class EditOnly:
+        def edit(self, *args, **kwargs):
+            return be.edit(*args, **kwargs)
+
+    # Each edit sees the previous one although the state is only updated at the end
+    res = apply_edits(EditOnly(), "/a.py", [("return f", "return g", False), ("f()", "g()", False)])
+    assert res.error is None and res.occurrences_per_edit == [1, 1]
+    assert file_data_to_string(res.files_update["/a.py"]) == "def g():\n    return g\n"
+
+    res = apply_edits(EditOnly(), "/a.py", [("return f", "return g", False), ("missing", "x", False)])
+    assert res.error is not None and "Edit 2 of 2 failed, no changes were made" in res.error
+    assert res.files_update is None
@@ -136,3 +136,28 @@ def test_store_backend_intercept_large_tool_result():
     stored_content = rt.store.get(("filesystem",), "/large_tool_results/test_456")
     assert stored_content is not None
     assert stored_content.value["content"] == [large_content]
+
+
+def test_store_backend_edit_many_single_round_trip():
+    puts = []
+
+    class CountingStore(InMemoryStore):
+        def put(self, *args, **kwargs):
+            puts.append(args)
+            return super().put(*args, **kwargs)
+
+    rt = ToolRuntime(state={"messages": []}, context=None, tool_call_id="t2", store=CountingStore(), stream_writer=lambda _: None, config={})
+    be = StoreBackend(rt)
+    be.write("/cfg.ini", "host=a\nport=1\nhost_alt=a")
+    puts.clear()
+
+    res = be.edit_many("/cfg.ini", [("=a", "=b", True), ("port=1", "port=2", False), ("absent", "x", False)])
+    assert res.error is not None and res.error.startswith("Error: Edit 3 of 3 failed")
+    assert puts == []
+    assert "port=1" in be.read("/cfg.ini")
+
+    res = be.edit_many("/cfg.ini", [("=a", "=b", True), ("port=1", "port=2", False)])
+    assert res.error is None and res.files_update is None
+    assert res.occurrences_per_edit == [2, 1] and res.occurrences == 3
+    assert len(puts) == 1
+    assert "host_alt=b" in be.read("/cfg.ini")
@@ -0,0 +1,62 @@
+import asyncio
+
+from langchain_core.tools import tool
+
+from deepagents.factory_cache import cached_agent_factory, tools_fingerprint
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+@tool
+def fetch(url: str) -> str:
+    """Fetch a page."""
+    return url
+
+
+def test_sync_factory_builds_once():
+    builds = []
+
+    @cached_agent_factory()
+    def agent():
+        builds.append(1)
+        return object()
+
+    first = agent()
+    assert agent() is first
+    assert len(builds) == 1
+    assert agent.cache.stats.hits == 1
+    assert agent.cache.stats.misses == 1
+    assert agent.cache.stats.saved_seconds == agent.cache.stats.last_saved_seconds
+
+    agent.cache.invalidate()
+    assert agent() is not first
+    assert len(builds) == 2
+
+
+def test_async_factory_rebuilds_when_tool_set_changes():
+    tools = [lookup]
+    builds = []
+
+    async def tool_set():
+        return tools_fingerprint(tools)
+
+    @cached_agent_factory(key=tool_set)
+    async def agent():
+        builds.append(list(tools))
+        return object()
+
+    async def run():
+        first = await agent()
+        assert await agent() is first
+        tools.append(fetch)
+        second = await agent()
+        assert second is not first
+        assert await agent() is second
+
+    asyncio.run(run())
+    assert len(builds) == 2
+    assert tools_fingerprint([lookup, fetch]) == tools_fingerprint([fetch, lookup])
@@ -8,7 +8,8 @@ from langchain_core.messages import (
     ToolCall,
     ToolMessage,
 )
-from langgraph.types import Overwrite
+from langgraph.runtime import Runtime
+from langgraph.types import Command, Overwrite
 from langgraph.store.memory import InMemoryStore
 
 from deepagents.middleware.filesystem import (
@@ -21,7 +22,17 @@ from deepagents.backends import StoreBackend, CompositeBackend, StateBackend
 
 from deepagents.backends.utils import create_file_data, update_file_data
 from deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
-from deepagents.middleware.subagents import DEFAULT_GENERAL_PURPOSE_DESCRIPTION, TASK_SYSTEM_PROMPT, TASK_TOOL_DESCRIPTION, SubAgentMiddleware
+from deepagents.middleware.token_accounting import MessageTokenCounter, TokenAccountingMiddleware
+from deepagents.middleware.tool_result_aging import ToolResultAgingMiddleware
+from deepagents.middleware.subagents import (
+    DEFAULT_GENERAL_PURPOSE_DESCRIPTION,
+    TASK_SYSTEM_PROMPT,
+    TASK_TOOL_DESCRIPTION,
+    SubAgentMiddleware,
+    _get_subagents,
+    clear_subagent_graph_cache,
+    subagent_graph_cache_stats,
+)
 from deepagents.backends.utils import truncate_if_too_long
 
 def build_composite_state_backend(runtime: ToolRuntime, *, routes):
@@ -71,27 +82,27 @@ class TestFilesystemMiddleware:
         middleware = FilesystemMiddleware()
         assert callable(middleware.backend)
         assert middleware.system_prompt == FILESYSTEM_SYSTEM_PROMPT
-        assert len(middleware.tools) == 6
+        assert len(middleware.tools) == 8
 
     def test_init_with_composite_backend(self):
         backend_factory = lambda rt: build_composite_state_backend(rt, routes={"/memories/": (lambda r: StoreBackend(r))})
         middleware = FilesystemMiddleware(backend=backend_factory)
         assert callable(middleware.backend)
         assert middleware.system_prompt == FILESYSTEM_SYSTEM_PROMPT
-        assert len(middleware.tools) == 6
+        assert len(middleware.tools) == 8
 
     def test_init_custom_system_prompt_default(self):
         middleware = FilesystemMiddleware(system_prompt="Custom system prompt")
         assert callable(middleware.backend)
         assert middleware.system_prompt == "Custom system prompt"
-        assert len(middleware.tools) == 6
+        assert len(middleware.tools) == 8
 
     def test_init_custom_system_prompt_with_composite(self):
         backend_factory = lambda rt: build_composite_state_backend(rt, routes={"/memories/": (lambda r: StoreBackend(r))})
         middleware = FilesystemMiddleware(backend=backend_factory, system_prompt="Custom system prompt")
         assert callable(middleware.backend)
         assert middleware.system_prompt == "Custom system prompt"
-        assert len(middleware.tools) == 6
+        assert len(middleware.tools) == 8
 
     def test_init_custom_tool_descriptions_default(self):
         middleware = FilesystemMiddleware(custom_tool_descriptions={"ls": "Custom ls tool description"})
@@ -824,6 +835,199 @@ class TestFilesystemMiddleware:
         assert lines[1].count("m") == 2000
         assert "     4\tline4" in lines[2]
 
+    def test_read_file_returns_notice_for_unchanged_window(self):
+        middleware = FilesystemMiddleware()
+        read_file_tool = next(tool for tool in middleware.tools if tool.name == "read_file")
+        files = {"/notes.txt": create_file_data("\n".join(f"line {i}" for i in range(400)))}
+
+        def call(call_id, messages, files, **args):
+            state = FilesystemState(messages=messages, files=files)
+            runtime = ToolRuntime(
+                state=state, context=None, tool_call_id=call_id, store=None, stream_writer=lambda _: None,
+                config={"metadata": {"langgraph_step": len(messages) + 1}},
+            )
+            return read_file_tool.invoke({"type": "tool_call", "name": "read_file", "id": call_id, "args": {"file_path": "/notes.txt", **args, "runtime": runtime}})
+
+        first = call("c1", [], files)
+        assert "line 399" in first.content
+
+        repeat = call("c2", [first], files)
+        assert "unchanged since your last read at step 1" in repeat.content
+        assert middleware.unchanged_read_stats.stubs == 1
+        assert middleware.unchanged_read_stats.tokens_saved > 1000
+
+        # A later repeat still compares against the full read, not the notice
+        assert "unchanged" in call("c3", [first, repeat], files).content
+        assert "line 399" in call("c4", [first, repeat], files, force=True).content
+        assert "line 10" in call("c5", [first], files, offset=10, limit=5).content
+
+        changed = {"/notes.txt": update_file_data(files["/notes.txt"], "new content")}
+        assert "new content" in call("c6", [first], changed).content
+        # The earlier result is no longer in the conversation (e.g. trimmed)
+        assert "line 399" in call("c7", [], files).content
+
+        assert FilesystemMiddleware(skip_unchanged_reads=False).unchanged_read_stats is None
+
+    def test_read_files_reads_batch_in_order(self):
+        state = FilesystemState(
+            messages=[],
+            files={
+                "/a.txt": create_file_data("alpha\nbeta"),
+                "/b.txt": create_file_data("\n".join(f"line {i}" for i in range(10))),
+            },
+        )
+        middleware = FilesystemMiddleware()
+        read_files_tool = next(tool for tool in middleware.tools if tool.name == "read_files")
+        result = read_files_tool.invoke(
+            {
+                "files": [
+                    {"file_path": "/b.txt", "offset": 5, "limit": 2},
+                    {"file_path": "/missing.txt"},
+                    {"file_path": "/a.txt"},
+                    {"file_path": "../etc/passwd"},
+                ],
+                "runtime": ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={}),
+            }
+        )
+        sections = result.split("\n\n")
+        assert sections[0] == "==> /b.txt <==\n     6\tline 5\n     7\tline 6"
+        assert sections[1].startswith("==> /missing.txt <==\nError: File '/missing.txt' not found")
+        assert "     2\tbeta" in sections[2]
+        assert "Path traversal not allowed" in sections[3]
+
+    def test_read_files_respects_output_budget(self, monkeypatch):
+        import deepagents.middleware.filesystem as fs_module
+
+        monkeypatch.setattr(fs_module, "READ_FILES_CHAR_BUDGET", 100)
+        state = FilesystemState(
+            messages=[],
+            files={f"/f{i}.txt": create_file_data("x" * 60) for i in range(3)},
+        )
+        middleware = FilesystemMiddleware()
+        read_files_tool = next(tool for tool in middleware.tools if tool.name == "read_files")
+        result = read_files_tool.invoke(
+            {
+                "files": [{"file_path": f"/f{i}.txt"} for i in range(3)],
+                "runtime": ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={}),
+            }
+        )
+        assert "==> /f0.txt <==" in result
+        assert "[truncated" in result
+        assert result.endswith("Output limit reached; not included: /f2.txt")
+
+    def test_multi_edit_is_atomic_and_reports_counts(self):
+        state = FilesystemState(messages=[], files={"/app.py": create_file_data("a = 1\nb = a + a\nprint(b)")})
+        middleware = FilesystemMiddleware()
+        multi_edit_tool = next(tool for tool in middleware.tools if tool.name == "multi_edit")
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="m1", store=None, stream_writer=lambda _: None, config={})
+
+        failed = multi_edit_tool.invoke(
+            {
+                "file_path": "/app.py",
+                "edits": [{"old_string": "print", "new_string": "log"}, {"old_string": "missing", "new_string": "x"}],
+                "runtime": runtime,
+            }
+        )
+        assert failed.startswith("Error: Edit 2 of 2 failed, no changes were made.")
+
+        result = multi_edit_tool.invoke(
+            {
+                "file_path": "/app.py",
+                "edits": [
+                    {"old_string": "a", "new_string": "x", "replace_all": True},
+                    {"old_string": "print(b)", "new_string": "print(b * x)"},
+                ],
+                "runtime": runtime,
+            }
+        )
+        assert isinstance(result, Command)
+        assert result.update["files"]["/app.py"]["content"] == ["x = 1", "b = x + x", "print(b * x)"]
+        assert "instances replaced per edit: 3, 1" in result.update["messages"][0].content
+
+    def test_search_tools_paginate_with_cursor(self, monkeypatch):
+        import deepagents.middleware.filesystem as fs_module
+
+        monkeypatch.setattr(fs_module, "SEARCH_PAGE_CHAR_BUDGET", 45)
+        monkeypatch.setattr(fs_module, "BACKEND_PAGE_SIZE", 2)
+        files = {f"/src/f{i}.py": create_file_data("needle\nhay\nneedle") for i in range(6)}
+        state = FilesystemState(messages=[], files=files)
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+        middleware = FilesystemMiddleware(backend=lambda rt: CompositeBackend(default=StateBackend(rt), routes={}))
+        tools = {tool.name: tool for tool in middleware.tools}
+
+        def all_pages(name, args):
+            outputs, cursor = [], None
+            while True:
+                out = tools[name].invoke({**args, "runtime": runtime, **({"cursor": cursor} if cursor else {})})
+                outputs.append(out)
+                last = out[-1] if isinstance(out, list) else out.rsplit("\n", 1)[-1]
+                if "cursor=" not in last:
+                    return outputs
+                cursor = last.split('cursor="')[1].split('"')[0]
+
+        pages = all_pages("grep", {"pattern": "needle", "output_mode": "count"})
+        assert len(pages) > 1
+        counts = [line for page in pages for line in page.split("\n") if not line.startswith("...")]
+        assert counts == [f"/src/f{i}.py: 2" for i in range(6)]
+
+        pages = all_pages("grep", {"pattern": "needle", "output_mode": "content"})
+        content = "\n".join(line for page in pages for line in page.split("\n") if not line.startswith(("...", "/")))
+        assert content.count("needle") == 12
+
+        pages = all_pages("glob", {"pattern": "**/*.py"})
+        assert len(pages) > 1
+        assert [p for page in pages for p in page if not p.startswith("...")] == sorted(files)
+
+        pages = all_pages("ls", {"path": "/src"})
+        assert len(pages) > 1
+        assert [p for page in pages for p in page if not p.startswith("...")] == sorted(files)
+
+        bad = tools["grep"].invoke({"pattern": "hay", "runtime": runtime, "cursor": pages[0][-1].split('cursor="')[1].split('"')[0]})
+        assert bad.startswith("Error: cursor does not belong to this grep query")
+
+    def test_ls_tree_mode(self):
+        files = {p: create_file_data("x") for p in ["/src/main.py", "/src/pkg/mod.py", "/src/pkg/sub/deep.py", "/setup.py"]}
+        state = FilesystemState(messages=[], files=files)
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+        ls_tool = next(tool for tool in FilesystemMiddleware().tools if tool.name == "ls")
+
+        assert ls_tool.invoke({"path": "/", "depth": 3, "runtime": runtime}) == "\n".join([
+            "/",
+            "  setup.py",
+            "  src/",
+            "    main.py",
+            "    pkg/",
+            "      mod.py",
+            "      sub/",
+        ])
+        truncated = ls_tool.invoke({"path": "/src", "depth": 5, "max_entries": 2, "runtime": runtime})
+        assert truncated.split("\n")[:3] == ["/src/", "  main.py", "  pkg/"]
+        assert "truncated after 2 entries" in truncated
+        # depth=1 keeps the flat listing
+        assert ls_tool.invoke({"path": "/src", "runtime": runtime}) == ["/src/main.py", "/src/pkg/"]
+
+    def test_grep_context_lines_merge_windows(self):
+        content = "\n".join(["import os", "def a():", "    pass", "", "", "", "def b():", "    return 1", "def c():", "    pass"])
+        state = FilesystemState(messages=[], files={"/m.py": create_file_data(content)})
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+        grep_tool = next(tool for tool in FilesystemMiddleware().tools if tool.name == "grep")
+
+        result = grep_tool.invoke({"pattern": "^def", "output_mode": "content", "before": 1, "after": 1, "runtime": runtime})
+        assert result == "\n".join([
+            "/m.py:",
+            "  1- import os",
+            "  2: def a():",
+            "  3-     pass",
+            "  --",
+            "  6- ",
+            "  7: def b():",
+            "  8-     return 1",
+            "  9: def c():",
+            "  10-     pass",
+        ])
+        # Context is ignored outside content mode
+        assert grep_tool.invoke({"pattern": "^def", "output_mode": "count", "after": 3, "runtime": runtime}) == "/m.py: 3"
+
     def test_intercept_short_toolmessage(self):
         """Test that small ToolMessages pass through unchanged."""
         middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000)
@@ -931,6 +1135,103 @@ class TestFilesystemMiddleware:
         assert isinstance(result, Command)
         assert "/large_tool_results/test_call_id" in result.update["files"]
 
+    def test_intercept_spills_to_disk_outside_state(self, tmp_path):
+        from deepagents.backends.spill import ToolResultSpill
+
+        spill = ToolResultSpill(tmp_path)
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, tool_result_spill=spill)
+        state = FilesystemState(messages=[], files={})
+        runtime = ToolRuntime(
+            state=state, context=None, tool_call_id="test_123", store=None, stream_writer=lambda _: None,
+            config={"configurable": {"thread_id": "thread-1"}},
+        )
+
+        large_content = "\n".join(f"row {i}" for i in range(2000))
+        result = middleware._intercept_large_tool_result(ToolMessage(content=large_content, tool_call_id="call_1"), runtime)
+
+        assert isinstance(result, ToolMessage)
+        assert "/large_tool_results/call_1" in result.content
+        assert "row 9" in result.content and "row 10\n" not in result.content
+        assert (tmp_path / "thread-1" / "call_1").read_text() == large_content
+
+        read_file_tool = next(tool for tool in middleware.tools if tool.name == "read_file")
+        page = read_file_tool.invoke({"file_path": "/large_tool_results/call_1", "offset": 1500, "limit": 1, "runtime": runtime})
+        assert "row 1500" in page
+
+        assert spill.delete_thread("thread-1") == len(large_content)
+        assert not (tmp_path / "thread-1").exists()
+
+    def test_spill_collection_keeps_the_file_just_written(self, tmp_path):
+        from deepagents.backends.spill import ToolResultSpill
+
+        spill = ToolResultSpill(tmp_path, max_bytes=100, collect_interval=0)
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, tool_result_spill=spill)
+        runtime = ToolRuntime(
+            state=FilesystemState(messages=[], files={}), context=None, tool_call_id="t", store=None, stream_writer=lambda _: None,
+            config={"configurable": {"thread_id": "thread-1"}},
+        )
+
+        result = middleware._intercept_large_tool_result(ToolMessage(content="x" * 5000, tool_call_id="call_1"), runtime)
+
+        # The spilled result alone exceeds max_bytes, but the message still points at a file
+        assert "/large_tool_results/call_1" in result.content
+        assert (tmp_path / "thread-1" / "call_1").exists()
+
+    @pytest.mark.parametrize(("backend_reuse", "expected_builds", "expected_live"), [("call", 2, 0), ("run", 1, 0), ("thread", 1, 1)])
+    def test_backend_reuse_scopes(self, backend_reuse, expected_builds, expected_live):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        class ToolCallingFakeModel(GenericFakeChatModel):
+            def bind_tools(self, tools, **kwargs):
+                return self
+
+        model = ToolCallingFakeModel(messages=iter([
+            AIMessage(content="", tool_calls=[ToolCall(name="write_file", args={"file_path": "/a.txt", "content": "hi"}, id="call_1")]),
+            AIMessage(content="", tool_calls=[ToolCall(name="read_file", args={"file_path": "/a.txt"}, id="call_2")]),
+            AIMessage(content="done"),
+        ]))
+        builds = []
+
+        def factory(rt):
+            builds.append(rt)
+            return StateBackend(rt)
+
+        middleware = FilesystemMiddleware(backend=factory, backend_reuse=backend_reuse)
+        agent = create_agent(model=model, middleware=[middleware], tools=[], checkpointer=InMemorySaver())
+        result = agent.invoke({"messages": [HumanMessage(content="go")]}, {"configurable": {"thread_id": "t1"}})
+
+        # The reused StateBackend still sees the state of the later call
+        assert "hi" in result["messages"][-2].content
+        assert len(builds) == expected_builds
+        assert len(middleware._backend_cache or []) == expected_live
+        middleware.release_backends()
+        assert len(middleware._backend_cache or []) == 0
+
+    def test_run_scoped_backend_outlives_sibling_runs(self):
+        from langchain_core.runnables import RunnableLambda
+
+        closed = []
+
+        class ClosingBackend(StateBackend):
+            def close(self):
+                closed.append(self)
+
+        middleware = FilesystemMiddleware(backend=lambda rt: ClosingBackend(rt), backend_reuse="run")
+        runtime = ToolRuntime(state={"messages": []}, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={"configurable": {"thread_id": "t1"}})
+
+        def parallel_subagents(_):
+            # Two subagent runs share the middleware and the parent's thread id
+            middleware.before_agent({"messages": []}, Runtime())
+            middleware.before_agent({"messages": []}, Runtime())
+            middleware._get_backend(runtime)
+            middleware.after_agent({"messages": []}, Runtime())
+            assert closed == [] and len(middleware._backend_cache) == 1
+            middleware.after_agent({"messages": []}, Runtime())
+            assert len(closed) == 1 and len(middleware._backend_cache) == 0
+
+        RunnableLambda(parallel_subagents).invoke(None, {"configurable": {"thread_id": "t1"}})
+
 
 @pytest.mark.requires("langchain_openai")
 class TestSubagentMiddleware:
@@ -965,6 +1266,187 @@ class TestSubagentMiddleware:
         assert middleware.system_prompt == "Use the task tool to call a subagent."
 
 
+class TestSubagentGraphCache:
+    def test_equal_config_reuses_compiled_graph(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.tools import tool
+
+        @tool
+        def lookup(query: str) -> str:
+            """Look something up."""
+            return query
+
+        @tool
+        def other(query: str) -> str:
+            """Look something else up."""
+            return query
+
+        model = GenericFakeChatModel(messages=iter([]))
+        shared_middleware = [FilesystemMiddleware()]
+        clear_subagent_graph_cache()
+        hits = subagent_graph_cache_stats.hits
+
+        def build(tools, cache=True, middleware=shared_middleware):
+            agents, _ = _get_subagents(
+                default_model=model,
+                default_tools=tools,
+                default_middleware=middleware,
+                default_interrupt_on=None,
+                subagents=[{"name": "researcher", "description": "Researches.", "system_prompt": "Research."}],
+                general_purpose_agent=True,
+                cache_subagents=cache,
+            )
+            return agents
+
+        first = build([lookup])
+        second = build([lookup])
+        assert second["general-purpose"] is first["general-purpose"]
+        assert second["researcher"] is first["researcher"]
+        assert subagent_graph_cache_stats.hits == hits + 2
+        assert build([other])["general-purpose"] is not first["general-purpose"]
+        assert build([lookup], cache=False)["general-purpose"] is not first["general-purpose"]
+        # Backend factories held by middleware compare by code, not by the middleware object
+        other_backend = [FilesystemMiddleware(backend=lambda rt: StateBackend(rt))]
+        assert build([lookup], middleware=other_backend)["general-purpose"] is not first["general-purpose"]
+        assert build([lookup], middleware=[FilesystemMiddleware()])["general-purpose"] is first["general-purpose"]
+        clear_subagent_graph_cache()
+
+    def test_rebuilt_tools_and_middleware_reuse_compiled_graph(self):
+        from langchain.agents.middleware import wrap_tool_call
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.tools import StructuredTool
+
+        model = GenericFakeChatModel(messages=iter([]))
+        clear_subagent_graph_cache()
+
+        def build(blocked: bool):
+            # Like a graph factory, every call creates new tool and middleware objects
+            def browse(url: str) -> str:
+                return url
+
+            def handler(request, call):
+                return "blocked" if blocked else call(request)
+
+            agents, _ = _get_subagents(
+                default_model=model,
+                default_tools=[StructuredTool.from_function(browse, description="Browse.")],
+                default_middleware=[FilesystemMiddleware(), wrap_tool_call(handler)],
+                default_interrupt_on=None,
+                subagents=[],
+                general_purpose_agent=True,
+                cache_subagents=True,
+            )
+            return agents["general-purpose"]
+
+        first = build(blocked=False)
+        assert build(blocked=False) is first
+        # A handler closing over a different setting is a different configuration
+        assert build(blocked=True) is not first
+        clear_subagent_graph_cache()
+
+    def test_create_deep_agent_shares_subagents_only_for_default_middleware(self):
+        from langchain.agents.middleware import wrap_tool_call
+        from langchain_anthropic import ChatAnthropic
+
+        from deepagents.graph import create_deep_agent
+
+        def make_model():
+            return ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="x")
+
+        clear_subagent_graph_cache()
+        create_deep_agent(model=make_model())
+        hits = subagent_graph_cache_stats.hits
+        create_deep_agent(model=make_model())
+        assert subagent_graph_cache_stats.hits == hits + 1
+
+        def spec(handler):
+            return {"name": "custom", "description": "Custom.", "system_prompt": "Custom.", "middleware": [wrap_tool_call(handler)]}
+
+        misses = subagent_graph_cache_stats.misses
+        create_deep_agent(model=make_model(), subagents=[spec(lambda request, call: call(request))])
+        create_deep_agent(model=make_model(), subagents=[spec(lambda request, call: "blocked")])
+        assert subagent_graph_cache_stats.hits == hits + 1
+        assert subagent_graph_cache_stats.misses == misses
+        clear_subagent_graph_cache()
+
+
+class TestSubagentFileLayers:
+    @staticmethod
+    def _graph(state_schema, node):
+        from langgraph.graph import StateGraph
+
+        builder = StateGraph(state_schema)
+        builder.add_node("run", node)
+        builder.set_entry_point("run")
+        return builder.compile()
+
+    @staticmethod
+    def _run_task(runnable, parent_state):
+        from deepagents.middleware.subagents import _create_task_tool
+
+        task = _create_task_tool(
+            default_model="unused",
+            default_tools=[],
+            default_middleware=None,
+            default_interrupt_on=None,
+            subagents=[{"name": "writer", "description": "Writes.", "runnable": runnable}],
+            general_purpose_agent=False,
+        )
+        runtime = ToolRuntime(
+            state=parent_state, context=None, tool_call_id="call_1", store=None, stream_writer=lambda _: None, config={}
+        )
+        return task.func(description="write c", subagent_type="writer", runtime=runtime)
+
+    def test_subagent_reads_parent_files_and_returns_only_its_changes(self):
+        from typing_extensions import TypedDict
+
+        class LayeredState(TypedDict, total=False):
+            messages: list
+            files: dict
+            base_files: dict
+            notes: str
+            topic: str
+
+        parent_files = {"/a.txt": create_file_data("a"), "/b.txt": create_file_data("b")}
+        seen = {}
+
+        def run(state):
+            seen.update(state)
+            files = {"/a.txt": state["base_files"]["/a.txt"], "/b.txt": create_file_data("b2"), "/c.txt": create_file_data("c")}
+            return {"messages": [AIMessage(content="done")], "files": files, "notes": "changed"}
+
+        command = self._run_task(
+            self._graph(LayeredState, run),
+            {"messages": [], "files": parent_files, "notes": "original", "topic": "same", "history_tokens": 42},
+        )
+
+        assert "files" not in seen
+        assert seen["base_files"] is parent_files
+        assert "history_tokens" not in seen
+        # Only entries and keys the subagent changed come back
+        assert set(command.update["files"]) == {"/b.txt", "/c.txt"}
+        assert set(command.update) == {"files", "notes", "messages"}
+
+    def test_subagent_without_base_files_schema_still_gets_parent_files(self):
+        from typing_extensions import TypedDict
+
+        class LegacyState(TypedDict, total=False):
+            messages: list
+            files: dict
+
+        parent_files = {"/a.txt": create_file_data("a")}
+        seen = {}
+
+        def run(state):
+            seen.update(state)
+            return {"messages": [AIMessage(content="done")], "files": {**state["files"], "/c.txt": create_file_data("c")}}
+
+        command = self._run_task(self._graph(LegacyState, run), {"messages": [], "files": parent_files})
+
+        assert seen["files"] == parent_files
+        assert set(command.update["files"]) == {"/c.txt"}
+
+
 class TestPatchToolCallsMiddleware:
     def test_first_message(self) -> None:
         input_messages = [
@@ -1096,6 +1578,112 @@ class TestPatchToolCallsMiddleware:
         assert patched_messages[7].content == "What is the weather in Tokyo?"
 
 
+class TestToolResultAgingMiddleware:
+    def test_old_results_move_to_files(self) -> None:
+        snapshot = "\n".join(f"row {i} " + "x" * 50 for i in range(100))
+
+        def call(call_id, name):
+            return AIMessage(content="", tool_calls=[ToolCall(id=call_id, name=name, args={})], id=f"ai-{call_id}")
+
+        messages = [
+            HumanMessage(content="Browse", id="h"),
+            call("c1", "take_snapshot"),
+            ToolMessage(content=snapshot, tool_call_id="c1", name="take_snapshot", id="t1"),
+            call("c2", "read_file"),
+            ToolMessage(content=snapshot, tool_call_id="c2", name="read_file", id="t2"),
+            call("c3", "take_snapshot"),
+            ToolMessage(content=snapshot, tool_call_id="c3", name="take_snapshot", id="t3"),
+            AIMessage(content="Looking", id="ai-4"),
+        ]
+        state = {"messages": messages, "files": {}}
+        middleware = ToolResultAgingMiddleware(keep_turns=3)
+
+        update = middleware.before_model(state, Runtime())
+        # Only c1 is 3 turns old; filesystem tool results are never moved
+        assert [m.id for m in update["messages"]] == ["t1"]
+        stub = update["messages"][0]
+        assert (stub.tool_call_id, stub.name) == ("c1", "take_snapshot")
+        assert "/large_tool_results/c1" in stub.content and "row 0" in stub.content
+        assert len(stub.content) < len(snapshot) // 5
+        assert update["files"]["/large_tool_results/c1"]["content"] == snapshot.split("\n")
+
+        # Once replaced, nothing is moved again
+        state = {"messages": [stub if m.id == "t1" else m for m in messages], "files": update["files"]}
+        assert middleware.before_model(state, Runtime()) is None
+
+
+class TestTokenAccountingMiddleware:
+    def test_only_new_or_rewritten_messages_are_measured(self) -> None:
+        measured: list[str] = []
+
+        def count_text(text: str) -> int:
+            measured.append(text)
+            return len(text.split())
+
+        middleware = TokenAccountingMiddleware(MessageTokenCounter(count_text))
+        messages = [HumanMessage(content="one two three", id="h1"), AIMessage(content="four five", id="a1")]
+        update = middleware.before_model({"messages": messages}, Runtime())
+        assert update["message_tokens"] == {"h1": [13, 6], "a1": [9, 5]}
+        assert update["history_tokens"] == 11
+        assert measured == ["one two three", "four five"]
+
+        # A fresh counter (e.g. after a restart) reuses the counts kept in state
+        measured.clear()
+        middleware = TokenAccountingMiddleware(MessageTokenCounter(count_text))
+        messages = [*messages[1:], HumanMessage(content="six", id="h2")]
+        update = middleware.before_model({"messages": messages, **update}, Runtime())
+        assert measured == ["six"]
+        assert update["message_tokens"] == {"a1": [9, 5], "h2": [3, 4]}
+        assert update["history_tokens"] == 9
+        # The shared counter answers summarization's full-history count without measuring again
+        assert middleware.counter(messages) == 9
+        assert measured == ["six"]
+
+    def test_for_model_matches_summarization_default_counter(self) -> None:
+        from langchain.agents.middleware.summarization import SummarizationMiddleware
+        from langchain_anthropic import ChatAnthropic
+
+        model = ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="x")
+        messages = [
+            HumanMessage(content="word " * 400, id="h1"),
+            AIMessage(
+                content="reply " * 50,
+                id="a1",
+                response_metadata={"model_provider": "anthropic"},
+                usage_metadata={"input_tokens": 700, "output_tokens": 100, "total_tokens": 800},
+            ),
+            HumanMessage(content="more " * 100, id="h2"),
+        ]
+        expected = SummarizationMiddleware(model=model, trigger=("tokens", 170000)).token_counter(messages)
+        counter = MessageTokenCounter.for_model(model)
+        assert counter.chars_per_token == 3.3
+        assert counter(messages) == expected
+        # Without usage metadata no correction applies
+        assert MessageTokenCounter.for_model(model)(messages[:1]) == MessageTokenCounter(chars_per_token=3.3)(messages[:1])
+
+    def test_parallel_task_calls_do_not_return_token_counts(self) -> None:
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+        from deepagents.graph import create_deep_agent
+
+        class ToolCallingFakeModel(GenericFakeChatModel):
+            def bind_tools(self, tools, **kwargs):
+                return self
+
+        calls = [
+            {"name": "task", "args": {"description": f"job {i}", "subagent_type": "general-purpose"}, "id": f"call_{i}"}
+            for i in range(2)
+        ]
+        model = ToolCallingFakeModel(
+            messages=iter([AIMessage(content="", tool_calls=calls), AIMessage(content="done"), AIMessage(content="done"), AIMessage(content="all done")])
+        )
+        agent = create_deep_agent(model=model)
+        result = agent.invoke({"messages": [HumanMessage(content="fan out")]})
+
+        assert result["messages"][-1].content == "all done"
+        assert set(result["message_tokens"]) == {m.id for m in result["messages"][:-1]}
+
+
 class TestTruncation:
     def test_truncate_list_result_no_truncation(self):
 